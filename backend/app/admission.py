@@ -0,0 +1,205 @@
+import math
+import statistics
+import time
+from typing import Annotated
+
+import redis
+import redis.asyncio as aioredis
+from fastapi import Depends, HTTPException, Request, status
+
+from app.config import settings
+from app.dependencies import get_current_user
+from app.models import User
+
+# Job classes, each with its own Celery queue. Workers consume the queues in
+# strict order, so signed-in jobs are never stuck behind an anonymous burst.
+PRIVATE = "private"
+PUBLIC = "public"
+
+QUEUES = {PRIVATE: settings.queue_private, PUBLIC: settings.queue_public}
+MAX_DEPTH = {PRIVATE: settings.queue_max_depth_private, PUBLIC: settings.queue_max_depth_public}
+
+RATE_LIMIT_PREFIX = "rate-limit:"
+METRICS_PREFIX = "queue-metrics:"
+RECENT_WAITS = 200
+
+# Short timeouts: limits fail open rather than stall submissions when Redis is slow
+async_redis = aioredis.Redis.from_url(settings.redis_url, socket_connect_timeout=0.5, socket_timeout=0.5)
+sync_redis = redis.Redis.from_url(settings.redis_url, socket_connect_timeout=0.5, socket_timeout=0.5)
+
+# Refill by elapsed time, then take `cost` tokens (one per job). Runs atomically in Redis on Redis'
+# own clock, so every API process shares one bucket per key. Returns
+# {allowed, seconds until a token is available}; the wait is a string because
+# Redis truncates Lua numbers to integers.
+TOKEN_BUCKET = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or burst
+local ts = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+
+local allowed = 0
+local wait = 0
+if tokens >= cost then
+    tokens = tokens - cost
+    allowed = 1
+else
+    wait = (cost - tokens) / rate
+end
+
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+return {allowed, tostring(wait)}
+"""
+
+token_bucket = async_redis.register_script(TOKEN_BUCKET)
+
+
+def retry_after_header(seconds: float) -> dict:
+    return {"Retry-After": str(max(1, math.ceil(seconds)))}
+
+
+async def take_token(key: str, per_minute: float, burst: int, cost: int = 1) -> float:
+    # 0 when the request may go ahead, otherwise how long until it could. A
+    # request never costs more than a full bucket, or it could never go ahead.
+    allowed, wait = await token_bucket(keys=[RATE_LIMIT_PREFIX + key], args=[per_minute / 60, burst, min(cost, burst)])
+    return 0.0 if int(allowed) else float(wait)
+
+
+async def enforce_rate_limit(key: str, per_minute: float, burst: int, cost: int = 1):
+    if not settings.rate_limit_enabled:
+        return
+
+    try:
+        wait = await take_token(key, per_minute, burst, cost)
+    except redis.RedisError as e:
+        print(f"Rate limiter unavailable, letting request through: {e}")
+        return
+
+    if wait:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many jobs submitted. Please wait before trying again.",
+            headers=retry_after_header(wait)
+        )
+
+
+def client_ip(request: Request) -> str:
+    forwarded = request.headers.get("x-forwarded-for")
+    if settings.trust_forwarded_for and forwarded:
+        return forwarded.split(",")[0].strip()
+    return request.client.host if request.client else "unknown"
+
+
+async def limit_user(user: User, jobs: int = 1):
+    # Multi-style requests are charged one token per job they queue
+    await enforce_rate_limit(f"user:{user.id}", settings.rate_limit_user_per_minute, settings.rate_limit_user_burst, jobs)
+
+
+async def rate_limited_user(current_user: Annotated[User, Depends(get_current_user)]) -> User:
+    await limit_user(current_user)
+    return current_user
+
+
+async def rate_limited_ip(request: Request) -> str:
+    ip = client_ip(request)
+    await enforce_rate_limit(f"ip:{ip}", settings.rate_limit_ip_per_minute, settings.rate_limit_ip_burst)
+    return ip
+
+
+async def queue_depth(job_class: str) -> int:
+    # The Redis broker keeps each Celery queue as a plain list
+    return await async_redis.llen(QUEUES[job_class])
+
+
+def summarize_waits(waits: list[float]) -> dict:
+    if not waits:
+        return {"samples": 0, "avg_seconds": None, "p50_seconds": None, "p95_seconds": None}
+    waits = sorted(waits)
+    return {
+        "samples": len(waits),
+        "avg_seconds": round(statistics.fmean(waits), 3),
+        "p50_seconds": round(statistics.median(waits), 3),
+        "p95_seconds": round(waits[max(0, math.ceil(len(waits) * 0.95) - 1)], 3)
+    }
+
+
+async def recent_waits(job_class: str) -> list[float]:
+    return [float(wait) for wait in await async_redis.lrange(f"{METRICS_PREFIX}{job_class}:waits", 0, -1)]
+
+
+async def count(job_class: str, field: str, amount: int = 1):
+    try:
+        await async_redis.hincrby(f"{METRICS_PREFIX}{job_class}", field, amount)
+    except redis.RedisError:
+        pass
+
+
+async def admit(job_class: str, jobs: int = 1):
+    """
+    Refuses new jobs with 503 once their queue would hold more than the
+    workers can get through in reasonable time. Retry-After is the current
+    queue wait, so clients come back roughly when there is room.
+    """
+    try:
+        depth = await queue_depth(job_class)
+    except redis.RedisError as e:
+        # Without Redis there is no broker either; let send_task report that
+        print(f"Admission control unavailable: {e}")
+        return
+
+    if depth + jobs <= MAX_DEPTH[job_class]:
+        await count(job_class, "admitted", jobs)
+        return
+
+    await count(job_class, "rejected", jobs)
+    try:
+        wait = summarize_waits(await recent_waits(job_class))["avg_seconds"]
+    except redis.RedisError:
+        wait = None
+
+    retry_after = min(300, wait) if wait else settings.admission_retry_after_seconds
+    raise HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="The service is busy. Please try again shortly.",
+        headers=retry_after_header(retry_after)
+    )
+
+
+def record_wait(job_class: str, enqueued_at: float):
+    # Called by the worker when it picks a job up
+    wait = max(0.0, time.time() - enqueued_at)
+    metrics_key = f"{METRICS_PREFIX}{job_class}"
+    try:
+        pipe = sync_redis.pipeline()
+        pipe.hincrby(metrics_key, "started", 1)
+        pipe.hincrbyfloat(metrics_key, "wait_seconds_total", wait)
+        pipe.lpush(f"{metrics_key}:waits", wait)
+        pipe.ltrim(f"{metrics_key}:waits", 0, RECENT_WAITS - 1)
+        pipe.execute()
+    except redis.RedisError as e:
+        print(f"Could not record queue wait: {e}")
+    return wait
+
+
+async def queue_stats() -> dict:
+    stats = {}
+    for job_class, queue in QUEUES.items():
+        counters = await async_redis.hgetall(f"{METRICS_PREFIX}{job_class}")
+        counters = {name.decode(): float(value) for name, value in counters.items()}
+        stats[job_class] = {
+            "queue": queue,
+            "depth": await queue_depth(job_class),
+            "max_depth": MAX_DEPTH[job_class],
+            "admitted": int(counters.get("admitted", 0)),
+            "rejected": int(counters.get("rejected", 0)),
+            "started": int(counters.get("started", 0)),
+            "wait_seconds_total": round(counters.get("wait_seconds_total", 0.0), 3),
+            "recent_wait": summarize_waits(await recent_waits(job_class))
+        }
+    return stats
@@ -0,0 +1,77 @@
+import os
+import tempfile
+import time
+from typing import Optional
+
+import redis
+
+# Short-lived copies of small uploads, handed from the API to the worker so the
+# worker does not have to fetch them back from object storage. Keys are the
+# sha256 of the bytes, so identical inputs share one blob.
+BLOB_PREFIX = "input-blob:"
+
+
+class RedisBlobStore:
+    def __init__(self, redis_url: str, ttl_seconds: int):
+        self.ttl_seconds = ttl_seconds
+        self.client = redis.Redis.from_url(redis_url, socket_connect_timeout=0.5, socket_timeout=2)
+
+    def put(self, key: str, data: bytes):
+        self.client.set(BLOB_PREFIX + key, data, ex=self.ttl_seconds)
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.client.get(BLOB_PREFIX + key)
+
+    def sweep(self) -> int:
+        # Redis expires blobs itself
+        return 0
+
+
+class VolumeBlobStore:
+    """
+    Blobs as files on a volume shared by the API and worker containers. Expiry is
+    by modification time: reads ignore stale files and `sweep` removes them.
+    """
+
+    def __init__(self, root: str, ttl_seconds: int):
+        self.root = root
+        self.ttl_seconds = ttl_seconds
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, key)
+
+    def put(self, key: str, data: bytes):
+        fd, staging = tempfile.mkstemp(dir=self.root, suffix=".partial")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(staging, self._path(key))
+
+    def get(self, key: str) -> Optional[bytes]:
+        try:
+            with open(self._path(key), "rb") as f:
+                if time.time() - os.fstat(f.fileno()).st_mtime > self.ttl_seconds:
+                    return None
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def sweep(self) -> int:
+        removed = 0
+        cutoff = time.time() - self.ttl_seconds
+        for entry in os.scandir(self.root):
+            try:
+                if entry.stat().st_mtime < cutoff:
+                    os.unlink(entry.path)
+                    removed += 1
+            except FileNotFoundError:
+                pass
+        return removed
+
+
+def build_blob_store(settings):
+    if settings.input_blob_store == "redis":
+        return RedisBlobStore(settings.redis_url, settings.input_blob_ttl_seconds)
+    if settings.input_blob_store == "volume":
+        return VolumeBlobStore(settings.input_blob_dir, settings.input_blob_ttl_seconds)
+    return None
@@ -1,3 +1,4 @@
+from typing import Optional
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class Settings(BaseSettings):
@@ -5,21 +6,162 @@ class Settings(BaseSettings):
     secret_key: str
     algorithm: str = "HS256"
     access_token_expire_minutes: int = 30
+    # Signed-in users are cached per token for this long (per API process); 0 disables
+    principal_cache_ttl_seconds: float = 30
+    principal_cache_size: int = 10000
+    # Argon2 runs on its own threads; logins/signups beyond workers + queue depth get 503
+    password_hash_workers: int = 2
+    password_hash_queue_depth: int = 32
     
     redis_url: str
     frontend_url: str
 
-    do_space_name: str
-    do_space_region: str
-    do_access_key: str
-    do_secret_key: str
-    do_full_access_access_key: str
-    do_full_access_secret_key: str
+    # Object storage: s3 (Spaces or any S3-compatible store), local (files on disk) or memory
+    storage_backend: str = "s3"
+    storage_local_dir: str = "/data/storage"
+    # Base URL of this API, used in links to the /files route for local/memory objects
+    storage_public_url: str = "http://localhost:8000"
+    # Behind nginx: hand local files off with X-Accel-Redirect to this internal location
+    storage_accel_redirect_prefix: Optional[str] = None
+
+    # Only required for STORAGE_BACKEND=s3
+    do_space_name: str = ""
+    do_space_region: str = ""
+    do_access_key: str = ""
+    do_secret_key: str = ""
+    do_full_access_access_key: str = ""
+    do_full_access_secret_key: str = ""
+    # Override for non-Spaces S3-compatible stores (e.g. MinIO)
+    s3_endpoint_url: Optional[str] = None
+    s3_public_base_url: Optional[str] = None
 
     postgres_user: str
     postgres_password: str
     postgres_db: str
     database_url: str
+    # Connection pool per engine (each API and worker process has its own). Keep
+    # processes * (pool size + overflow) under Postgres' max_connections.
+    db_pool_size: int = 10
+    db_max_overflow: int = 10
+    db_pool_timeout: float = 10.0
+    db_pool_recycle: int = 1800
+
+    # Style embedding cache (worker side). Only the TFLite backends skip the style
+    # network on a hit; with savedmodel an entry is the decoded style tensor (~3 MB)
+    # and the shared tier is not used. The size counts entries, not bytes.
+    style_cache_size: int = 32
+    style_cache_tier: str = "none" # none, disk, redis (TFLite backends only)
+    style_cache_dir: str = "/tmp/nst-style-cache"
+    style_cache_ttl_seconds: int = 7 * 24 * 3600
+
+    # Inference backend for this worker: savedmodel (float32 hub model), tflite-fp16 or tflite-int8
+    inference_backend: str = "savedmodel"
+    # SavedModel runs as one pre-traced tf.function per content shape bucket
+    inference_compile: bool = True
+    # Model threads; unset means the container's CPU quota (cgroup), not the host's core count
+    inference_threads: Optional[int] = None
+
+    # "local" loads the model in every worker process; "server" sends inference to
+    # the node's inference server (python -m ml_engine.inference_server) over a
+    # Unix socket, so worker processes never import TensorFlow
+    inference_mode: str = "local"
+    inference_socket: str = "/run/nst/inference.sock"
+
+    # Micro-batching across concurrent jobs (needs a threads pool with concurrency > 1)
+    inference_batch_size: int = 1
+    inference_batch_wait_ms: int = 25
+
+    # Multi-style jobs (/generate-batch): styles per request, and styles per model call
+    max_batch_styles: int = 10
+    style_batch_size: int = 4
+
+    # Two-pass jobs: a quick low-resolution preview is published before the full result.
+    # Off by default: it costs every job a second model pass, an upload and a DB write.
+    preview_enabled: bool = False
+    preview_size: int = 160
+
+    # Stored outputs: jpeg, webp or avif (where Pillow supports it). Jobs may pick
+    # their own format and quality; JPEGs are optimized and, by default, progressive.
+    output_format: str = "jpeg"
+    output_quality: int = 75
+    output_progressive_jpeg: bool = True
+    # Long side of the /library grid thumbnail stored with each signed-in result; 0 disables
+    thumbnail_size: int = 320
+
+    # Outputs larger than 512px go through the tiled high-resolution path
+    max_output_size: int = 4096
+
+    # Model artifacts: MODEL_PATH pins an exact local SavedModel, otherwise a
+    # prefetched copy under MODEL_DIR is used before falling back to TF Hub.
+    model_path: Optional[str] = None
+    model_dir: str = "/models"
+    model_warmup: bool = True
+    model_warmup_timeout: float = 300.0
+
+    # Worker pipeline stages: concurrent calls and how many more may queue behind them
+    pipeline_download_workers: int = 4
+    pipeline_download_queue_depth: int = 4
+    pipeline_inference_workers: int = 1
+    pipeline_inference_queue_depth: int = 2
+    pipeline_upload_workers: int = 4
+    pipeline_upload_queue_depth: int = 4
+
+    # Largest content/style upload accepted by the API
+    max_upload_bytes: int = 20 * 1024 * 1024
+
+    # Presigned URL cache: URLs are reused until this fraction of their lifetime has passed
+    presign_expiration_seconds: int = 3600
+    presign_cache_size: int = 10000
+    presign_reuse_fraction: float = 0.5
+    presign_local_signing: bool = False
+
+    # Uploads are decoded at reduced size, EXIF-rotated and re-encoded before storing
+    ingest_normalize: bool = True
+    ingest_max_dim: int = 512
+    ingest_jpeg_quality: int = 95
+
+    # Fast path for small inputs: the API hands the bytes to the worker through a
+    # short-lived blob store and uploads them to object storage in the background
+    input_blob_store: str = "none" # none, redis, volume
+    input_blob_dir: str = "/data/blobs"
+    input_blob_max_bytes: int = 4 * 1024 * 1024
+    input_blob_ttl_seconds: int = 600
+    # Deferred uploads are retried with exponential backoff; a job whose input
+    # never reaches storage is marked FAILED and dropped from the result cache
+    staged_upload_attempts: int = 3
+    staged_upload_backoff_seconds: float = 0.5
+
+    # Content-addressed result cache (dedup of identical content/style/params jobs)
+    result_cache_enabled: bool = True
+    result_cache_hot_ttl_seconds: int = 3600
+    public_result_ttl_seconds: int = 24 * 3600
+
+    # Push status updates (worker -> Redis pub/sub -> SSE)
+    job_events_enabled: bool = True
+    sse_keepalive_seconds: int = 15
+
+    # Metrics: the API serves /metrics, each worker serves its own on this port (0 disables).
+    # Jobs slower than slow_job_seconds are logged with their full stage breakdown.
+    worker_metrics_port: int = 9808
+    slow_job_seconds: float = 30.0
+
+    # Job queues: workers always drain the private (signed-in) queue before the public one
+    queue_private: str = "nst-private"
+    queue_public: str = "nst-public"
+    # Admission control: new jobs are refused with 503 once their queue is this deep
+    queue_max_depth_private: int = 200
+    queue_max_depth_public: int = 50
+    # Retry-After for a full queue until there are recent wait times to go by
+    admission_retry_after_seconds: int = 30
+
+    # Token-bucket rate limits enforced at the API, shared through Redis
+    rate_limit_enabled: bool = True
+    rate_limit_user_per_minute: float = 12
+    rate_limit_user_burst: int = 10
+    rate_limit_ip_per_minute: float = 4
+    rate_limit_ip_burst: int = 4
+    # Take the client IP from X-Forwarded-For (only behind a proxy that sets it)
+    trust_forwarded_for: bool = False
 
     model_config = SettingsConfigDict(env_file=".env")
 
@@ -1,17 +1,47 @@
-from sqlmodel import SQLModel, create_engine, Session
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlmodel import SQLModel, create_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
 from app.config import settings
 import app.models
 
 database_url = settings.database_url
 
 is_sqlite = database_url.startswith("sqlite")
-engine_args = {"connect_args": {"check_same_thread": False}} if is_sqlite else {}
 
-engine = create_engine(database_url, **engine_args)
+
+def pool_args() -> dict:
+    args = {"connect_args": {"check_same_thread": False}} if is_sqlite else {"pool_pre_ping": True}
+    # In-memory SQLite lives in a single connection, so there is no pool to size
+    if ":memory:" not in database_url and database_url not in ("sqlite://", "sqlite+aiosqlite://"):
+        args.update(
+            pool_size=settings.db_pool_size,
+            max_overflow=settings.db_max_overflow,
+            pool_timeout=settings.db_pool_timeout,
+            pool_recycle=settings.db_pool_recycle
+        )
+    return args
+
+
+def async_url(url: str) -> str:
+    # Same database, through the asyncio driver
+    if url.startswith("sqlite") and "+aiosqlite" not in url:
+        return url.replace("sqlite", "sqlite+aiosqlite", 1)
+    for prefix in ("postgresql+psycopg2://", "postgresql://", "postgres://"):
+        if url.startswith(prefix):
+            return "postgresql+asyncpg://" + url[len(prefix):]
+    return url
+
+
+# The worker, migrations and scripts use the synchronous engine; the API's
+# request handlers use the async one, so queries never block the event loop
+engine = create_engine(database_url, **pool_args())
+
+async_engine = create_async_engine(async_url(database_url), **pool_args())
+async_session_factory = async_sessionmaker(async_engine, class_=AsyncSession, expire_on_commit=False)
 
 def create_db_and_tables():
     SQLModel.metadata.create_all(engine)
 
-def get_session():
-    with Session(engine) as session:
-        yield session
\ No newline at end of file
+async def get_session():
+    async with async_session_factory() as session:
+        yield session
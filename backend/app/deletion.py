@@ -0,0 +1,79 @@
+import asyncio
+from typing import Callable, Optional
+
+from sqlalchemy import delete
+from sqlmodel import col
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.models import Image
+from app.result_cache import chunked, shared_paths, forget_results
+from app import storage
+
+DELETE_TASK = "delete_objects"
+# Keys per progress update in the worker; S3 backends split further into DeleteObjects calls
+DELETE_BATCH = 1000
+
+
+def image_paths(image: Image) -> list[str]:
+    return [path for path in (image.result_path, image.content_path, image.style_path, image.preview_path, image.thumbnail_path) if path]
+
+
+async def delete_image_rows(session: AsyncSession, images: list[Image], user_id: Optional[int] = None) -> list[str]:
+    """
+    Removes the rows with bulk DELETEs and returns the stored objects nothing
+    else references any more. Pass `user_id` when `images` are all of that
+    user's rows (account deletion), so they are matched by owner rather than
+    by listing every id. The caller commits, then hands the objects to
+    `schedule_deletion`.
+    """
+    if not images:
+        return []
+
+    image_ids = [image.id for image in images]
+    owned = {path for image in images for path in image_paths(image)}
+    if user_id is not None:
+        shared = await shared_paths(session, list(owned), exclude_user_id=user_id)
+    else:
+        shared = await shared_paths(session, list(owned), exclude_image_ids=image_ids)
+    deletable = owned - shared
+
+    await forget_results(session, [image.result_path for image in images if image.result_path in deletable])
+
+    if user_id is not None:
+        await session.exec(delete(Image).where(Image.user_id == user_id))
+    else:
+        for chunk in chunked(image_ids):
+            await session.exec(delete(Image).where(col(Image.id).in_(chunk)))
+    return sorted(deletable)
+
+
+async def schedule_deletion(celery_app, file_urls: list[str]) -> Optional[str]:
+    # Returns the id of the worker task deleting the objects, or None when there
+    # was nothing to delete or it had to be done inline
+    keys = [key for key in (storage.object_key(url) for url in file_urls) if key]
+    if not keys:
+        return None
+
+    try:
+        return celery_app.send_task(DELETE_TASK, args=[keys]).id
+    except Exception as e:
+        # The rows are already gone, so the objects must not be left behind
+        print(f"Could not queue deletion of {len(keys)} objects, deleting inline: {e}")
+        await asyncio.to_thread(delete_in_batches, storage.backend, keys)
+        return None
+
+
+def delete_in_batches(backend, keys: list[str], on_progress: Callable[[dict], None] = None) -> dict:
+    progress = {"total": len(keys), "deleted": 0, "failed": 0}
+    for start in range(0, len(keys), DELETE_BATCH):
+        batch = keys[start:start + DELETE_BATCH]
+        try:
+            failed = len(backend.delete_many(batch))
+        except Exception as e:
+            print(f"Failed to delete a batch of {len(batch)} objects: {e}")
+            failed = len(batch)
+        progress["deleted"] += len(batch) - failed
+        progress["failed"] += failed
+        if on_progress:
+            on_progress(dict(progress))
+    return progress
@@ -1,18 +1,18 @@
-from typing import Annotated
 import jwt
 from fastapi import Depends, HTTPException, Request ,status
-from sqlmodel import Session, select
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.db import get_session
 from app.models import User
 from app.config import settings
+from app.principal_cache import PrincipalCache
 
+principal_cache = PrincipalCache(settings.principal_cache_size, settings.principal_cache_ttl_seconds)
 
 
-def get_current_user(
-    request: Request, 
-    session: Session = Depends(get_session)
-):
+
+async def authenticate(request: Request, session: AsyncSession) -> User:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials"
@@ -28,6 +28,11 @@ def get_current_user(
         
     token = cookie_token.replace("Bearer ", "")
 
+    cached = principal_cache.get(token)
+    if cached is not None:
+        # A fresh, detached copy per request; nothing is shared between requests
+        return User(**cached)
+
     try:
         payload = jwt.decode(
             token, 
@@ -42,9 +47,26 @@ def get_current_user(
     except jwt.PyJWTError:
         raise credentials_exception
         
-    user = session.exec(select(User).where(User.email == email)).first()
+    user = (await session.exec(select(User).where(User.email == email))).first()
     
     if user is None:
         raise credentials_exception
-        
-    return user
\ No newline at end of file
+
+    principal_cache.put(token, user.model_dump(), payload["exp"])
+    return user
+
+
+async def get_current_user(
+    request: Request,
+    session: AsyncSession = Depends(get_session)
+):
+    return await authenticate(request, session)
+
+
+async def get_stream_user(
+    request: Request,
+    session: AsyncSession = Depends(get_session, scope="function")
+):
+    # For streamed responses: the session, and the pooled connection behind it,
+    # is released when the handler returns rather than when the stream ends
+    return await authenticate(request, session)
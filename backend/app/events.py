@@ -0,0 +1,140 @@
+import asyncio
+import json
+from collections import defaultdict
+from typing import Optional
+
+import redis
+import redis.asyncio as aioredis
+
+from app.config import settings
+
+CHANNEL_PREFIX = "job-events:"
+TERMINAL_STATUSES = {"COMPLETED", "FAILED"}
+
+# Public jobs have no DB row, so their latest event is also kept here for late subscribers
+PUBLIC_STATE_PREFIX = "job-status:task:"
+PUBLIC_STATE_TTL_SECONDS = 3600
+
+publisher = redis.Redis.from_url(settings.redis_url, socket_connect_timeout=0.5, socket_timeout=0.5)
+
+
+def image_channel(image_id: int) -> str:
+    return f"{CHANNEL_PREFIX}image:{image_id}"
+
+
+def task_channel(task_id: str) -> str:
+    return f"{CHANNEL_PREFIX}task:{task_id}"
+
+
+def publish_job_event(status: str, image_id: int = None, task_id: str = None, **fields):
+    # Called from the worker. Push updates are best effort: clients fall back to polling.
+    if not settings.job_events_enabled:
+        return
+
+    payload = json.dumps({"status": status, **fields})
+    try:
+        if image_id:
+            publisher.publish(image_channel(image_id), payload)
+        elif task_id:
+            pipe = publisher.pipeline()
+            pipe.set(f"{PUBLIC_STATE_PREFIX}{task_id}", payload, ex=PUBLIC_STATE_TTL_SECONDS)
+            pipe.publish(task_channel(task_id), payload)
+            pipe.execute()
+    except redis.RedisError as e:
+        print(f"Could not publish job event: {e}")
+
+
+async def latest_public_event(task_id: str) -> Optional[dict]:
+    raw = await event_hub.client.get(f"{PUBLIC_STATE_PREFIX}{task_id}")
+    return json.loads(raw) if raw else None
+
+
+class EventHub:
+    """
+    One Redis pattern subscription per API process, fanned out to every
+    connected SSE client through in-memory queues, instead of one Redis
+    connection per open stream.
+    """
+
+    def __init__(self, redis_url: str):
+        self.client = aioredis.Redis.from_url(redis_url, socket_connect_timeout=0.5)
+        self._listeners: dict[str, set[asyncio.Queue]] = defaultdict(set)
+        self._task: Optional[asyncio.Task] = None
+        self._ready: Optional[asyncio.Event] = None
+        self._connected = False
+
+    async def _ensure_running(self):
+        if self._task is None or self._task.done():
+            self._ready = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+        # Wait until the psubscribe is confirmed, so no event after this point is missed
+        await asyncio.wait_for(self._ready.wait(), timeout=2)
+        if not self._connected:
+            raise ConnectionError("Job event subscription is not available")
+
+    async def subscribe(self, channel: str) -> asyncio.Queue:
+        await self._ensure_running()
+        queue = asyncio.Queue(maxsize=32)
+        self._listeners[channel].add(queue)
+        return queue
+
+    def unsubscribe(self, channel: str, queue: asyncio.Queue):
+        self._listeners[channel].discard(queue)
+        if not self._listeners[channel]:
+            del self._listeners[channel]
+
+    async def _run(self):
+        pubsub = self.client.pubsub()
+        try:
+            await pubsub.psubscribe(f"{CHANNEL_PREFIX}*")
+            self._connected = True
+            self._ready.set()
+            async for message in pubsub.listen():
+                if message["type"] != "pmessage":
+                    continue
+                channel = message["channel"].decode()
+                for queue in list(self._listeners.get(channel, ())):
+                    if not queue.full():
+                        queue.put_nowait(json.loads(message["data"]))
+        except Exception as e:
+            self._connected = False
+            print(f"Job event subscription lost: {e}")
+            # Wake every open stream so its client falls back to polling
+            for queues in list(self._listeners.values()):
+                for queue in list(queues):
+                    if not queue.full():
+                        queue.put_nowait(None)
+        finally:
+            self._connected = False
+            self._ready.set()
+            await pubsub.aclose()
+
+
+event_hub = EventHub(settings.redis_url)
+
+
+def format_sse(event: dict) -> str:
+    return f"event: status\ndata: {json.dumps(event)}\n\n"
+
+
+async def sse_stream(request, channel: str, queue: asyncio.Queue, initial_event: dict, prepare):
+    # `prepare` turns a raw event into what the client sees (e.g. presigns result URLs)
+    try:
+        yield format_sse(prepare(initial_event))
+        if initial_event["status"] in TERMINAL_STATUSES:
+            return
+
+        while not await request.is_disconnected():
+            try:
+                event = await asyncio.wait_for(queue.get(), timeout=settings.sse_keepalive_seconds)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+
+            if event is None:
+                return
+            yield format_sse(prepare(event))
+            if event["status"] in TERMINAL_STATUSES:
+                return
+    finally:
+        event_hub.unsubscribe(channel, queue)
@@ -0,0 +1,68 @@
+import asyncio
+import hashlib
+import io
+import os
+from fastapi import HTTPException, UploadFile
+from PIL import Image
+from starlette.datastructures import Headers
+from app.config import settings
+from app.metrics import timed
+from ml_engine.preprocess import normalize_image
+
+async def normalize_upload(file: UploadFile, digest: str, max_dim: int) -> tuple[UploadFile, str]:
+    # Stored inputs are already the size the worker needs, upright and JPEG, so the
+    # worker never decodes a full-resolution phone photo. Decoding is CPU work and
+    # runs off the event loop. Returns the file to store and the sha256 of its bytes.
+    if not settings.ingest_normalize:
+        return file, digest
+
+    await file.seek(0)
+    data = await file.read()
+    try:
+        normalized = await asyncio.to_thread(normalize_image, data, max_dim, settings.ingest_jpeg_quality)
+    except (OSError, SyntaxError, ValueError, Image.DecompressionBombError):
+        raise HTTPException(status_code=400, detail=f"{file.filename} is not a supported image.")
+
+    if normalized is None:
+        await file.seek(0)
+        return file, digest
+
+    normalized_file = UploadFile(
+        file=io.BytesIO(normalized),
+        filename=f"{os.path.splitext(file.filename)[0]}.jpg",
+        size=len(normalized),
+        headers=Headers({"content-type": "image/jpeg"})
+    )
+    return normalized_file, hashlib.sha256(normalized).hexdigest()
+
+async def normalize_pair(
+    content_file: UploadFile,
+    style_file: UploadFile,
+    content_hash: str,
+    style_hash: str,
+    output_size: int = None
+) -> tuple[UploadFile, UploadFile, str, str]:
+    # High-resolution jobs keep the content image up to the requested output size
+    content_dim = max(settings.ingest_max_dim, output_size or 0)
+    with timed("ingest"):
+        (content_file, content_hash), (style_file, style_hash) = await asyncio.gather(
+            normalize_upload(content_file, content_hash, content_dim),
+            normalize_upload(style_file, style_hash, settings.ingest_max_dim)
+        )
+    return content_file, style_file, content_hash, style_hash
+
+async def normalize_batch(
+    content_file: UploadFile,
+    style_files: list[UploadFile],
+    content_hash: str,
+    style_hashes: list[str],
+    output_size: int = None
+) -> tuple[UploadFile, list[UploadFile], str, list[str]]:
+    # One content image for many styles (/generate-batch), normalized once
+    content_dim = max(settings.ingest_max_dim, output_size or 0)
+    with timed("ingest"):
+        content, *styles = await asyncio.gather(
+            normalize_upload(content_file, content_hash, content_dim),
+            *(normalize_upload(style_file, style_hash, settings.ingest_max_dim) for style_file, style_hash in zip(style_files, style_hashes))
+        )
+    return content[0], [file for file, _ in styles], content[1], [digest for _, digest in styles]
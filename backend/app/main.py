@@ -1,20 +1,27 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
-from app.db import create_db_and_tables
+from app.db import create_db_and_tables, engine, async_engine
+from app.migrations import run_migrations
 from app.config import settings
-from .routers import nst, auth
+from .routers import nst, auth, files
+import logging
 import os
 
+# Module loggers (app.storage, app.routers.nst, ...) go to stderr next to uvicorn's own lines
+logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     print("Starting up...")
     create_db_and_tables()
     print("Database tables created!")
+    run_migrations(engine)
     
     yield  
     
     print("Shutting down...")
+    await async_engine.dispose()
 
 app = FastAPI(
     title="Neural Style Transfer API", 
@@ -30,11 +37,13 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"], 
     allow_headers=["*"],
-    expose_headers=["*"]
+    # With credentials browsers take "*" literally, so exposed headers are listed by name
+    expose_headers=["X-Next-Cursor", "Retry-After"]
 )
 
 app.include_router(nst.router, tags=["Style Transfer"])
 app.include_router(auth.router, tags=["Authentication"])
+app.include_router(files.router, tags=["Files"])
 
 @app.get("/")
 def root():
@@ -0,0 +1,155 @@
+import json
+import os
+import resource
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess, start_http_server
+from prometheus_client import CONTENT_TYPE_LATEST
+
+from app.config import settings
+
+# Several processes (prefork Celery children, uvicorn --workers) each record
+# their own samples. With PROMETHEUS_MULTIPROC_DIR set they write them there and
+# a scrape of any process aggregates all of them.
+MULTIPROCESS = bool(os.environ.get("PROMETHEUS_MULTIPROC_DIR"))
+
+STAGE_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+JOB_BUCKETS = (0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300, 600)
+
+STAGE_SECONDS = Histogram(
+    "nst_stage_seconds",
+    "Time spent in one stage of a job (worker) or request (API)",
+    ["stage"],
+    buckets=STAGE_BUCKETS
+)
+JOB_SECONDS = Histogram("nst_job_seconds", "Worker time per job, from pickup to result", ["job_class", "status"], buckets=JOB_BUCKETS)
+QUEUE_WAIT_SECONDS = Histogram("nst_queue_wait_seconds", "Time a job waited in its queue", ["job_class"], buckets=JOB_BUCKETS)
+SLOW_JOBS = Counter("nst_slow_jobs", "Jobs slower than SLOW_JOB_SECONDS", ["job_class"])
+
+MODEL_LOAD_SECONDS = Gauge("nst_model_load_seconds", "Time to load the model", multiprocess_mode="max")
+MODEL_WARMUP_SECONDS = Gauge("nst_model_warmup_seconds", "Time to trace or allocate every shape bucket", multiprocess_mode="max")
+MAX_RSS_BYTES = Gauge("nst_process_max_rss_bytes", "Peak resident memory of the process", multiprocess_mode="max")
+INFERENCE_TRACES = Gauge("nst_inference_traces", "tf.function tracing counters (see inference.tracing_stats)", ["kind"], multiprocess_mode="max")
+
+# Counters kept by the caches themselves (in process or in Redis), mirrored on scrape or after each job
+CACHE_HITS = Gauge("nst_cache_hits", "Cache hits so far", ["cache"], multiprocess_mode="livesum")
+CACHE_MISSES = Gauge("nst_cache_misses", "Cache misses so far", ["cache"], multiprocess_mode="livesum")
+CACHE_ENTRIES = Gauge("nst_cache_entries", "Entries held by in-process caches", ["cache"], multiprocess_mode="livesum")
+
+QUEUE_DEPTH = Gauge("nst_queue_depth", "Jobs waiting in each queue", ["job_class"], multiprocess_mode="max")
+QUEUE_JOBS = Gauge("nst_queue_jobs", "Admission and pickup counters per queue", ["job_class", "outcome"], multiprocess_mode="max")
+
+
+class JobTimer:
+    """
+    Stage spans for one job. Stages run on different pipeline threads, and a
+    stage that runs more than once (e.g. encode for the preview and the result)
+    adds up. `finish` records everything and writes the slow-job log.
+    """
+
+    def __init__(self, job_class: str, job_id: str):
+        self.job_class = job_class
+        self.job_id = job_id
+        self.stages: dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._start = time.perf_counter()
+
+    def add(self, stage: str, seconds: float):
+        with self._lock:
+            self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+    @contextmanager
+    def span(self, stage: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(stage, time.perf_counter() - start)
+
+    def finish(self, status: str, **details) -> float:
+        total = time.perf_counter() - self._start
+        with self._lock:
+            stages = dict(self.stages)
+
+        for stage, seconds in stages.items():
+            STAGE_SECONDS.labels(stage).observe(seconds)
+        JOB_SECONDS.labels(self.job_class, status).observe(total)
+        record_memory()
+
+        if total >= settings.slow_job_seconds:
+            SLOW_JOBS.labels(self.job_class).inc()
+            print("Slow job " + json.dumps({
+                "job_id": self.job_id,
+                "job_class": self.job_class,
+                "status": status,
+                "total_seconds": round(total, 3),
+                "stages": {stage: round(seconds, 3) for stage, seconds in sorted(stages.items(), key=lambda item: -item[1])},
+                **details
+            }, default=str))
+        return total
+
+
+def span(timer, stage: str):
+    # Worker helpers also run outside a job (benchmarks) without a timer
+    return timer.span(stage) if timer is not None else nullcontext()
+
+
+@contextmanager
+def timed(stage: str):
+    # One-off stages outside a job, e.g. presigning in the API
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_SECONDS.labels(stage).observe(time.perf_counter() - start)
+
+
+def record_memory():
+    # ru_maxrss is in KiB on Linux
+    MAX_RSS_BYTES.set(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024)
+
+
+def record_cache(name: str, stats: dict):
+    CACHE_HITS.labels(name).set(stats.get("hits", 0))
+    CACHE_MISSES.labels(name).set(stats.get("misses", 0))
+    if "entries" in stats:
+        CACHE_ENTRIES.labels(name).set(stats["entries"])
+
+
+def record_model(load_seconds: float = None, warmup_seconds: float = None, tracing: dict = None):
+    if load_seconds is not None:
+        MODEL_LOAD_SECONDS.set(load_seconds)
+    if warmup_seconds is not None:
+        MODEL_WARMUP_SECONDS.set(warmup_seconds)
+    for kind, value in (tracing or {}).items():
+        INFERENCE_TRACES.labels(kind).set(value)
+
+
+def record_queues(stats: dict):
+    # The output of admission.queue_stats()
+    for job_class, queue in stats.items():
+        QUEUE_DEPTH.labels(job_class).set(queue["depth"])
+        for outcome in ("admitted", "rejected", "started"):
+            QUEUE_JOBS.labels(job_class, outcome).set(queue[outcome])
+
+
+def registry() -> CollectorRegistry:
+    if not MULTIPROCESS:
+        from prometheus_client import REGISTRY
+        return REGISTRY
+    collected = CollectorRegistry()
+    multiprocess.MultiProcessCollector(collected)
+    return collected
+
+
+def render() -> tuple[bytes, str]:
+    record_memory()
+    return generate_latest(registry()), CONTENT_TYPE_LATEST
+
+
+def start_metrics_server(port: int):
+    # The worker has no HTTP server of its own
+    start_http_server(port, registry=registry())
+    print(f"Serving worker metrics on :{port}/metrics")
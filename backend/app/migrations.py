@@ -0,0 +1,50 @@
+from datetime import datetime
+from sqlalchemy import inspect, text
+from sqlalchemy.exc import IntegrityError
+
+def add_image_column(name: str):
+    def step(conn):
+        if conn.dialect.name == "postgresql":
+            conn.execute(text(f"ALTER TABLE image ADD COLUMN IF NOT EXISTS {name} VARCHAR"))
+        elif name not in {column["name"] for column in inspect(conn).get_columns("image")}:
+            conn.execute(text(f"ALTER TABLE image ADD COLUMN {name} VARCHAR"))
+    return step
+
+# create_all() only creates missing tables; changes to tables that already exist
+# are applied here, once per database, in order. Every step must be idempotent
+# because several API workers may start at the same time.
+MIGRATIONS = [
+    (
+        "0001_image_user_id_created_at_index",
+        "CREATE INDEX IF NOT EXISTS ix_image_user_id_created_at ON image (user_id, created_at, id)"
+    ),
+    ("0002_image_preview_path", add_image_column("preview_path")),
+    ("0003_image_thumbnail_path", add_image_column("thumbnail_path")),
+    ("0004_image_batch_id", add_image_column("batch_id")),
+    ("0005_image_batch_id_index", "CREATE INDEX IF NOT EXISTS ix_image_batch_id ON image (batch_id)"),
+]
+
+def run_migrations(engine):
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE IF NOT EXISTS schema_migrations (name VARCHAR PRIMARY KEY, applied_at TIMESTAMP NOT NULL)"
+        ))
+        applied = {row[0] for row in conn.execute(text("SELECT name FROM schema_migrations"))}
+
+    for name, step in MIGRATIONS:
+        if name in applied:
+            continue
+        try:
+            with engine.begin() as conn:
+                if callable(step):
+                    step(conn)
+                else:
+                    conn.execute(text(step))
+                conn.execute(
+                    text("INSERT INTO schema_migrations (name, applied_at) VALUES (:name, :applied_at)"),
+                    {"name": name, "applied_at": datetime.utcnow()}
+                )
+            print(f"Applied migration {name}")
+        except IntegrityError:
+            # Another worker recorded it first
+            pass
@@ -1,5 +1,5 @@
 from typing import Optional
-from sqlmodel import Field, SQLModel, Relationship
+from sqlmodel import Field, SQLModel, Relationship, Index
 from datetime import datetime
 
 class User(SQLModel, table=True):
@@ -10,15 +10,36 @@ class User(SQLModel, table=True):
     images: list["Image"] = Relationship(back_populates="user")
 
 class Image(SQLModel, table=True):
+    # Serves the keyset-paginated library query (see app/migrations.py for existing databases)
+    __table_args__ = (Index("ix_image_user_id_created_at", "user_id", "created_at", "id"),)
+
     id: Optional[int] = Field(default=None, primary_key=True)
     
     content_path: str
     style_path: str
     result_path: Optional[str] = None  
+    # Low-resolution first pass, available before the full result
+    preview_path: Optional[str] = None
+    # Small rendition for the /library grid
+    thumbnail_path: Optional[str] = None
   
     status: str = Field(default="PENDING") # PENDING, PROCESSING, COMPLETED, FAILED
     created_at: datetime = Field(default_factory=datetime.utcnow)
+    # Outputs of one multi-style job share its id (also the id of its worker task)
+    batch_id: Optional[str] = Field(default=None, index=True)
 
     
     user_id: Optional[int] = Field(default=None, foreign_key="user.id")
-    user: Optional[User] = Relationship(back_populates="images")
\ No newline at end of file
+    user: Optional[User] = Relationship(back_populates="images")
+
+class ResultCacheEntry(SQLModel, table=True):
+    # sha256 over (content bytes, style bytes, inference params), see app/result_cache.py
+    key: str = Field(primary_key=True)
+    namespace: str = Field(index=True) # private, public
+
+    content_path: str
+    style_path: str
+    result_path: str = Field(index=True)
+
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    expires_at: Optional[datetime] = Field(default=None, index=True)
@@ -0,0 +1,69 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+
+class PrincipalCache:
+    """
+    Bounded LRU of signed-in users keyed by access token, so repeat requests
+    (status polls above all) skip both the JWT decode and the user query.
+
+    An entry lives for `ttl` seconds and never past the token's own expiry.
+    Deleting an account drops its entries here; other API processes keep theirs
+    for at most `ttl`.
+    """
+
+    def __init__(self, max_entries: int = 10000, ttl: float = 30.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: OrderedDict[str, tuple[dict, float]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, token: str, now: float = None) -> Optional[dict]:
+        if self.ttl <= 0:
+            return None
+        now = time.time() if now is None else now
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is not None:
+                user, valid_until = entry
+                if now < valid_until:
+                    self._entries.move_to_end(token)
+                    self.hits += 1
+                    return user
+                del self._entries[token]
+            self.misses += 1
+            return None
+
+    def put(self, token: str, user: dict, token_expires_at: float, now: float = None):
+        if self.ttl <= 0:
+            return
+        now = time.time() if now is None else now
+        with self._lock:
+            self._entries[token] = (user, min(now + self.ttl, token_expires_at))
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate_user(self, user_id: int) -> int:
+        with self._lock:
+            tokens = [token for token, (user, _) in self._entries.items() if user["id"] == user_id]
+            for token in tokens:
+                del self._entries[token]
+        return len(tokens)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
@@ -0,0 +1,250 @@
+import hashlib
+import json
+from datetime import datetime, timedelta
+from typing import Optional
+
+import redis
+import redis.asyncio as aioredis
+from sqlmodel import Session, select, or_, col
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.config import settings
+from app.models import Image, ResultCacheEntry
+
+# Bump when a model or encoder change makes previously stored results stale
+RESULT_CACHE_VERSION = 1
+
+HOT_PREFIX = "result-cache:"
+STATS_KEY = "result-cache:stats"
+
+# Short timeouts: a missing Redis must degrade to the Postgres index, not stall requests
+async_redis = aioredis.Redis.from_url(settings.redis_url, socket_connect_timeout=0.5, socket_timeout=0.5)
+sync_redis = redis.Redis.from_url(settings.redis_url, socket_connect_timeout=0.5, socket_timeout=0.5)
+
+
+# Values per IN (...) list: every value is a bind parameter, and asyncpg allows
+# at most 32767 of them in one statement
+IN_CHUNK = 1000
+
+
+def chunked(items: list, size: Optional[int] = None):
+    size = size or IN_CHUNK
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def result_key(namespace: str, content_hash: str, style_hash: str, params: dict) -> str:
+    payload = json.dumps(
+        {
+            "v": RESULT_CACHE_VERSION,
+            "namespace": namespace,
+            "content": content_hash,
+            "style": style_hash,
+            "params": params
+        },
+        sort_keys=True
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _hot_value(entry: ResultCacheEntry) -> str:
+    return json.dumps({
+        "content_path": entry.content_path,
+        "style_path": entry.style_path,
+        "result_path": entry.result_path
+    })
+
+
+def _hot_ttl(entry: ResultCacheEntry) -> int:
+    ttl = settings.result_cache_hot_ttl_seconds
+    if entry.expires_at:
+        ttl = min(ttl, int((entry.expires_at - datetime.utcnow()).total_seconds()))
+    return ttl
+
+
+def _is_live(entry: Optional[ResultCacheEntry]) -> bool:
+    return entry is not None and (entry.expires_at is None or entry.expires_at > datetime.utcnow())
+
+
+async def lookup_result(session: AsyncSession, key: str, namespace: str) -> Optional[dict]:
+    if not settings.result_cache_enabled:
+        return None
+
+    cached = None
+    try:
+        raw = await async_redis.get(HOT_PREFIX + key)
+        if raw:
+            cached = json.loads(raw)
+    except redis.RedisError as e:
+        print(f"Result cache hot set unavailable: {e}")
+
+    if cached is None:
+        entry = await session.get(ResultCacheEntry, key)
+        if _is_live(entry):
+            cached = json.loads(_hot_value(entry))
+            try:
+                ttl = _hot_ttl(entry)
+                if ttl > 0:
+                    await async_redis.set(HOT_PREFIX + key, _hot_value(entry), ex=ttl)
+            except redis.RedisError:
+                pass
+
+    try:
+        await async_redis.hincrby(STATS_KEY, f"{namespace}:{'hits' if cached else 'misses'}", 1)
+    except redis.RedisError:
+        pass
+
+    return cached
+
+
+def record_result(
+    session: Session,
+    key: str,
+    namespace: str,
+    content_path: str,
+    style_path: str,
+    result_path: str
+):
+    expires_at = None
+    if namespace == "public":
+        expires_at = datetime.utcnow() + timedelta(seconds=settings.public_result_ttl_seconds)
+
+    # merge() so two identical jobs finishing at the same time just overwrite each other
+    entry = session.merge(ResultCacheEntry(
+        key=key,
+        namespace=namespace,
+        content_path=content_path,
+        style_path=style_path,
+        result_path=result_path,
+        expires_at=expires_at
+    ))
+    session.commit()
+
+    try:
+        sync_redis.set(HOT_PREFIX + key, _hot_value(entry), ex=_hot_ttl(entry))
+    except redis.RedisError as e:
+        print(f"Result cache hot set unavailable: {e}")
+
+
+async def shared_paths(
+    session: AsyncSession,
+    paths: list[str],
+    exclude_image_ids: list[int] = (),
+    exclude_user_id: Optional[int] = None
+) -> set[str]:
+    # Cache hits make several Image rows point at the same stored objects, so an
+    # object may only be deleted once no other row references it. Rows being
+    # deleted are left out by id, or all of a user's rows by `exclude_user_id`.
+    paths = list(dict.fromkeys(path for path in paths if path))
+    excluded = set(exclude_image_ids)
+    shared = set()
+
+    for chunk in chunked(paths):
+        statement = select(Image.id, Image.content_path, Image.style_path, Image.result_path).where(
+            or_(
+                col(Image.content_path).in_(chunk),
+                col(Image.style_path).in_(chunk),
+                col(Image.result_path).in_(chunk)
+            )
+        )
+        if exclude_user_id is not None:
+            statement = statement.where(or_(Image.user_id == None, Image.user_id != exclude_user_id))
+        for image_id, *row_paths in (await session.exec(statement)).all():
+            if image_id not in excluded:
+                shared.update(path for path in row_paths if path in chunk)
+    return shared
+
+
+async def forget_results(session: AsyncSession, result_paths: list[str]):
+    result_paths = [path for path in result_paths if path]
+    entries = []
+    for chunk in chunked(result_paths):
+        entries += (await session.exec(select(ResultCacheEntry).where(col(ResultCacheEntry.result_path).in_(chunk)))).all()
+    for entry in entries:
+        await session.delete(entry)
+
+    if entries:
+        try:
+            await async_redis.delete(*[HOT_PREFIX + entry.key for entry in entries])
+        except redis.RedisError:
+            pass
+
+
+async def forget_inputs(session: AsyncSession, paths: list[str]):
+    # Entries whose stored content or style image is gone would hand out broken links
+    paths = [path for path in paths if path]
+    if not paths:
+        return
+
+    statement = select(ResultCacheEntry).where(
+        or_(col(ResultCacheEntry.content_path).in_(paths), col(ResultCacheEntry.style_path).in_(paths))
+    )
+    entries = (await session.exec(statement)).all()
+    for entry in entries:
+        await session.delete(entry)
+
+    if entries:
+        try:
+            await async_redis.delete(*[HOT_PREFIX + entry.key for entry in entries])
+        except redis.RedisError:
+            pass
+
+
+def forget_hot(keys: list[str]):
+    # For the worker, which deletes its (sync) index rows itself
+    if not keys:
+        return
+    try:
+        sync_redis.delete(*[HOT_PREFIX + key for key in keys])
+    except redis.RedisError:
+        pass
+
+
+def expired_entries(session: Session, limit: int = 500) -> list[ResultCacheEntry]:
+    statement = select(ResultCacheEntry).where(
+        ResultCacheEntry.expires_at != None,
+        ResultCacheEntry.expires_at <= datetime.utcnow()
+    ).limit(limit)
+    return session.exec(statement).all()
+
+
+def referenced_paths(session: Session, paths: list[str]) -> set[str]:
+    # For the worker's sweep of temp-public/: objects an Image row or a live
+    # cache entry still points at are kept whatever their age
+    paths = [path for path in paths if path]
+    referenced = set()
+
+    for chunk in chunked(paths):
+        rows = session.exec(select(Image.content_path, Image.style_path, Image.result_path).where(
+            or_(
+                col(Image.content_path).in_(chunk),
+                col(Image.style_path).in_(chunk),
+                col(Image.result_path).in_(chunk)
+            )
+        )).all()
+        rows += session.exec(select(ResultCacheEntry.content_path, ResultCacheEntry.style_path, ResultCacheEntry.result_path).where(
+            or_(ResultCacheEntry.expires_at == None, ResultCacheEntry.expires_at > datetime.utcnow()),
+            or_(
+                col(ResultCacheEntry.content_path).in_(chunk),
+                col(ResultCacheEntry.style_path).in_(chunk),
+                col(ResultCacheEntry.result_path).in_(chunk)
+            )
+        )).all()
+        referenced.update(path for row in rows for path in row if path in chunk)
+    return referenced
+
+
+def result_cache_stats() -> dict:
+    raw = sync_redis.hgetall(STATS_KEY)
+    counters = {name.decode(): int(value) for name, value in raw.items()}
+
+    stats = {}
+    for namespace in ("private", "public"):
+        hits = counters.get(f"{namespace}:hits", 0)
+        misses = counters.get(f"{namespace}:misses", 0)
+        stats[namespace] = {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / (hits + misses) if hits + misses else 0.0
+        }
+    return stats
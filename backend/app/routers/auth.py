@@ -1,49 +1,50 @@
 from fastapi import APIRouter, Depends, HTTPException, Response ,status
-from sqlmodel import Session, select
+from sqlmodel import select, delete
+from sqlmodel.ext.asyncio.session import AsyncSession
 from app.models import User, Image
 from app.db import get_session
 from fastapi.security import OAuth2PasswordRequestForm
-from app.schemas import UserCreate, UserResponse, Token
-from app.security import get_password_hash, create_access_token, verify_password
-from app.dependencies import get_current_user
-from app.storage import delete_from_spaces
+from app.schemas import UserCreate, UserResponse
+from app.security import get_password_hash, create_access_token, verify_password, password_pool
+from app.dependencies import get_current_user, principal_cache
+from app.deletion import delete_image_rows, schedule_deletion
+from app.tasks import celery_app
 from app.config import settings
 from datetime import timedelta
 from typing import Annotated
-from app.config import settings
 
 
 router = APIRouter(prefix="/auth")
 
 @router.post("/signup", response_model=UserResponse)
-def create_user(user: UserCreate, session: Annotated[Session, Depends(get_session)]):
+async def create_user(user: UserCreate, session: Annotated[AsyncSession, Depends(get_session)]):
 
     statement = select(User).where(User.email == user.email)
-    existing_user = session.exec(statement).first()
+    existing_user = (await session.exec(statement)).first()
 
     if existing_user:
         raise HTTPException(status_code=400, detail="Email already registered")
 
-    hashed_password = get_password_hash(user.password)
+    hashed_password = await password_pool.run(get_password_hash, user.password)
     new_user = User(
         email=user.email, 
         hashed_password=hashed_password
    )
     session.add(new_user)
-    session.commit()
-    session.refresh(new_user)
+    await session.commit()
+    await session.refresh(new_user)
     return new_user
 
 @router.post("/login")
-def login(
+async def login(
     response: Response,
     form_data: Annotated[OAuth2PasswordRequestForm, Depends()], 
-    session: Annotated[Session, Depends(get_session)]
+    session: Annotated[AsyncSession, Depends(get_session)]
 ):
     statement = select(User).where(User.email == form_data.username)
-    user = session.exec(statement).first()
+    user = (await session.exec(statement)).first()
     
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    if not user or not await password_pool.run(verify_password, form_data.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
@@ -88,24 +89,20 @@ def get_me(current_user: Annotated[User, Depends(get_current_user)]):
 @router.delete("/account")
 async def delete_user_account(
     response: Response, 
-    session: Annotated[Session, Depends(get_session)],
+    session: Annotated[AsyncSession, Depends(get_session)],
     current_user: Annotated[User, Depends(get_current_user)]
 ):
     statement = select(Image).where(Image.user_id == current_user.id)
-    user_images = session.exec(statement).all()
-
-    for image in user_images:
-        if image.result_path:
-            await delete_from_spaces(image.result_path)
-        if image.content_path:
-            await delete_from_spaces(image.content_path)
-        if image.style_path:
-            await delete_from_spaces(image.style_path)
-        
-        session.delete(image)
+    user_images = (await session.exec(statement)).all()
+
+    deletable = await delete_image_rows(session, user_images, user_id=current_user.id)
+    await session.exec(delete(User).where(User.id == current_user.id))
+    await session.commit()
+    principal_cache.invalidate_user(current_user.id)
 
-    session.delete(current_user)
-    session.commit()
+    # Stored objects are removed in the background, in batches; the task id
+    # can be polled at /deletions/{task_id}
+    deletion_task_id = await schedule_deletion(celery_app, deletable)
 
     response.delete_cookie(
         key="access_token",
@@ -115,4 +112,7 @@ async def delete_user_account(
         samesite="lax"
     )
 
-    return {"message": "Account and all associated cloud data successfully deleted."}
\ No newline at end of file
+    return {
+        "message": "Account and all associated cloud data successfully deleted.",
+        "deletion_task_id": deletion_task_id
+    }
\ No newline at end of file
@@ -0,0 +1,45 @@
+import mimetypes
+import os
+import time
+from fastapi import APIRouter, HTTPException, Response
+from fastapi.responses import FileResponse
+from app.config import settings
+from app import storage
+from app.storage_backends import ServedBackend, verify_file_signature
+
+router = APIRouter()
+
+@router.get("/files/{key:path}")
+def serve_file(key: str, expires: int, signature: str):
+    backend = storage.backend
+
+    # Only local/memory storage is served by the API; S3 objects are fetched from the bucket
+    if not isinstance(backend, ServedBackend):
+        raise HTTPException(status_code=404, detail="File not found")
+
+    if not verify_file_signature(backend.signing_secret, key, expires, signature):
+        raise HTTPException(status_code=403, detail="Link is invalid or has expired")
+
+    headers = {"Cache-Control": f"private, max-age={max(0, expires - int(time.time()))}"}
+    media_type = mimetypes.guess_type(key)[0] or "application/octet-stream"
+
+    try:
+        path = backend.path_for(key)
+    except ValueError:
+        raise HTTPException(status_code=404, detail="File not found")
+
+    if path is None:
+        if not backend.exists(key):
+            raise HTTPException(status_code=404, detail="File not found")
+        return Response(backend.get(key), media_type=backend.content_type(key) or media_type, headers=headers)
+
+    if not os.path.isfile(path):
+        raise HTTPException(status_code=404, detail="File not found")
+
+    if settings.storage_accel_redirect_prefix:
+        # nginx serves the file itself (sendfile) from an internal location
+        headers["X-Accel-Redirect"] = f"{settings.storage_accel_redirect_prefix.rstrip('/')}/{key}"
+        return Response(media_type=media_type, headers=headers)
+
+    # Zero-copy through the ASGI pathsend extension where the server supports it
+    return FileResponse(path, media_type=media_type, headers=headers)
@@ -1,29 +1,143 @@
-from fastapi import APIRouter, UploadFile, File, Depends, HTTPException, Depends, status
-from sqlmodel import Session, select, desc
-from celery import Celery
+from fastapi import APIRouter, BackgroundTasks, UploadFile, File, Form, Query, Request, Response, Depends, HTTPException, Depends, status
+from fastapi.responses import StreamingResponse
+from sqlmodel import select, desc, col
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy import tuple_, update
 from celery.result import AsyncResult
-from app.db import get_session
+from app.db import get_session, async_session_factory
 from app.config import settings
 from app.models import Image, User
-from app.schemas import ImageLibraryResponse
-from app.dependencies import get_current_user
-from app.storage import upload_to_spaces, delete_from_spaces, get_presigned_url
-from typing import Annotated
+from app.schemas import ImageLibraryResponse, LibraryDeleteRequest
+from app.dependencies import get_current_user, get_stream_user, principal_cache
+from app import metrics
+from app.admission import PRIVATE, PUBLIC, QUEUES, admit, queue_stats, limit_user, rate_limited_user, rate_limited_ip
+from app.storage import presign_cache, upload_pair, upload_batch, stage_pair, persist_staged, delete_from_spaces, get_presigned_url, get_presigned_urls, hash_upload
+from app.ingest import normalize_pair, normalize_batch
+from ml_engine.encoding import available_formats
+from ml_engine.preprocess import MODEL_DIM
+from app.result_cache import chunked, result_key, lookup_result, shared_paths, forget_results, forget_inputs, result_cache_stats
+from app.deletion import delete_image_rows, schedule_deletion
+from app.tasks import celery_app
+from app.events import event_hub, sse_stream, image_channel, task_channel, latest_public_event
+from typing import Annotated, Optional
+from datetime import datetime
+import asyncio
+import base64
+import binascii
+import logging
 import os
+import time
+import uuid
+import redis
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
-celery_app = Celery("nst_worker", broker=settings.redis_url, backend=settings.redis_url)
+# Public jobs answered from the result cache get a pseudo task id instead of a Celery one
+CACHED_TASK_PREFIX = "cached-"
+
+def encoding_params(output_format: Optional[str], output_quality: Optional[int]) -> dict:
+    # Only what the job overrides, so jobs on the defaults keep their result cache keys
+    if output_format is not None and output_format not in available_formats():
+        raise HTTPException(
+            status_code=422,
+            detail=f"output_format must be one of: {', '.join(available_formats())}."
+        )
+    if output_quality is not None and not 1 <= output_quality <= 100:
+        raise HTTPException(status_code=422, detail="output_quality must be between 1 and 100.")
+
+    params = {}
+    if output_format is not None:
+        params["output_format"] = output_format
+    if output_quality is not None:
+        params["output_quality"] = output_quality
+    return params
+
+def checked_output_size(output_size: Optional[int]) -> Optional[int]:
+    if output_size is not None and not 256 <= output_size <= settings.max_output_size:
+        raise HTTPException(
+            status_code=422,
+            detail=f"output_size must be between 256 and {settings.max_output_size} pixels."
+        )
+    # The model renders at MODEL_DIM anyway: same job, same result cache key
+    return None if output_size == MODEL_DIM else output_size
+
+async def persist_inputs(pending: list[tuple[str, bytes, str]], image_id: Optional[int] = None):
+    # Background task for the input fast path. An input that never reaches
+    # storage would leave the job and any cache entry pointing at nothing.
+    missing = await persist_staged(pending)
+    if not missing:
+        return
+
+    logger.error("Inputs %s of image %s were never stored, failing the job", missing, image_id)
+    try:
+        async with async_session_factory() as session:
+            if image_id:
+                await session.exec(update(Image).where(Image.id == image_id).values(status="FAILED"))
+            await forget_inputs(session, missing)
+            await session.commit()
+    except Exception:
+        # Nobody awaits a background task; without this the failure would go unreported
+        logger.exception("Could not fail image %s after its inputs were lost", image_id)
 
 @router.post("/generate")
 async def generate_image(  
     content_file: Annotated[UploadFile, File(...)],
     style_file: Annotated[UploadFile, File(...)],
-    session: Annotated[Session, Depends(get_session)],
-    current_user: Annotated[User, Depends(get_current_user)]
+    session: Annotated[AsyncSession, Depends(get_session)],
+    current_user: Annotated[User, Depends(rate_limited_user)],
+    background_tasks: BackgroundTasks,
+    output_size: Annotated[Optional[int], Form()] = None,
+    output_format: Annotated[Optional[str], Form()] = None,
+    output_quality: Annotated[Optional[int], Form()] = None
 ):
-    content_url = await upload_to_spaces(content_file, folder="content")
-    style_url = await upload_to_spaces(style_file, folder="style")
+    output_size = checked_output_size(output_size)
+    encoding = encoding_params(output_format, output_quality)
+
+    style_key = await hash_upload(style_file)
+    content_key = await hash_upload(content_file)
+    cache_key = result_key("private", content_key, style_key, {"output_size": output_size, **encoding})
+
+    cached = await lookup_result(session, cache_key, "private")
+    if cached:
+        # Identical job already rendered: point a new library entry at the stored result
+        new_image = Image(
+            content_path=cached["content_path"],
+            style_path=cached["style_path"],
+            result_path=cached["result_path"],
+            status="COMPLETED",
+            user_id=current_user.id
+        )
+        session.add(new_image)
+        await session.commit()
+        await session.refresh(new_image)
+
+        return {
+            "job_id": None,
+            "database_id": new_image.id,
+            "status": "completed",
+            "task_id": None,
+            "cached": True,
+            "message": "Identical job found. Result is ready."
+        }
+
+    await admit(PRIVATE)
+
+    # The result cache key above is for the original upload; blob and style keys
+    # below are for the normalized bytes that actually get stored
+    content_file, style_file, content_key, style_key = await normalize_pair(
+        content_file, style_file, content_key, style_key, output_size
+    )
+
+    input_blobs = None
+    pending = None
+    staged = await stage_pair(content_file, style_file, content_key, style_key, "content", "style")
+    if staged:
+        content_url, style_url, pending = staged
+        input_blobs = {"content": content_key, "style": style_key}
+    else:
+        content_url, style_url = await upload_pair(content_file, style_file, "content", "style")
 
     if not content_url or not style_url:
         raise HTTPException(
@@ -39,12 +153,23 @@ async def generate_image(
     )
     
     session.add(new_image)
-    session.commit()
-    session.refresh(new_image)
+    await session.commit()
+    await session.refresh(new_image)
+    if pending:
+        background_tasks.add_task(persist_inputs, pending, new_image.id)
 
     task = celery_app.send_task(
         "generate_art", 
-        args=[content_url, style_url, new_image.id]
+        args=[content_url, style_url, new_image.id],
+        kwargs={
+            "style_key": style_key,
+            "output_size": output_size,
+            "result_key": cache_key,
+            "input_blobs": input_blobs,
+            "enqueued_at": time.time(),
+            **encoding
+        },
+        queue=QUEUES[PRIVATE]
     )
 
     return {
@@ -55,9 +180,140 @@ async def generate_image(
         "message": "Images uploaded to cloud successfully. Processing started."
     }
 
+@router.post("/generate-batch")
+async def generate_batch(
+    content_file: Annotated[UploadFile, File(...)],
+    style_files: Annotated[list[UploadFile], File(...)],
+    session: Annotated[AsyncSession, Depends(get_session)],
+    current_user: Annotated[User, Depends(get_current_user)],
+    output_size: Annotated[Optional[int], Form()] = None,
+    output_format: Annotated[Optional[str], Form()] = None,
+    output_quality: Annotated[Optional[int], Form()] = None
+):
+    # One content image, many styles: the content is uploaded and decoded once,
+    # and the worker runs the styles through the model together. Every output
+    # gets its own library entry, grouped under the batch id.
+    if not 1 <= len(style_files) <= settings.max_batch_styles:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Send between 1 and {settings.max_batch_styles} style images."
+        )
+    # Rate limits and admission count every style as a job of its own
+    await limit_user(current_user, len(style_files))
+    output_size = checked_output_size(output_size)
+    encoding = encoding_params(output_format, output_quality)
+
+    content_key = await hash_upload(content_file)
+    style_keys = [await hash_upload(style_file) for style_file in style_files]
+    cache_keys = [
+        result_key("private", content_key, style_key, {"output_size": output_size, **encoding})
+        for style_key in style_keys
+    ]
+    cached = [await lookup_result(session, cache_key, "private") for cache_key in cache_keys]
+    pending = [i for i, hit in enumerate(cached) if not hit]
+
+    batch_id = uuid.uuid4().hex
+    # In the order the styles were sent; identical jobs rendered before point at the stored result
+    images = [
+        Image(
+            content_path=hit["content_path"],
+            style_path=hit["style_path"],
+            result_path=hit["result_path"],
+            status="COMPLETED",
+            user_id=current_user.id,
+            batch_id=batch_id
+        ) if hit else None
+        for hit in cached
+    ]
+
+    if pending:
+        await admit(PRIVATE, len(pending))
+
+        content_file, pending_files, content_key, pending_keys = await normalize_batch(
+            content_file, [style_files[i] for i in pending], content_key, [style_keys[i] for i in pending], output_size
+        )
+        content_url, style_urls = await upload_batch(content_file, pending_files, "content", "style")
+        if not content_url or not all(style_urls):
+            raise HTTPException(
+                status_code=500,
+                detail="Failed to upload images to cloud storage. Please try again."
+            )
+
+        queued = [
+            Image(content_path=content_url, style_path=style_url, status="PENDING", user_id=current_user.id, batch_id=batch_id)
+            for style_url in style_urls
+        ]
+        for i, image in zip(pending, queued):
+            images[i] = image
+        session.add_all(images)
+        await session.commit()
+
+        outputs = [
+            {
+                "image_id": image.id,
+                "style_url": image.style_path,
+                "style_key": style_key,
+                "result_key": cache_keys[i]
+            }
+            for image, style_key, i in zip(queued, pending_keys, pending)
+        ]
+        # The batch id doubles as the task id, so the whole job is one AsyncResult
+        celery_app.send_task(
+            "generate_art_batch",
+            args=[content_url, outputs],
+            kwargs={
+                "output_size": output_size,
+                "enqueued_at": time.time(),
+                **encoding
+            },
+            task_id=batch_id,
+            queue=QUEUES[PRIVATE]
+        )
+    else:
+        session.add_all(images)
+        await session.commit()
+
+    return {
+        "batch_id": batch_id,
+        "task_id": batch_id if pending else None,
+        "status": "submitted" if pending else "completed",
+        "database_ids": [image.id for image in images],
+        "cached": len(images) - len(pending)
+    }
+
+def batch_status(statuses: list[str]) -> str:
+    if all(status == "COMPLETED" for status in statuses):
+        return "COMPLETED"
+    if any(status in ("PENDING", "PROCESSING") for status in statuses):
+        return "PROCESSING" if any(status != "PENDING" for status in statuses) else "PENDING"
+    return "FAILED" if all(status == "FAILED" for status in statuses) else "PARTIAL"
+
+@router.get("/batches/{batch_id}")
+async def get_batch_status(
+    batch_id: str,
+    session: Annotated[AsyncSession, Depends(get_session)],
+    current_user: Annotated[User, Depends(get_current_user)]
+):
+    statement = select(Image).where(Image.batch_id == batch_id, Image.user_id == current_user.id).order_by(Image.id)
+    images = (await session.exec(statement)).all()
+    if not images:
+        raise HTTPException(status_code=404, detail="Batch not found")
+
+    results = get_presigned_urls([image.result_path for image in images])
+    return {
+        "batch_id": batch_id,
+        "status": batch_status([image.status for image in images]),
+        "completed": sum(image.status == "COMPLETED" for image in images),
+        "total": len(images),
+        "outputs": [
+            {"id": image.id, "status": image.status, "result": result}
+            for image, result in zip(images, results)
+        ]
+    }
+
 @router.get("/status/{image_id}")
-def get_image_status(image_id: int ,session: Annotated[Session, Depends(get_session)], current_user: Annotated[User, Depends(get_current_user)]):
-    image = session.get(Image, image_id)
+async def get_image_status(image_id: int ,session: Annotated[AsyncSession, Depends(get_session)], current_user: Annotated[User, Depends(get_current_user)]):
+    image = await session.get(Image, image_id)
 
     if not image:
         raise HTTPException(status_code=400, detail= "Image job not found")
@@ -71,31 +327,87 @@ def get_image_status(image_id: int ,session: Annotated[Session, Depends(get_sess
     return {
         "id": image.id,
         "status": image.status,
-        "result": get_presigned_url(image.result_path) if image.result_path else None
+        "result": get_presigned_url(image.result_path) if image.result_path else None,
+        "preview": get_presigned_url(image.preview_path) if image.preview_path else None
     }
 
+def encode_cursor(created_at: datetime, image_id: int) -> str:
+    return base64.urlsafe_b64encode(f"{created_at.isoformat()}|{image_id}".encode()).decode()
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        created_at, image_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(created_at), int(image_id)
+    except (ValueError, binascii.Error):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
 @router.get("/library", response_model=list[ImageLibraryResponse])
-def get_user_library(session: Annotated[Session, Depends(get_session)], current_user: Annotated[User, Depends(get_current_user)]):
+async def get_user_library(
+    response: Response,
+    session: Annotated[AsyncSession, Depends(get_session)],
+    current_user: Annotated[User, Depends(get_current_user)],
+    limit: Annotated[int, Query(ge=1, le=200)] = 50,
+    cursor: Optional[str] = None
+):
+    # Keyset pagination over (created_at, id), newest first. Only the columns the
+    # response needs are selected, and the (user_id, created_at, id) index serves
+    # both the filter and the order, so a page costs the same at any depth.
+    statement = select(Image.id, Image.status, Image.result_path, Image.thumbnail_path, Image.created_at).where(Image.user_id == current_user.id)
+
+    if cursor:
+        created_at, image_id = decode_cursor(cursor)
+        # Row-value comparison so the planner turns it into an index range scan
+        statement = statement.where(tuple_(Image.created_at, Image.id) < tuple_(created_at, image_id))
+
+    statement = statement.order_by(desc(Image.created_at), desc(Image.id)).limit(limit + 1)
+    rows = (await session.exec(statement)).all()
+
+    page = rows[:limit]
+    if len(rows) > limit:
+        response.headers["X-Next-Cursor"] = encode_cursor(page[-1].created_at, page[-1].id)
     
-    statement = select(Image).where(Image.user_id == current_user.id).order_by(desc(Image.created_at))
-    images = session.exec(statement).all()
+    urls = get_presigned_urls(
+        [row.result_path for row in page] + [row.thumbnail_path for row in page]
+    )
+    results, thumbnails = urls[:len(page)], urls[len(page):]
     
     return [
         {
-            "id": image.id,
-            "status": image.status,
-            "result": get_presigned_url(image.result_path) if image.result_path else None
+            "id": row.id,
+            "status": row.status,
+            "result": result,
+            "thumbnail": thumbnail
         }
-        for image in images
+        for row, result, thumbnail in zip(page, results, thumbnails)
     ]
 
+@router.delete("/library")
+async def delete_images(
+    request: LibraryDeleteRequest,
+    session: Annotated[AsyncSession, Depends(get_session)],
+    current_user: Annotated[User, Depends(get_current_user)]
+):
+    # Ids that are not the caller's (or no longer exist) are skipped
+    images = []
+    for chunk in chunked(request.image_ids):
+        statement = select(Image).where(Image.user_id == current_user.id, col(Image.id).in_(chunk))
+        images += (await session.exec(statement)).all()
+
+    deletable = await delete_image_rows(session, images)
+    await session.commit()
+
+    return {
+        "deleted": [image.id for image in images],
+        "deletion_task_id": await schedule_deletion(celery_app, deletable)
+    }
+
 @router.delete("/library/{image_id}")
 async def delete_image(  
     image_id: int, 
-    session: Annotated[Session, Depends(get_session)], 
+    session: Annotated[AsyncSession, Depends(get_session)], 
     current_user: Annotated[User, Depends(get_current_user)]
 ):
-    image = session.get(Image, image_id)
+    image = await session.get(Image, image_id)
     
     if not image:
         raise HTTPException(status_code=404, detail="Image not found")
@@ -106,40 +418,93 @@ async def delete_image(
             detail="You do not have permission to delete this image"
         )
         
-    if image.result_path:
-        await delete_from_spaces(image.result_path)
-    if image.content_path:
-        await delete_from_spaces(image.content_path)
-    if image.style_path:
-        await delete_from_spaces(image.style_path)
-
-    session.delete(image)
-    session.commit()
+    paths = [image.result_path, image.content_path, image.style_path, image.preview_path, image.thumbnail_path]
+    still_used = await shared_paths(session, paths, exclude_image_ids=[image.id])
+    for path in paths:
+        if path and path not in still_used:
+            await delete_from_spaces(path)
+
+    if image.result_path and image.result_path not in still_used:
+        await forget_results(session, [image.result_path])
+
+    await session.delete(image)
+    await session.commit()
     
     return {"message": "Image and cloud files deleted successfully"}
 
-@router.post("/generate-public")
+@router.post("/generate-public", dependencies=[Depends(rate_limited_ip)])
 async def generate_public_art(
+    session: Annotated[AsyncSession, Depends(get_session)],
+    background_tasks: BackgroundTasks,
     content_file: UploadFile = File(...), 
-    style_file: UploadFile = File(...)
+    style_file: UploadFile = File(...),
+    output_format: Annotated[Optional[str], Form()] = None,
+    output_quality: Annotated[Optional[int], Form()] = None
 ):
-    content_url = await upload_to_spaces(content_file, "temp-public/content")
-    style_url = await upload_to_spaces(style_file, "temp-public/style")
+    encoding = encoding_params(output_format, output_quality)
+
+    style_key = await hash_upload(style_file)
+    content_key = await hash_upload(content_file)
+    cache_key = result_key("public", content_key, style_key, {"output_size": None, **encoding})
+
+    cached = await lookup_result(session, cache_key, "public")
+    if cached:
+        return {
+            "task_id": f"{CACHED_TASK_PREFIX}{cache_key}",
+            "status": "completed",
+            "result_url": get_presigned_url(cached["result_path"])
+        }
+
+    await admit(PUBLIC)
+
+    content_file, style_file, content_key, style_key = await normalize_pair(
+        content_file, style_file, content_key, style_key
+    )
+
+    input_blobs = None
+    staged = await stage_pair(content_file, style_file, content_key, style_key, "temp-public/content", "temp-public/style")
+    if staged:
+        content_url, style_url, pending = staged
+        input_blobs = {"content": content_key, "style": style_key}
+        background_tasks.add_task(persist_inputs, pending)
+    else:
+        content_url, style_url = await upload_pair(content_file, style_file, "temp-public/content", "temp-public/style")
     
     task = celery_app.send_task(
         "generate_art",
         args=[content_url, style_url],
-        kwargs={"image_id": None, "is_public": True} 
+        kwargs={
+            "image_id": None,
+            "is_public": True,
+            "style_key": style_key,
+            "result_key": cache_key,
+            "input_blobs": input_blobs,
+            "enqueued_at": time.time(),
+            **encoding
+        },
+        queue=QUEUES[PUBLIC]
     )
     
     return {"task_id": task.id}
 
 @router.get("/status/public/{task_id}")
-async def get_public_status(task_id: str):
+async def get_public_status(task_id: str, session: Annotated[AsyncSession, Depends(get_session)]):
+    if task_id.startswith(CACHED_TASK_PREFIX):
+        cached = await lookup_result(session, task_id.removeprefix(CACHED_TASK_PREFIX), "public")
+        if not cached:
+            return {"status": "FAILED", "error": "Cached result has expired"}
+        return {"status": "completed", "result_url": get_presigned_url(cached["result_path"])}
+
     task_result = AsyncResult(task_id, app=celery_app)
     
     if task_result.state == "PENDING" or task_result.state == "STARTED":
-        return {"status": "PROCESSING"}
+        # The preview only exists in the job's latest event: public jobs have no row
+        try:
+            latest = await latest_public_event(task_id) or {}
+        except redis.RedisError:
+            latest = {}
+        preview_path = latest.get("preview_path")
+        return {"status": "PROCESSING", "preview": get_presigned_url(preview_path) if preview_path else None}
         
     elif task_result.state == "SUCCESS":
         result_data = task_result.result 
@@ -154,4 +519,117 @@ async def get_public_status(task_id: str):
     elif task_result.state == "FAILURE":
         return {"status": "FAILED", "error": str(task_result.info)}
         
-    return {"status": "UNKNOWN"}
\ No newline at end of file
+    return {"status": "UNKNOWN"}
+
+@router.get("/deletions/{task_id}")
+async def get_deletion_status(task_id: str):
+    # Progress of a background object deletion started by DELETE /library or DELETE /auth/account
+    task_result = AsyncResult(task_id, app=celery_app)
+
+    if task_result.state in ("PROGRESS", "SUCCESS") and isinstance(task_result.info, dict):
+        return {"status": "COMPLETED" if task_result.state == "SUCCESS" else "PROCESSING", **task_result.info}
+    if task_result.state == "FAILURE":
+        return {"status": "FAILED", "error": str(task_result.info)}
+    return {"status": "PENDING"}
+
+@router.get("/metrics/queues")
+async def get_queue_metrics():
+    # Depth, admission counters and recent queue wait per job class
+    try:
+        return await queue_stats()
+    except redis.RedisError:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Queue metrics are unavailable.")
+
+@router.get("/metrics")
+async def get_metrics():
+    # Prometheus text format. Counters kept in Redis are read at scrape time and
+    # left at their last values if Redis is unreachable.
+    try:
+        metrics.record_queues(await queue_stats())
+        for namespace, stats in (await asyncio.to_thread(result_cache_stats)).items():
+            metrics.record_cache(f"result_{namespace}", stats)
+    except redis.RedisError as e:
+        print(f"Metrics: Redis counters unavailable: {e}")
+    metrics.record_cache("presign", presign_cache.stats())
+    metrics.record_cache("principal", principal_cache.stats())
+
+    body, content_type = metrics.render()
+    return Response(content=body, media_type=content_type)
+
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+def present_event(event: dict) -> dict:
+    # Events carry the raw storage path; clients get a presigned URL instead
+    event = dict(event)
+    for path_field, url_field in (("result_path", "result"), ("preview_path", "preview")):
+        path = event.pop(path_field, None)
+        if path:
+            event[url_field] = get_presigned_url(path)
+    return event
+
+async def subscribe_or_503(channel: str) -> asyncio.Queue:
+    try:
+        return await event_hub.subscribe(channel)
+    except (ConnectionError, asyncio.TimeoutError, redis.RedisError):
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Live updates are unavailable, poll the status endpoint instead."
+        )
+
+@router.get("/events/{image_id}")
+async def stream_image_status(
+    image_id: int,
+    request: Request,
+    # Function-scoped: an open stream must not hold a pooled connection
+    session: Annotated[AsyncSession, Depends(get_session, scope="function")],
+    current_user: Annotated[User, Depends(get_stream_user)]
+):
+    image = await session.get(Image, image_id)
+
+    if not image:
+        raise HTTPException(status_code=404, detail="Image job not found")
+
+    if image.user_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You do not have permission to view this image"
+        )
+
+    channel = image_channel(image_id)
+    queue = await subscribe_or_503(channel)
+
+    # Read the state only after subscribing, so a transition in between is not lost
+    await session.refresh(image)
+    initial = {"status": image.status, "result_path": image.result_path, "preview_path": image.preview_path}
+
+    return StreamingResponse(
+        sse_stream(request, channel, queue, initial, present_event),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS
+    )
+
+@router.get("/events/public/{task_id}")
+async def stream_public_status(task_id: str, request: Request, session: Annotated[AsyncSession, Depends(get_session, scope="function")]):
+    channel = task_channel(task_id)
+
+    if task_id.startswith(CACHED_TASK_PREFIX):
+        cached = await lookup_result(session, task_id.removeprefix(CACHED_TASK_PREFIX), "public")
+        initial = {"status": "COMPLETED", "result_path": cached["result_path"]} if cached else {"status": "FAILED"}
+        return StreamingResponse(
+            sse_stream(request, channel, asyncio.Queue(), initial, present_event),
+            media_type="text/event-stream",
+            headers=SSE_HEADERS
+        )
+
+    queue = await subscribe_or_503(channel)
+    try:
+        initial = await latest_public_event(task_id) or {"status": "PENDING"}
+    except redis.RedisError:
+        event_hub.unsubscribe(channel, queue)
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Live updates are unavailable.")
+
+    return StreamingResponse(
+        sse_stream(request, channel, queue, initial, present_event),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS
+    )
@@ -16,4 +16,9 @@ class Token(BaseModel):
 class ImageLibraryResponse(BaseModel):
     id: int
     status: str
-    result: Optional[str] = None
\ No newline at end of file
+    result: Optional[str] = None
+    # Falls back to `result` on the client when absent (e.g. results served from the result cache)
+    thumbnail: Optional[str] = None
+
+class LibraryDeleteRequest(BaseModel):
+    image_ids: list[int]
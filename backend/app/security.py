@@ -1,4 +1,7 @@
+import asyncio
 import jwt
+from concurrent.futures import ThreadPoolExecutor
+from fastapi import HTTPException, status
 from pwdlib import PasswordHash
 from datetime import datetime, timedelta, timezone
 from app.config import settings
@@ -11,6 +14,35 @@ def get_password_hash(password: str) -> str:
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return password_hash.verify(plain_password, hashed_password)
 
+class PasswordHashPool:
+    """
+    Argon2 is slow and memory-hard by design, so it runs on a few threads of its
+    own rather than the loop's default executor, which storage calls share. At
+    most `workers` hashes run at once and `queue_depth` more may wait; past that
+    the request is refused with 503 instead of queueing without bound.
+    """
+
+    def __init__(self, workers: int, queue_depth: int):
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="argon2")
+        self.limit = workers + queue_depth
+        # Only touched from the event loop thread
+        self.pending = 0
+
+    async def run(self, fn, *args):
+        if self.pending >= self.limit:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many sign-in attempts right now. Please try again shortly.",
+                headers={"Retry-After": "1"}
+            )
+        self.pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+        finally:
+            self.pending -= 1
+
+password_pool = PasswordHashPool(settings.password_hash_workers, settings.password_hash_queue_depth)
+
 def create_access_token(data: dict, expires_delta: timedelta | None = None) -> str:
     to_encode = data.copy()
 
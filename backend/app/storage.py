@@ -1,77 +1,223 @@
-import boto3
+import asyncio
+import hashlib
+import logging
 import uuid
-from fastapi import UploadFile
+from fastapi import HTTPException, UploadFile
 from app.config import settings
+from app.presign_cache import PresignCache
+from app.storage_backends import build_storage
+from app.blob_store import build_blob_store
+from app.metrics import timed
 
-s3_client = boto3.client(
-    's3',
-    region_name=settings.do_space_region,
-    endpoint_url=f"https://{settings.do_space_region}.digitaloceanspaces.com",
-    aws_access_key_id=settings.do_access_key,
-    aws_secret_access_key=settings.do_secret_key
-)
+logger = logging.getLogger(__name__)
+
+backend = build_storage(settings)
+
+blob_store = build_blob_store(settings)
+
+presign_cache = PresignCache(settings.presign_cache_size, settings.presign_reuse_fraction)
+
+# Parts must be at least 5 MB for S3 multipart uploads; smaller files go up in one put
+MULTIPART_CHUNK_SIZE = 8 * 1024 * 1024
+
+class UploadTooLarge(HTTPException):
+    def __init__(self):
+        super().__init__(
+            status_code=413,
+            detail=f"Images must be smaller than {settings.max_upload_bytes // (1024 * 1024)} MB."
+        )
+
+async def _read_chunk(file: UploadFile, size: int, total: int) -> tuple[bytes, int]:
+    chunk = await file.read(size)
+    total += len(chunk)
+    if total > settings.max_upload_bytes:
+        raise UploadTooLarge()
+    return chunk, total
+
+async def hash_upload(file: UploadFile) -> str:
+    # Same key the worker's style embedding cache uses (sha256 of the raw bytes).
+    # Also the first full pass over the upload, so oversize files are rejected here.
+    if file.size is not None and file.size > settings.max_upload_bytes:
+        raise UploadTooLarge()
+
+    digest = hashlib.sha256()
+    total = 0
+    while True:
+        chunk, total = await _read_chunk(file, 1024 * 1024, total)
+        if not chunk:
+            break
+        digest.update(chunk)
+    await file.seek(0)
+    return digest.hexdigest()
+
+async def _chunked_upload(file: UploadFile, key: str, first_chunk: bytes, total: int):
+    upload = await asyncio.to_thread(backend.start_upload, key, file.content_type)
+
+    try:
+        chunk = first_chunk
+        while chunk:
+            # Read the next chunk while this one is in flight
+            _, (chunk, total) = await asyncio.gather(
+                asyncio.to_thread(upload.write, chunk),
+                _read_chunk(file, MULTIPART_CHUNK_SIZE, total)
+            )
+
+        await asyncio.to_thread(upload.complete)
+    except BaseException:
+        await asyncio.to_thread(upload.abort)
+        raise
+
+def new_object_key(file: UploadFile, folder: str) -> str:
+    file_extension = file.filename.split(".")[-1]
+    return f"{folder}/{uuid.uuid4().hex}.{file_extension}"
 
 async def upload_to_spaces(file: UploadFile, folder: str = "uploads") -> str:
   
-    file_extension = file.filename.split(".")[-1]
-    unique_filename = f"{folder}/{uuid.uuid4().hex}.{file_extension}"
+    unique_filename = new_object_key(file, folder)
 
     try:
-        s3_client.upload_fileobj(
-            file.file,
-            settings.do_space_name,
-            unique_filename,
-            ExtraArgs={
-                'ACL': 'private', 
-                'ContentType': file.content_type
-            }
-        )
-        
-        public_url = f"https://{settings.do_space_name}.{settings.do_space_region}.cdn.digitaloceanspaces.com/{unique_filename}"
-        
-        return public_url
+        await file.seek(0)
+        first_chunk, total = await _read_chunk(file, MULTIPART_CHUNK_SIZE, 0)
+
+        # Storage calls block, so every call runs in a worker thread and the event loop stays free
+        if len(first_chunk) < MULTIPART_CHUNK_SIZE:
+            await asyncio.to_thread(backend.put, unique_filename, first_chunk, file.content_type)
+        else:
+            await _chunked_upload(file, unique_filename, first_chunk, total)
         
+        return backend.url_for(unique_filename)
+
+    except UploadTooLarge:
+        raise
     except Exception as e:
-        print(f"Cloud upload failed: {e}")
+        logger.error("Cloud upload failed: %s", e)
         return None
+
+async def upload_pair(content_file: UploadFile, style_file: UploadFile, content_folder: str, style_folder: str) -> tuple[str, str]:
+    with timed("input_upload"):
+        return await asyncio.gather(
+            upload_to_spaces(content_file, content_folder),
+            upload_to_spaces(style_file, style_folder)
+        )
     
-def get_presigned_url(file_url: str, expiration: int = 3600) -> str:
+async def upload_batch(content_file: UploadFile, style_files: list[UploadFile], content_folder: str, style_folder: str) -> tuple[str, list[str]]:
+    # One content upload shared by every output of a multi-style job
+    with timed("input_upload"):
+        content_url, *style_urls = await asyncio.gather(
+            upload_to_spaces(content_file, content_folder),
+            *(upload_to_spaces(style_file, style_folder) for style_file in style_files)
+        )
+    return content_url, style_urls
+
+async def _read_small(file: UploadFile) -> bytes:
+    await file.seek(0)
+    data = await file.read(settings.input_blob_max_bytes + 1)
+    await file.seek(0)
+    return data if len(data) <= settings.input_blob_max_bytes else None
+
+async def stage_pair(
+    content_file: UploadFile,
+    style_file: UploadFile,
+    content_hash: str,
+    style_hash: str,
+    content_folder: str,
+    style_folder: str
+):
+    """
+    Fast path for small inputs: put both files in the blob store, keyed by their
+    hashes, for the worker to read, and defer the durable upload. Returns
+    (content_url, style_url, pending uploads), or None when the normal upload
+    path has to be used.
+    """
+    if blob_store is None:
+        return None
+
+    content_bytes, style_bytes = await _read_small(content_file), await _read_small(style_file)
+    if content_bytes is None or style_bytes is None:
+        return None
+
+    try:
+        await asyncio.gather(
+            asyncio.to_thread(blob_store.put, content_hash, content_bytes),
+            asyncio.to_thread(blob_store.put, style_hash, style_bytes)
+        )
+    except Exception as e:
+        logger.warning("Blob store unavailable, uploading inputs directly: %s", e)
+        return None
+
+    content_key = new_object_key(content_file, content_folder)
+    style_key = new_object_key(style_file, style_folder)
+    pending = [
+        (content_key, content_bytes, content_file.content_type),
+        (style_key, style_bytes, style_file.content_type)
+    ]
+    return backend.url_for(content_key), backend.url_for(style_key), pending
+
+async def persist_staged(pending: list[tuple[str, bytes, str]]) -> list[str]:
+    # Runs as a background task after the response; the worker already has the
+    # bytes. Returns the URLs of inputs that never made it to storage.
+    async def put(key, data, content_type):
+        for attempt in range(1, settings.staged_upload_attempts + 1):
+            try:
+                await asyncio.to_thread(backend.put, key, data, content_type)
+                return None
+            except Exception as e:
+                if attempt == settings.staged_upload_attempts:
+                    logger.error("Deferred upload of %s failed after %d attempts: %s", key, attempt, e)
+                    return backend.url_for(key)
+                delay = settings.staged_upload_backoff_seconds * 2 ** (attempt - 1)
+                logger.warning("Deferred upload of %s failed (attempt %d), retrying in %.1fs: %s", key, attempt, delay, e)
+                await asyncio.sleep(delay)
+
+    failed = await asyncio.gather(*(put(*upload) for upload in pending))
+    return [url for url in failed if url]
+
+def object_key(file_url: str) -> str:
+    return backend.key_for(file_url)
+
+def get_presigned_url(file_url: str, expiration: int = None) -> str:
     if not file_url:
         return None
 
-    base_domain = f"https://{settings.do_space_name}.{settings.do_space_region}.cdn.digitaloceanspaces.com/"
-    
+    expiration = expiration or settings.presign_expiration_seconds
     try:
-        if file_url.startswith(base_domain):
-            file_key = file_url.replace(base_domain, "")
-            
-            response = s3_client.generate_presigned_url(
-                'get_object',
-                Params={
-                    'Bucket': settings.do_space_name,
-                    'Key': file_key
-                },
-                ExpiresIn=expiration
-            )
-            return response
+        file_key = object_key(file_url)
+        if file_key:
+            with timed("presign"):
+                return presign_cache.get_or_sign(file_key, expiration, backend.presign)
         return file_url 
     except Exception as e:
-        print(f"Error generating presigned URL: {e}")
+        logger.error("Error generating presigned URL: %s", e)
         return None
+
+def get_presigned_urls(file_urls: list[str], expiration: int = None) -> list[str]:
+    # Library pages sign many objects at once: the cache answers what it can and
+    # the rest is signed in one batch (one timestamp, one signing key when local).
+    expiration = expiration or settings.presign_expiration_seconds
+    keys = {file_url: object_key(file_url) for file_url in file_urls if file_url}
+
+    try:
+        with timed("presign"):
+            signed = presign_cache.get_or_sign_many([key for key in keys.values() if key], expiration, backend.presign_many)
+    except Exception as e:
+        logger.error("Error generating presigned URLs: %s", e)
+        signed = {}
+
+    return [
+        (signed.get(keys[file_url]) if keys[file_url] else file_url) if file_url else None
+        for file_url in file_urls
+    ]
     
 async def delete_from_spaces(file_url: str):
    
     if not file_url:
         return
 
-    base_domain = f"https://{settings.do_space_name}.{settings.do_space_region}.cdn.digitaloceanspaces.com/"
-    
     try:
-        if file_url.startswith(base_domain):
-            file_key = file_url.replace(base_domain, "")
-           
-            s3_client.delete_object(Bucket=settings.do_space_name, Key=file_key)
-            print(f"Successfully deleted {file_key} from cloud storage.")
+        file_key = object_key(file_url)
+        if file_key:
+            await asyncio.to_thread(backend.delete, file_key)
+            logger.info("Deleted %s from cloud storage", file_key)
             
     except Exception as e:
-        print(f"Failed to delete {file_url} from cloud: {e}")
\ No newline at end of file
+        logger.error("Failed to delete %s from cloud: %s", file_url, e)
\ No newline at end of file
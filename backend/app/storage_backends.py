@@ -0,0 +1,400 @@
+import hashlib
+import hmac
+import os
+import shutil
+import tempfile
+import threading
+import time
+from typing import BinaryIO, Optional, Union
+from urllib.parse import quote
+
+from app.presign_cache import LocalPresigner
+
+Body = Union[bytes, BinaryIO]
+
+# Most keys a single S3 DeleteObjects request accepts
+S3_DELETE_BATCH = 1000
+
+
+class StorageBackend:
+    """
+    Where uploads and results live. The database stores `url_for(key)`, which
+    `key_for` turns back into an object key; `presign` gives a client a
+    time-limited URL to fetch it.
+    """
+
+    url_prefix = ""
+
+    def url_for(self, key: str) -> str:
+        return f"{self.url_prefix}{key}"
+
+    def key_for(self, url: str) -> Optional[str]:
+        if url and url.startswith(self.url_prefix):
+            return url[len(self.url_prefix):]
+        return None
+
+    def put(self, key: str, body: Body, content_type: str = None):
+        raise NotImplementedError
+
+    def get(self, key: str) -> bytes:
+        raise NotImplementedError
+
+    def delete(self, key: str):
+        raise NotImplementedError
+
+    def delete_many(self, keys: list[str]) -> list[str]:
+        # Returns the keys that could not be deleted
+        failed = []
+        for key in keys:
+            try:
+                self.delete(key)
+            except Exception as e:
+                print(f"Failed to delete {key}: {e}")
+                failed.append(key)
+        return failed
+
+    def exists(self, key: str) -> bool:
+        raise NotImplementedError
+
+    def list_older_than(self, prefix: str, cutoff: float) -> list[str]:
+        # Keys under `prefix` last written before `cutoff` (a Unix timestamp)
+        raise NotImplementedError
+
+    def presign(self, key: str, expiration: int) -> str:
+        raise NotImplementedError
+
+    def presign_many(self, keys: list[str], expiration: int) -> dict[str, str]:
+        return {key: self.presign(key, expiration) for key in keys}
+
+    def start_upload(self, key: str, content_type: str = None) -> "ChunkedUpload":
+        return BufferedUpload(self, key, content_type)
+
+
+class ChunkedUpload:
+    # write() the parts in order, then complete(); abort() discards everything written
+    def write(self, chunk: bytes):
+        raise NotImplementedError
+
+    def complete(self):
+        raise NotImplementedError
+
+    def abort(self):
+        raise NotImplementedError
+
+
+class BufferedUpload(ChunkedUpload):
+    def __init__(self, backend: StorageBackend, key: str, content_type: str = None):
+        self.backend = backend
+        self.key = key
+        self.content_type = content_type
+        self._buffer = tempfile.SpooledTemporaryFile(max_size=16 * 1024 * 1024)
+
+    def write(self, chunk: bytes):
+        self._buffer.write(chunk)
+
+    def complete(self):
+        self._buffer.seek(0)
+        try:
+            self.backend.put(self.key, self._buffer, self.content_type)
+        finally:
+            self._buffer.close()
+
+    def abort(self):
+        self._buffer.close()
+
+
+class S3Backend(StorageBackend):
+    """
+    Any S3-compatible object store (DigitalOcean Spaces by default). Objects are
+    recorded under their CDN URL, as before, and served through presigned GETs.
+    """
+
+    def __init__(
+        self,
+        bucket: str,
+        region: str,
+        access_key: str,
+        secret_key: str,
+        endpoint_url: str = None,
+        public_base_url: str = None,
+        local_signing: bool = False
+    ):
+        import boto3
+
+        self.bucket = bucket
+        endpoint_url = endpoint_url or f"https://{region}.digitaloceanspaces.com"
+        self.url_prefix = (public_base_url or f"https://{bucket}.{region}.cdn.digitaloceanspaces.com").rstrip("/") + "/"
+        self.client = boto3.client(
+            's3',
+            region_name=region,
+            endpoint_url=endpoint_url,
+            aws_access_key_id=access_key,
+            aws_secret_access_key=secret_key
+        )
+
+        self.presigner = None
+        if local_signing:
+            self.presigner = LocalPresigner(endpoint_url, bucket, region, access_key, secret_key)
+
+    def put(self, key: str, body: Body, content_type: str = None):
+        extra = {'ACL': 'private'}
+        if content_type:
+            extra['ContentType'] = content_type
+
+        if isinstance(body, bytes):
+            self.client.put_object(Bucket=self.bucket, Key=key, Body=body, **extra)
+        else:
+            self.client.upload_fileobj(body, self.bucket, key, ExtraArgs=extra)
+
+    def get(self, key: str) -> bytes:
+        return self.client.get_object(Bucket=self.bucket, Key=key)["Body"].read()
+
+    def delete(self, key: str):
+        self.client.delete_object(Bucket=self.bucket, Key=key)
+
+    def delete_many(self, keys: list[str]) -> list[str]:
+        # One DeleteObjects request per 1000 keys (the API's limit) instead of a
+        # request per key. Quiet mode only reports the keys that failed.
+        failed = []
+        for start in range(0, len(keys), S3_DELETE_BATCH):
+            batch = keys[start:start + S3_DELETE_BATCH]
+            response = self.client.delete_objects(
+                Bucket=self.bucket,
+                Delete={"Objects": [{"Key": key} for key in batch], "Quiet": True}
+            )
+            for error in response.get("Errors", []):
+                print(f"Failed to delete {error.get('Key')}: {error.get('Code')} {error.get('Message')}")
+                failed.append(error.get("Key"))
+        return failed
+
+    def exists(self, key: str) -> bool:
+        from botocore.exceptions import ClientError
+
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=key)
+            return True
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return False
+            raise
+
+    def list_older_than(self, prefix: str, cutoff: float) -> list[str]:
+        keys = []
+        for page in self.client.get_paginator("list_objects_v2").paginate(Bucket=self.bucket, Prefix=prefix):
+            keys.extend(item["Key"] for item in page.get("Contents", []) if item["LastModified"].timestamp() < cutoff)
+        return keys
+
+    def presign(self, key: str, expiration: int) -> str:
+        if self.presigner:
+            return self.presigner.sign(key, expiration)
+        return self.client.generate_presigned_url(
+            'get_object',
+            Params={'Bucket': self.bucket, 'Key': key},
+            ExpiresIn=expiration
+        )
+
+    def presign_many(self, keys: list[str], expiration: int) -> dict[str, str]:
+        if self.presigner:
+            return self.presigner.sign_many(keys, expiration)
+        return super().presign_many(keys, expiration)
+
+    def start_upload(self, key: str, content_type: str = None) -> "S3MultipartUpload":
+        return S3MultipartUpload(self, key, content_type)
+
+
+class S3MultipartUpload(ChunkedUpload):
+    # Parts must be at least 5 MB (except the last), so callers write large chunks
+
+    def __init__(self, backend: S3Backend, key: str, content_type: str = None):
+        self.backend = backend
+        self.key = key
+        extra = {'ContentType': content_type} if content_type else {}
+        upload = backend.client.create_multipart_upload(Bucket=backend.bucket, Key=key, ACL='private', **extra)
+        self.upload_id = upload["UploadId"]
+        self.parts = []
+
+    def write(self, chunk: bytes):
+        part_number = len(self.parts) + 1
+        part = self.backend.client.upload_part(
+            Bucket=self.backend.bucket,
+            Key=self.key,
+            PartNumber=part_number,
+            UploadId=self.upload_id,
+            Body=chunk
+        )
+        self.parts.append({"ETag": part["ETag"], "PartNumber": part_number})
+
+    def complete(self):
+        self.backend.client.complete_multipart_upload(
+            Bucket=self.backend.bucket,
+            Key=self.key,
+            UploadId=self.upload_id,
+            MultipartUpload={"Parts": self.parts}
+        )
+
+    def abort(self):
+        self.backend.client.abort_multipart_upload(Bucket=self.backend.bucket, Key=self.key, UploadId=self.upload_id)
+
+
+def sign_file_url(secret: str, key: str, expires: int) -> str:
+    return hmac.new(secret.encode(), f"{key}:{expires}".encode(), hashlib.sha256).hexdigest()
+
+
+def verify_file_signature(secret: str, key: str, expires: int, signature: str, now: float = None) -> bool:
+    now = time.time() if now is None else now
+    if expires < now:
+        return False
+    return hmac.compare_digest(sign_file_url(secret, key, expires), signature)
+
+
+class ServedBackend(StorageBackend):
+    """
+    Backends without their own HTTP endpoint. Presigned URLs point at the API's
+    /files route and carry an HMAC of the key and expiry instead of SigV4.
+    """
+
+    def __init__(self, public_url: str, signing_secret: str):
+        self.public_url = public_url.rstrip("/")
+        self.signing_secret = signing_secret
+
+    def presign(self, key: str, expiration: int) -> str:
+        expires = int(time.time()) + expiration
+        signature = sign_file_url(self.signing_secret, key, expires)
+        return f"{self.public_url}/files/{quote(key, safe='/')}?expires={expires}&signature={signature}"
+
+    def path_for(self, key: str) -> Optional[str]:
+        # A real file the server can hand to sendfile, if there is one
+        return None
+
+    def content_type(self, key: str) -> Optional[str]:
+        return None
+
+
+class LocalBackend(ServedBackend):
+    """
+    Objects are plain files under `root`, for single-node deployments and
+    offline benchmarks. Files are served with sendfile from the /files route.
+    """
+
+    url_prefix = "local://"
+
+    def __init__(self, root: str, public_url: str, signing_secret: str):
+        super().__init__(public_url, signing_secret)
+        self.root = os.path.abspath(root)
+        os.makedirs(self.root, exist_ok=True)
+
+    def path_for(self, key: str) -> str:
+        path = os.path.abspath(os.path.join(self.root, key))
+        if os.path.commonpath([path, self.root]) != self.root:
+            raise ValueError(f"Invalid object key: {key}")
+        return path
+
+    def put(self, key: str, body: Body, content_type: str = None):
+        path = self.path_for(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        # Write a temp sibling and rename, so readers never see a partial object
+        fd, staging = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".partial")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                if isinstance(body, bytes):
+                    f.write(body)
+                else:
+                    shutil.copyfileobj(body, f, 1024 * 1024)
+            os.replace(staging, path)
+        except BaseException:
+            os.unlink(staging)
+            raise
+
+    def get(self, key: str) -> bytes:
+        with open(self.path_for(key), "rb") as f:
+            return f.read()
+
+    def delete(self, key: str):
+        try:
+            os.unlink(self.path_for(key))
+        except FileNotFoundError:
+            pass
+
+    def exists(self, key: str) -> bool:
+        return os.path.isfile(self.path_for(key))
+
+    def list_older_than(self, prefix: str, cutoff: float) -> list[str]:
+        keys = []
+        for directory, _, files in os.walk(self.path_for(prefix)):
+            for name in files:
+                path = os.path.join(directory, name)
+                # Skip uploads still being written
+                if not name.endswith(".partial") and os.path.getmtime(path) < cutoff:
+                    keys.append(os.path.relpath(path, self.root).replace(os.sep, "/"))
+        return keys
+
+
+class MemoryBackend(ServedBackend):
+    """
+    Objects in a dict, for tests and benchmarks. Only visible to the process that
+    wrote them, so the API and worker must share a process to use it.
+    """
+
+    url_prefix = "memory://"
+
+    def __init__(self, public_url: str = "http://localhost:8000", signing_secret: str = "memory"):
+        super().__init__(public_url, signing_secret)
+        self.objects: dict[str, tuple[bytes, Optional[str]]] = {}
+        self.modified: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def put(self, key: str, body: Body, content_type: str = None):
+        data = body if isinstance(body, bytes) else body.read()
+        with self._lock:
+            self.objects[key] = (data, content_type)
+            self.modified[key] = time.time()
+
+    def get(self, key: str) -> bytes:
+        with self._lock:
+            if key not in self.objects:
+                raise FileNotFoundError(key)
+            return self.objects[key][0]
+
+    def content_type(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self.objects.get(key)
+        return entry[1] if entry else None
+
+    def delete(self, key: str):
+        with self._lock:
+            self.objects.pop(key, None)
+            self.modified.pop(key, None)
+
+    def delete_many(self, keys: list[str]) -> list[str]:
+        with self._lock:
+            for key in keys:
+                self.objects.pop(key, None)
+                self.modified.pop(key, None)
+        return []
+
+    def exists(self, key: str) -> bool:
+        with self._lock:
+            return key in self.objects
+
+    def list_older_than(self, prefix: str, cutoff: float) -> list[str]:
+        with self._lock:
+            return [key for key, modified in self.modified.items() if key.startswith(prefix) and modified < cutoff]
+
+
+def build_storage(settings) -> StorageBackend:
+    if settings.storage_backend == "s3":
+        return S3Backend(
+            bucket=settings.do_space_name,
+            region=settings.do_space_region,
+            access_key=settings.do_access_key,
+            secret_key=settings.do_secret_key,
+            endpoint_url=settings.s3_endpoint_url,
+            public_base_url=settings.s3_public_base_url,
+            local_signing=settings.presign_local_signing
+        )
+    if settings.storage_backend == "local":
+        return LocalBackend(settings.storage_local_dir, settings.storage_public_url, settings.secret_key)
+    if settings.storage_backend == "memory":
+        return MemoryBackend(settings.storage_public_url, settings.secret_key)
+    raise ValueError(f"Unknown STORAGE_BACKEND: {settings.storage_backend}")
@@ -0,0 +1,7 @@
+from celery import Celery
+
+from app.config import settings
+
+# The API's client for the worker's tasks; it only sends tasks and reads results,
+# the task definitions live in celery_worker.py
+celery_app = Celery("nst_worker", broker=settings.redis_url, backend=settings.redis_url)
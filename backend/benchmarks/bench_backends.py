@@ -0,0 +1,88 @@
+# Latency of each inference backend on this machine's CPU quota.
+#
+#   cd backend && python -m benchmarks.bench_backends --threads 1 2 4 --sizes 384 512
+#
+# Every (backend, threads) pair runs in a fresh process, because TensorFlow's
+# thread pools can only be sized once per process. "style ms" is computing a
+# style embedding; "transfer ms" is one content image with a cached embedding,
+# which is what a worker pays per job once the style cache is warm.
+import argparse
+import multiprocessing
+import os
+import statistics
+import time
+
+os.environ.setdefault("CUDA_VISIBLE_DEVICES", "-1")
+
+BACKENDS = ["savedmodel", "tflite-fp16", "tflite-int8"]
+
+
+def measure(backend: str, threads: int, sizes: list[int], iterations: int, model_dir: str) -> list[tuple]:
+    import numpy as np
+    import ml_engine.inference as inference
+    from ml_engine.model_store import resolve_model_handle
+    from ml_engine.tflite_backend import STYLE_SIZE
+
+    inference.model_handle = resolve_model_handle(inference.HUB_MODEL_URL, model_dir=model_dir)
+    inference.inference_backend = backend
+    inference.inference_threads = threads
+    inference.model_dir = model_dir
+    model = inference.get_model()
+
+    rng = np.random.default_rng(0)
+    style_image = rng.random((1, STYLE_SIZE, STYLE_SIZE, 3), dtype=np.float32)
+
+    def embed():
+        return model.embed(style_image) if inference.uses_tflite() else style_image
+
+    embedding = embed()
+    style_times = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        embed()
+        style_times.append(time.perf_counter() - start)
+
+    rows = []
+    for size in sizes:
+        content = rng.random((1, size * 3 // 4, size, 3), dtype=np.float32)
+        model(content, embedding)  # first call per shape allocates / traces
+        times = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            model(content, embedding)
+            times.append(time.perf_counter() - start)
+        times.sort()
+        rows.append((
+            size,
+            statistics.median(style_times) * 1000,
+            statistics.median(times) * 1000,
+            times[max(0, int(len(times) * 0.95) - 1)] * 1000
+        ))
+    return rows
+
+
+def run(backends: list[str], threads: list[int], sizes: list[int], iterations: int, model_dir: str):
+    from ml_engine.cpu import available_cpus
+
+    print(f"CPU quota: {available_cpus()} CPUs")
+    print(f"{'backend':<12} {'threads':>7} {'content':>9} {'style ms':>9} {'transfer ms':>12} {'p95 ms':>8}")
+
+    context = multiprocessing.get_context("spawn")
+    for backend in backends:
+        for thread_count in threads:
+            with context.Pool(1) as pool:
+                rows = pool.apply(measure, (backend, thread_count, sizes, iterations, model_dir))
+            for size, style_ms, median_ms, p95_ms in rows:
+                shape = f"{size}x{size * 3 // 4}"
+                print(f"{backend:<12} {thread_count:>7} {shape:>9} {style_ms:>9.1f} {median_ms:>12.1f} {p95_ms:>8.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--backends", nargs="+", choices=BACKENDS, default=BACKENDS)
+    parser.add_argument("--threads", nargs="+", type=int, default=[1, 2, 4])
+    parser.add_argument("--sizes", nargs="+", type=int, default=[384, 512])
+    parser.add_argument("--iterations", type=int, default=10)
+    parser.add_argument("--model-dir", default=os.environ.get("MODEL_DIR", "/models"))
+    args = parser.parse_args()
+    run(args.backends, args.threads, args.sizes, args.iterations, args.model_dir)
@@ -0,0 +1,49 @@
+# Images/sec of the hub model on CPU for batch sizes 1..N.
+#
+#   cd backend && python -m benchmarks.bench_batching --max-batch 8
+#
+# Each batch size is timed on the same bucket shape the worker's MicroBatcher
+# uses, so the numbers map directly onto INFERENCE_BATCH_SIZE.
+import argparse
+import os
+import time
+
+os.environ.setdefault("CUDA_VISIBLE_DEVICES", "-1")
+
+import tensorflow as tf
+from ml_engine.inference import get_model, stylize_batch, STYLE_DIM
+from ml_engine.batching import bucket_shape
+
+
+def run(max_batch: int, iterations: int, height: int, width: int):
+    get_model()
+    content = tf.random.uniform((1, height, width, 3))
+    style = tf.random.uniform((1, STYLE_DIM, STYLE_DIM, 3))
+    key = bucket_shape(height, width)
+
+    # The first call traces the graph, keep it out of the numbers
+    stylize_batch(key, [(content, style)])
+
+    print(f"{'batch':>5} {'images/sec':>11} {'ms/batch':>9} {'ms/image':>9}")
+    for batch_size in range(1, max_batch + 1):
+        items = [(content, style)] * batch_size
+        start = time.perf_counter()
+        for _ in range(iterations):
+            stylize_batch(key, items)
+        elapsed = time.perf_counter() - start
+
+        images = batch_size * iterations
+        print(
+            f"{batch_size:>5} {images / elapsed:>11.2f} "
+            f"{1000 * elapsed / iterations:>9.1f} {1000 * elapsed / images:>9.1f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--max-batch", type=int, default=8)
+    parser.add_argument("--iterations", type=int, default=5)
+    parser.add_argument("--height", type=int, default=384)
+    parser.add_argument("--width", type=int, default=512)
+    args = parser.parse_args()
+    run(args.max_batch, args.iterations, args.height, args.width)
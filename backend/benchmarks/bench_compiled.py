@@ -0,0 +1,76 @@
+# Per-image latency of eager vs compiled (bucketed tf.function) inference on a
+# stream of mixed aspect ratios, including the first-time-shape spikes.
+#
+#   cd backend && python -m benchmarks.bench_compiled --images 60
+#
+# Each mode runs in a fresh process with the model freshly loaded. "warm-up s"
+# is what the mode pays before the first job. "max ms" shows whether any job
+# still hit a new-shape spike.
+import argparse
+import multiprocessing
+import os
+import statistics
+import time
+
+os.environ.setdefault("CUDA_VISIBLE_DEVICES", "-1")
+
+# Phone, camera, square, screenshot and odd crops, portrait and landscape
+SHAPES = [(3000, 4000), (4000, 3000), (1080, 1920), (1920, 1080), (1000, 1000), (1200, 1800), (700, 1300), (2000, 1500)]
+
+
+def measure(compile_model: bool, images: int, model_dir: str) -> dict:
+    import numpy as np
+    import tensorflow as tf
+    import ml_engine.inference as inference
+    from ml_engine.model_store import resolve_model_handle
+
+    inference.model_handle = resolve_model_handle(inference.HUB_MODEL_URL, model_dir=model_dir)
+    inference.compile_model = compile_model
+    inference.get_model()
+
+    start = time.perf_counter()
+    if compile_model:
+        inference.warm_up()
+    warm_up_seconds = time.perf_counter() - start
+
+    rng = np.random.default_rng(0)
+    style = inference.fit_style(rng.random((1, inference.STYLE_DIM, inference.STYLE_DIM, 3), dtype=np.float32))
+    latencies = []
+    for i in range(images):
+        height, width = SHAPES[i % len(SHAPES)]
+        scale = inference.MAX_DIM / max(height, width)
+        content = tf.constant(rng.random((1, round(height * scale), round(width * scale), 3), dtype=np.float32))
+
+        start = time.perf_counter()
+        inference.stylize_bucketed(content, style).numpy()
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    ordered = sorted(latencies)
+    return {
+        "warm_up": warm_up_seconds,
+        "p50": statistics.median(ordered),
+        "p95": ordered[max(0, int(len(ordered) * 0.95) - 1)],
+        "max": ordered[-1],
+        "stdev": statistics.pstdev(ordered),
+        "tracing": inference.tracing_stats()
+    }
+
+
+def run(images: int, model_dir: str):
+    print(f"{'mode':<9} {'warm-up s':>9} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8} {'stdev':>7}  tracing")
+    context = multiprocessing.get_context("spawn")
+    for compile_model in (False, True):
+        with context.Pool(1) as pool:
+            result = pool.apply(measure, (compile_model, images, model_dir))
+        print(
+            f"{'compiled' if compile_model else 'eager':<9} {result['warm_up']:>9.1f} {result['p50']:>8.1f} "
+            f"{result['p95']:>8.1f} {result['max']:>8.1f} {result['stdev']:>7.1f}  {result['tracing']}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--images", type=int, default=60)
+    parser.add_argument("--model-dir", default=os.environ.get("MODEL_DIR", "/models"))
+    args = parser.parse_args()
+    run(args.images, args.model_dir)
@@ -0,0 +1,108 @@
+# Decode-and-resize cost of a phone-sized upload: the old full decode against
+# the reduced-size (draft) decode used at ingest and in load_img.
+#
+#   cd backend && python -m benchmarks.bench_decode --width 4000 --height 3000
+#
+# Each method runs in its own process, and "peak MB" is how far the peak RSS
+# rises above the RSS after imports: what one decode adds to a worker. Peak RSS
+# is read from /proc (Linux). "tf-full" is skipped when TensorFlow is not
+# installed.
+import argparse
+import importlib.util
+import io
+import multiprocessing
+import statistics
+import time
+
+import numpy as np
+from PIL import Image
+
+
+def synthetic_photo(width: int, height: int) -> bytes:
+    # Smooth gradients plus noise compress like a photo, unlike pure noise
+    rng = np.random.default_rng(0)
+    x = np.linspace(0, 255, width, dtype=np.float32)[np.newaxis, :]
+    y = np.linspace(0, 255, height, dtype=np.float32)[:, np.newaxis]
+    pixels = np.empty((height, width, 3), dtype=np.uint8)
+    for channel, plane in enumerate((x + 0 * y, y + 0 * x, (x + y) / 2)):
+        noise = rng.normal(0, 12, (height, width)).astype(np.float32)
+        pixels[..., channel] = np.clip(plane + noise, 0, 255)
+    buffer = io.BytesIO()
+    Image.fromarray(pixels).save(buffer, format="JPEG", quality=90)
+    return buffer.getvalue()
+
+
+def decode_tf_full(data: bytes, max_dim: int):
+    import tensorflow as tf
+    img = tf.image.convert_image_dtype(tf.image.decode_image(data, channels=3), tf.float32)
+    shape = tf.cast(tf.shape(img)[:-1], tf.float32)
+    return tf.image.resize(img, tf.cast(shape * (max_dim / max(shape)), tf.int32))
+
+
+def decode_pil_full(data: bytes, max_dim: int):
+    image = Image.open(io.BytesIO(data)).convert("RGB")
+    scale = max_dim / max(image.size)
+    return image.resize((round(image.width * scale), round(image.height * scale)), Image.LANCZOS)
+
+
+def decode_pil_draft(data: bytes, max_dim: int):
+    from ml_engine.preprocess import decode_resized
+    return decode_resized(data, max_dim)
+
+
+METHODS = {"tf-full": decode_tf_full, "pil-full": decode_pil_full, "pil-draft": decode_pil_draft}
+
+
+def rss_kb(field: str) -> int:
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith(field):
+                return int(line.split()[1])
+    raise RuntimeError(f"{field} not in /proc/self/status")
+
+
+def measure(method: str, data: bytes, max_dim: int, iterations: int):
+    decode = METHODS[method]
+    # Imports stay out of the baseline
+    import ml_engine.preprocess  # noqa: F401
+    if method.startswith("tf"):
+        import tensorflow  # noqa: F401
+
+    # Reset the peak to the current RSS, then see how far the decodes push it
+    with open("/proc/self/clear_refs", "w") as f:
+        f.write("5")
+    baseline = rss_kb("VmRSS:")
+
+    times = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        decode(data, max_dim)
+        times.append(time.perf_counter() - start)
+
+    return statistics.median(times) * 1000, (rss_kb("VmHWM:") - baseline) / 1024
+
+
+def run(width: int, height: int, max_dim: int, iterations: int):
+    data = synthetic_photo(width, height)
+    print(f"input: {width}x{height} JPEG, {len(data) / 1e6:.1f} MB, target long side {max_dim}")
+    print(f"{'method':<10} {'median ms':>10} {'peak MB':>8}")
+
+    context = multiprocessing.get_context("spawn")
+    for method in METHODS:
+        if method.startswith("tf") and importlib.util.find_spec("tensorflow") is None:
+            print(f"{method:<10} skipped (no tensorflow)")
+            continue
+
+        with context.Pool(1) as pool:
+            median_ms, peak_mb = pool.apply(measure, (method, data, max_dim, iterations))
+        print(f"{method:<10} {median_ms:>10.1f} {peak_mb:>8.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--width", type=int, default=4000)
+    parser.add_argument("--height", type=int, default=3000)
+    parser.add_argument("--max-dim", type=int, default=512)
+    parser.add_argument("--iterations", type=int, default=10)
+    args = parser.parse_args()
+    run(args.width, args.height, args.max_dim, args.iterations)
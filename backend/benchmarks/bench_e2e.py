@@ -0,0 +1,137 @@
+# End-to-end jobs/sec with everything on the local storage backend: no object
+# store, no network, so the numbers are the pipeline's own cost.
+#
+#   cd backend && python -m benchmarks.bench_e2e --jobs 32 --concurrency 8
+#   cd backend && python -m benchmarks.bench_e2e --jobs 200 --passthrough
+#
+# Each job goes through the same steps as production: the API's streaming
+# upload of both images, the worker's download -> inference -> upload stages on
+# a JobPipeline, and finally the client fetching the result through a presigned
+# /files URL. --passthrough skips the model (the content image is re-encoded
+# as the "result") to isolate storage and pipeline overhead.
+import argparse
+import asyncio
+import io
+import os
+import statistics
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Settings are read at import time, so point storage at a scratch directory first
+os.environ["STORAGE_BACKEND"] = "local"
+os.environ.setdefault("STORAGE_LOCAL_DIR", tempfile.mkdtemp(prefix="nst-bench-storage-"))
+os.environ.setdefault("CUDA_VISIBLE_DEVICES", "-1")
+
+import numpy as np
+from PIL import Image as PILImage
+from fastapi import UploadFile
+from fastapi.testclient import TestClient
+
+from app import storage
+from app.config import settings
+from app.main import app
+from worker_pipeline import JobPipeline
+
+
+def synthetic_jpeg(width: int, height: int, seed: int) -> bytes:
+    rng = np.random.default_rng(seed)
+    pixels = rng.integers(0, 256, (height, width, 3), dtype=np.uint8)
+    buffer = io.BytesIO()
+    PILImage.fromarray(pixels).save(buffer, format="JPEG", quality=90)
+    return buffer.getvalue()
+
+
+def passthrough(content_bytes: bytes, style_bytes: bytes) -> io.BytesIO:
+    image = PILImage.open(io.BytesIO(content_bytes)).convert("RGB")
+    image.thumbnail((512, 512))
+    output = io.BytesIO()
+    image.save(output, format="JPEG", quality=95)
+    output.seek(0)
+    return output
+
+
+def model_inference(content_bytes: bytes, style_bytes: bytes) -> io.BytesIO:
+    from ml_engine.inference import run_inference
+    return run_inference(content_bytes, style_bytes)
+
+
+def run_job(pipeline: JobPipeline, client: TestClient, stylize, content: bytes, style: bytes) -> dict:
+    timings = {}
+    backend = storage.backend
+
+    start = time.perf_counter()
+    content_url, style_url = asyncio.run(storage.upload_pair(
+        UploadFile(file=io.BytesIO(content), filename="content.jpg", headers={"content-type": "image/jpeg"}),
+        UploadFile(file=io.BytesIO(style), filename="style.jpg", headers={"content-type": "image/jpeg"}),
+        "content",
+        "style"
+    ))
+    timings["ingest"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    content_bytes, style_bytes = pipeline.download.run(
+        lambda: (backend.get(backend.key_for(content_url)), backend.get(backend.key_for(style_url)))
+    )
+    timings["download"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    output = pipeline.inference.run(stylize, content_bytes, style_bytes)
+    timings["inference"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    result_key = f"results/bench-{time.perf_counter_ns()}.jpg"
+    pipeline.upload.run(backend.put, result_key, output, "image/jpeg")
+    timings["upload"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    url = storage.get_presigned_url(backend.url_for(result_key))
+    response = client.get(url.replace(settings.storage_public_url.rstrip("/"), ""))
+    response.raise_for_status()
+    timings["serve"] = time.perf_counter() - start
+
+    return timings
+
+
+def run(jobs: int, concurrency: int, width: int, height: int, use_model: bool):
+    stylize = model_inference if use_model else passthrough
+    if use_model:
+        from ml_engine.inference import get_model, warm_up
+        get_model()
+        warm_up()
+
+    pipeline = JobPipeline(settings)
+    images = [(synthetic_jpeg(width, height, i), synthetic_jpeg(256, 256, 10_000 + i)) for i in range(min(jobs, 8))]
+
+    with TestClient(app) as client:
+        # One untimed job so imports and first-call costs stay out of the numbers
+        run_job(pipeline, client, stylize, *images[0])
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            results = list(executor.map(
+                lambda i: run_job(pipeline, client, stylize, *images[i % len(images)]),
+                range(jobs)
+            ))
+        elapsed = time.perf_counter() - start
+
+    pipeline.shutdown()
+
+    print(f"storage: local ({settings.storage_local_dir}), model: {'hub' if use_model else 'passthrough'}")
+    print(f"{jobs} jobs of {width}x{height} at concurrency {concurrency}: {jobs / elapsed:.2f} jobs/sec ({elapsed:.2f}s)")
+    print(f"{'stage':<10} {'mean ms':>9} {'p95 ms':>9}")
+    for stage in ("ingest", "download", "inference", "upload", "serve"):
+        values = sorted(result[stage] * 1000 for result in results)
+        p95 = values[max(0, int(len(values) * 0.95) - 1)]
+        print(f"{stage:<10} {statistics.mean(values):>9.1f} {p95:>9.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--jobs", type=int, default=32)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--width", type=int, default=1024)
+    parser.add_argument("--height", type=int, default=768)
+    parser.add_argument("--passthrough", action="store_true", help="Skip the model, measure storage and pipeline only")
+    args = parser.parse_args()
+    run(args.jobs, args.concurrency, args.width, args.height, use_model=not args.passthrough)
@@ -0,0 +1,65 @@
+# Output size and encode time per format and quality, against the old baseline
+# JPEG at PIL's default quality.
+#
+#   cd backend && python -m benchmarks.bench_encoding --sizes 512 2048
+#   cd backend && python -m benchmarks.bench_encoding --image output/test_result.jpg
+#
+# Without --image the input is synthetic (gradients plus noise). A real stylized
+# output has more fine texture, so absolute sizes will be higher; compare the
+# ratios between rows.
+import argparse
+import io
+import statistics
+import time
+
+from PIL import Image
+
+from benchmarks.bench_decode import synthetic_photo
+from ml_engine.encoding import OutputEncoding, available_formats
+
+
+def baseline(image: Image.Image) -> io.BytesIO:
+    output = io.BytesIO()
+    image.save(output, format="JPEG")
+    return output
+
+
+def measure(encode, image: Image.Image, iterations: int) -> tuple[float, float]:
+    times = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        output = encode(image)
+        times.append(time.perf_counter() - start)
+    return output.getbuffer().nbytes / 1024, statistics.median(times) * 1000
+
+
+def run(images: list[tuple[str, Image.Image]], qualities: list[int], iterations: int):
+    print(f"{'input':<12} {'encoding':<22} {'KB':>8} {'vs baseline':>12} {'ms':>8}")
+    for label, image in images:
+        base_kb, base_ms = measure(baseline, image, iterations)
+        print(f"{label:<12} {'jpeg baseline q75':<22} {base_kb:>8.1f} {'1.00':>12} {base_ms:>8.1f}")
+        for format in available_formats():
+            for quality in qualities:
+                encoding = OutputEncoding(format=format, quality=quality)
+                kb, ms = measure(encoding.encode, image, iterations)
+                name = f"{format} q{quality}" + (" progressive" if format == "jpeg" else "")
+                print(f"{label:<12} {name:<22} {kb:>8.1f} {kb / base_kb:>12.2f} {ms:>8.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--image", help="Encode this image instead of synthetic ones")
+    parser.add_argument("--sizes", nargs="+", type=int, default=[512, 2048])
+    parser.add_argument("--qualities", nargs="+", type=int, default=[75, 90])
+    parser.add_argument("--iterations", type=int, default=5)
+    args = parser.parse_args()
+
+    if args.image:
+        image = Image.open(args.image).convert("RGB")
+        images = [(f"{image.width}x{image.height}", image)]
+    else:
+        images = []
+        for size in args.sizes:
+            image = Image.open(io.BytesIO(synthetic_photo(size, size * 3 // 4))).convert("RGB")
+            images.append((f"{size}x{size * 3 // 4}", image))
+    run(images, args.qualities, args.iterations)
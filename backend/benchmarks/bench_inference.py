@@ -0,0 +1,270 @@
+# Offline per-stage inference benchmark, saved as JSON and compared against a
+# stored baseline. Needs no GPU and no network.
+#
+#   cd backend && python -m benchmarks.bench_inference --model standin --save /tmp/standin.json
+#   cd backend && python -m benchmarks.bench_inference --model savedmodel --model-dir /models \
+#       --baseline benchmarks/baselines/savedmodel.json --fail-on-regression
+#
+# Content and style images are synthetic, at several sizes and aspect ratios.
+# Each image is timed stage by stage, as the worker runs it:
+#   decode      reduced-size JPEG decode (preprocess.content_array)
+#   preprocess  uint8 -> model input (inference.to_model_input; load_img is decode + preprocess)
+#   model       bucketed model call (inference.stylize_bucketed)
+#   encode      tensor_to_image + progressive JPEG q75 (OutputEncoding)
+# Style embeddings are timed once per style image, as the worker caches them.
+#
+# --model savedmodel / tflite-fp16 / tflite-int8 only use a copy already under
+# --model-dir (python -m ml_engine.model_store prefetch). --model standin
+# replaces the network with a numpy stand-in whose cost also scales with the
+# pixel count: it runs without TensorFlow and measures everything around the
+# model. Baselines only compare like with like: same model, same machine.
+import argparse
+import json
+import math
+import os
+import platform
+import resource
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import numpy as np
+from PIL import Image
+
+os.environ.setdefault("CUDA_VISIBLE_DEVICES", "-1")
+
+from benchmarks.bench_decode import synthetic_photo
+from ml_engine.encoding import OutputEncoding
+from ml_engine.preprocess import MODEL_DIM, content_array, style_array
+
+# (width, height): square, phone portrait/landscape, 16:9 both ways, camera full size
+CONTENT_SHAPES = [(512, 512), (768, 1024), (1024, 768), (1920, 1080), (1080, 1920), (4000, 3000)]
+STYLE_SHAPES = [(512, 512), (1024, 683)]
+STAGES = ("decode", "preprocess", "model", "encode")
+
+
+class StandInModel:
+    """
+    Numpy stand-in for the style network: a colour shift towards the style's
+    mean colour, blended with a 3x3 box blur. Like the real model, its cost
+    grows with the number of pixels; unlike it, it says nothing about the model.
+    """
+
+    name = "standin"
+    load_seconds = 0.0
+    warmup_seconds = 0.0
+
+    def embed(self, style_bytes: bytes) -> np.ndarray:
+        return style_array(style_bytes).reshape(-1, 3).mean(axis=0).astype(np.float32) / 255
+
+    def preprocess(self, content: np.ndarray) -> np.ndarray:
+        image = Image.fromarray(content)
+        scale = MODEL_DIM / max(image.size)
+        if scale < 1:
+            image = image.resize((round(image.width * scale), round(image.height * scale)), Image.BILINEAR)
+        return (np.asarray(image, dtype=np.float32) / 255)[np.newaxis]
+
+    def model(self, content: np.ndarray, embedding: np.ndarray) -> np.ndarray:
+        padded = np.pad(content[0], ((1, 1), (1, 1), (0, 0)), mode="edge")
+        height, width = content.shape[1:3]
+        blurred = sum(padded[dy:dy + height, dx:dx + width] for dy in range(3) for dx in range(3)) / 9
+        return np.clip(0.6 * blurred + 0.4 * embedding, 0, 1)[np.newaxis]
+
+    def to_image(self, output: np.ndarray) -> Image.Image:
+        return Image.fromarray((output[0] * 255).astype(np.uint8))
+
+
+class NetworkModel:
+    """The real network through ml_engine.inference, from a local copy only."""
+
+    def __init__(self, backend: str, model_dir: str):
+        import ml_engine.inference as inference
+
+        self.name = backend
+        self.inference = inference
+        inference.configure(SimpleNamespace(
+            model_path=None,
+            model_dir=model_dir,
+            inference_backend=backend,
+            inference_threads=None,
+            inference_compile=True,
+            preview_enabled=False,
+            preview_size=0
+        ))
+        if backend == "savedmodel" and inference.model_handle == inference.HUB_MODEL_URL:
+            sys.exit(f"No SavedModel under {model_dir}; prefetch it or run with --model standin")
+
+        inference.load_and_warm(warmup=True)
+        self.load_seconds = inference.model_load_seconds
+        self.warmup_seconds = inference.warmup_seconds
+
+    def embed(self, style_bytes: bytes) -> np.ndarray:
+        return self.inference.compute_style_embedding(style_bytes)
+
+    def preprocess(self, content: np.ndarray):
+        return self.inference.to_model_input(content)
+
+    def model(self, content, embedding: np.ndarray):
+        return self.inference.stylize_bucketed(content, self.inference.fit_style(embedding)).numpy()
+
+    def to_image(self, output) -> Image.Image:
+        return self.inference.tensor_to_image(output)
+
+
+def build_model(name: str, model_dir: str):
+    if name == "standin":
+        return StandInModel()
+    if name == "auto":
+        try:
+            import tensorflow  # noqa: F401
+            from ml_engine.model_store import local_model_path, is_prefetched
+            from ml_engine.inference import HUB_MODEL_URL
+            if is_prefetched(local_model_path(model_dir, HUB_MODEL_URL)):
+                return NetworkModel("savedmodel", model_dir)
+        except ImportError:
+            pass
+        print("No TensorFlow or no cached model: using the stand-in model")
+        return StandInModel()
+    return NetworkModel(name, model_dir)
+
+
+def summarize(samples: list[float]) -> dict:
+    ordered = sorted(samples)
+    return {
+        "p50_ms": round(statistics.median(ordered), 3),
+        "p95_ms": round(ordered[math.ceil(len(ordered) * 0.95) - 1], 3),
+        "mean_ms": round(statistics.fmean(ordered), 3)
+    }
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, (time.perf_counter() - start) * 1000
+
+
+def run(model, iterations: int, content_shapes=CONTENT_SHAPES, style_shapes=STYLE_SHAPES) -> dict:
+    contents = {f"{w}x{h}": synthetic_photo(w, h) for w, h in content_shapes}
+    styles = {f"{w}x{h}": synthetic_photo(w, h) for w, h in style_shapes}
+    encoding = OutputEncoding()
+
+    embed_ms = []
+    embeddings = []
+    for style_bytes in styles.values():
+        embedding, elapsed = timed(model.embed, style_bytes)
+        embeddings.append(embedding)
+        embed_ms.append(elapsed)
+
+    stages = {stage: [] for stage in STAGES}
+    totals = []
+    per_shape = {shape: [] for shape in contents}
+
+    for i in range(iterations):
+        shape, content_bytes = list(contents.items())[i % len(contents)]
+        embedding = embeddings[i % len(embeddings)]
+
+        pixels, decode_ms = timed(content_array, content_bytes)
+        model_input, preprocess_ms = timed(model.preprocess, pixels)
+        output, model_ms = timed(model.model, model_input, embedding)
+        _, encode_ms = timed(lambda: encoding.encode(model.to_image(output)))
+
+        for stage, elapsed in zip(STAGES, (decode_ms, preprocess_ms, model_ms, encode_ms)):
+            stages[stage].append(elapsed)
+        total = decode_ms + preprocess_ms + model_ms + encode_ms
+        totals.append(total)
+        per_shape[shape].append(total)
+
+    return {
+        "meta": {
+            "model": model.name,
+            "iterations": iterations,
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+            "created": datetime.now(timezone.utc).isoformat(timespec="seconds")
+        },
+        "model_load_seconds": model.load_seconds,
+        "model_warmup_seconds": model.warmup_seconds,
+        "style_embed": summarize(embed_ms),
+        "stages": {stage: summarize(samples) for stage, samples in stages.items()},
+        "total": summarize(totals),
+        "shapes": {shape: summarize(samples) for shape, samples in per_shape.items() if samples},
+        "images_per_sec": round(len(totals) / (sum(totals) / 1000), 3),
+        # ru_maxrss is in KiB on Linux
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    }
+
+
+def compare(result: dict, baseline: dict, tolerance: float) -> list[dict]:
+    """
+    Every tracked number next to its baseline value. Latencies and memory
+    regress when they grow by more than `tolerance`, throughput when it drops
+    by more than that.
+    """
+    rows = []
+
+    def check(name: str, current: float, before: float, higher_is_better: bool = False):
+        if current is None or not before:
+            return
+        ratio = current / before
+        regressed = ratio < 1 - tolerance if higher_is_better else ratio > 1 + tolerance
+        rows.append({"metric": name, "baseline": before, "current": current, "ratio": round(ratio, 3), "regressed": regressed})
+
+    for stage, summary in result["stages"].items():
+        for stat in ("p50_ms", "p95_ms"):
+            check(f"{stage}.{stat}", summary[stat], baseline.get("stages", {}).get(stage, {}).get(stat))
+    for stat in ("p50_ms", "p95_ms"):
+        check(f"total.{stat}", result["total"][stat], baseline.get("total", {}).get(stat))
+    check("images_per_sec", result["images_per_sec"], baseline.get("images_per_sec"), higher_is_better=True)
+    check("peak_rss_mb", result["peak_rss_mb"], baseline.get("peak_rss_mb"))
+    return rows
+
+
+def print_result(result: dict):
+    print(f"model: {result['meta']['model']}  load {result['model_load_seconds'] or 0:.2f}s  warm-up {result['model_warmup_seconds'] or 0:.2f}s")
+    print(f"{'stage':<12} {'p50 ms':>9} {'p95 ms':>9} {'mean ms':>9}")
+    for stage, summary in [("style_embed", result["style_embed"]), *result["stages"].items(), ("total", result["total"])]:
+        print(f"{stage:<12} {summary['p50_ms']:>9.2f} {summary['p95_ms']:>9.2f} {summary['mean_ms']:>9.2f}")
+    print(f"{'content':<12} {'p50 ms':>9} {'p95 ms':>9}")
+    for shape, summary in result["shapes"].items():
+        print(f"{shape:<12} {summary['p50_ms']:>9.2f} {summary['p95_ms']:>9.2f}")
+    print(f"images/sec: {result['images_per_sec']:.2f}  peak RSS: {result['peak_rss_mb']:.1f} MB")
+
+
+def print_comparison(rows: list[dict]):
+    print(f"{'metric':<18} {'baseline':>10} {'current':>10} {'ratio':>7}")
+    for row in rows:
+        flag = "  REGRESSION" if row["regressed"] else ""
+        print(f"{row['metric']:<18} {row['baseline']:>10.2f} {row['current']:>10.2f} {row['ratio']:>7.2f}{flag}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", choices=["auto", "standin", "savedmodel", "tflite-fp16", "tflite-int8"], default="auto")
+    parser.add_argument("--model-dir", default=os.environ.get("MODEL_DIR", "/models"))
+    parser.add_argument("--iterations", type=int, default=60)
+    parser.add_argument("--save", help="Write the results to this JSON file")
+    parser.add_argument("--baseline", help="Compare against results saved earlier with --save")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="Allowed change before a metric counts as a regression")
+    parser.add_argument("--fail-on-regression", action="store_true", help="Exit with status 1 on any regression")
+    args = parser.parse_args()
+
+    result = run(build_model(args.model, args.model_dir), args.iterations)
+    print_result(result)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(result, f, indent=2)
+        print(f"Saved to {args.save}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline["meta"]["model"] != result["meta"]["model"]:
+            print(f"Warning: baseline is for model {baseline['meta']['model']!r}, this run is {result['meta']['model']!r}")
+        rows = compare(result, baseline, args.tolerance)
+        print_comparison(rows)
+        if args.fail_on_regression and any(row["regressed"] for row in rows):
+            sys.exit(1)
@@ -0,0 +1,107 @@
+# /library response time against library size, on a seeded database.
+#
+#   cd backend && python -m benchmarks.bench_library --db sqlite:////tmp/nst_library_bench.db
+#
+# Compares the old "load every row" query with the keyset-paginated endpoint,
+# both for the first page and for a page from the middle of the library.
+import argparse
+import asyncio
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from fastapi import Response
+from sqlmodel import SQLModel, Session, create_engine, select, desc
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.db import async_url
+from app.models import Image, User
+from app.migrations import run_migrations
+from sqlalchemy.ext.asyncio import create_async_engine
+from app.routers.nst import get_user_library, encode_cursor
+
+SIZES = (10, 1_000, 10_000, 100_000)
+
+
+def seed(engine, sizes) -> dict[int, int]:
+    users = {}
+    with Session(engine) as session:
+        for size in sizes:
+            email = f"bench-{size}@test.com"
+            user = session.exec(select(User).where(User.email == email)).first()
+            if user is None:
+                user = User(email=email, hashed_password="x")
+                session.add(user)
+                session.commit()
+                session.refresh(user)
+
+                start = datetime(2024, 1, 1)
+                session.bulk_insert_mappings(Image, [
+                    {
+                        "user_id": user.id,
+                        "content_path": f"content/{i}.jpg",
+                        "style_path": f"style/{i}.jpg",
+                        "result_path": f"results/{i}.jpg",
+                        "status": "COMPLETED",
+                        "created_at": start + timedelta(seconds=i)
+                    }
+                    for i in range(size)
+                ])
+                session.commit()
+            users[size] = user.id
+    return users
+
+
+def timed(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+async def timed_async(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+async def run(db_url: str, repeat: int, limit: int):
+    engine = create_engine(db_url)
+    SQLModel.metadata.create_all(engine)
+    run_migrations(engine)
+    users = seed(engine, SIZES)
+    async_engine = create_async_engine(async_url(db_url))
+
+    print(f"{'images':>8} {'load all ms':>12} {'first page ms':>14} {'mid page ms':>12}")
+    with Session(engine) as session:
+        async with AsyncSession(async_engine) as async_session:
+            for size, user_id in users.items():
+                user = session.get(User, user_id)
+                def load_all():
+                    statement = select(Image).where(Image.user_id == user.id).order_by(desc(Image.created_at))
+                    session.exec(statement).all()
+
+                middle = session.exec(
+                    select(Image.created_at, Image.id).where(Image.user_id == user.id)
+                    .order_by(desc(Image.created_at), desc(Image.id)).offset(size // 2).limit(1)
+                ).first()
+                mid_cursor = encode_cursor(middle.created_at, middle.id)
+
+                first_page = await timed_async(lambda: get_user_library(Response(), async_session, user, limit=limit), repeat)
+                mid_page = await timed_async(lambda: get_user_library(Response(), async_session, user, limit=limit, cursor=mid_cursor), repeat)
+                print(f"{size:>8} {timed(load_all, repeat):>12.2f} {first_page:>14.2f} {mid_page:>12.2f}")
+    await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--db", default="sqlite:////tmp/nst_library_bench.db")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--limit", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(run(args.db, args.repeat, args.limit))
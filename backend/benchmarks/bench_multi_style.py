@@ -0,0 +1,67 @@
+# Outputs/sec of one multi-style job against the same styles sent as N
+# single jobs, from content bytes to encoded outputs.
+#
+#   cd backend && python -m benchmarks.bench_multi_style --styles 1 5 10 --chunk-size 1 4 8
+#
+# Single jobs decode the content for every style and call the model once per
+# style (no micro-batching). The multi-style job decodes once and sends
+# --chunk-size styles through each model call, as STYLE_BATCH_SIZE does in the
+# worker. Uploads and the database are left out: both paths do the same per output.
+import argparse
+import os
+import time
+
+os.environ.setdefault("CUDA_VISIBLE_DEVICES", "-1")
+
+from benchmarks.bench_decode import synthetic_photo
+from ml_engine.encoding import OutputEncoding, encode_renditions
+from ml_engine.preprocess import content_array
+from ml_engine.inference import get_model, compute_style_embedding, stylize_array, stylize_styles
+
+
+def single_jobs(content_bytes: bytes, embeddings: list, encoding: OutputEncoding):
+    for embedding in embeddings:
+        pixels = stylize_array(content_array(content_bytes), embedding)
+        encode_renditions(pixels, encoding, None)
+
+
+def multi_style_job(content_bytes: bytes, embeddings: list, encoding: OutputEncoding, chunk_size: int):
+    for pixels in stylize_styles(content_array(content_bytes), embeddings, chunk_size=chunk_size):
+        encode_renditions(pixels, encoding, None)
+
+
+def timed(fn, iterations: int, *args) -> float:
+    # The first call traces the graph for this shape, keep it out of the numbers
+    fn(*args)
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn(*args)
+    return (time.perf_counter() - start) / iterations
+
+
+def run(style_counts: list[int], chunk_sizes: list[int], iterations: int, width: int, height: int):
+    get_model()
+    content_bytes = synthetic_photo(width, height)
+    encoding = OutputEncoding()
+    # Distinct style images; the embedding is what the worker caches per style
+    embeddings = [compute_style_embedding(synthetic_photo(512 + 16 * i, 512)) for i in range(max(style_counts))]
+
+    print(f"{'styles':>6} {'mode':>12} {'outputs/sec':>12} {'ms/job':>9} {'speedup':>8}")
+    for count in style_counts:
+        styles = embeddings[:count]
+        single = timed(single_jobs, iterations, content_bytes, styles, encoding)
+        print(f"{count:>6} {'single jobs':>12} {count / single:>12.2f} {1000 * single:>9.1f} {1.0:>8.2f}")
+        for chunk_size in chunk_sizes:
+            multi = timed(multi_style_job, iterations, content_bytes, styles, encoding, chunk_size)
+            print(f"{count:>6} {f'chunk {chunk_size}':>12} {count / multi:>12.2f} {1000 * multi:>9.1f} {single / multi:>8.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--styles", nargs="+", type=int, default=[1, 5, 10])
+    parser.add_argument("--chunk-size", nargs="+", type=int, default=[1, 4, 8])
+    parser.add_argument("--iterations", type=int, default=3)
+    parser.add_argument("--width", type=int, default=1024)
+    parser.add_argument("--height", type=int, default=768)
+    args = parser.parse_args()
+    run(args.styles, args.chunk_size, args.iterations, args.width, args.height)
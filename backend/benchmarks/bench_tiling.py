@@ -0,0 +1,55 @@
+# Peak RSS and wall time of the tiled high-resolution path per output size.
+#
+#   cd backend && python -m benchmarks.bench_tiling
+#
+# Each size runs in a fresh interpreter because ru_maxrss is a process-wide
+# high-water mark.
+import argparse
+import io
+import os
+import resource
+import subprocess
+import sys
+import time
+
+os.environ.setdefault("CUDA_VISIBLE_DEVICES", "-1")
+
+SIZES = (512, 1024, 2048, 3072, 4096)
+
+
+def measure(size: int):
+    import numpy as np
+    from PIL import Image
+    from ml_engine.inference import compute_style_embedding, get_model, run_inference
+
+    get_model()
+    rng = np.random.default_rng(0)
+
+    def synthetic_jpeg(width, height):
+        buffer = io.BytesIO()
+        Image.fromarray(rng.integers(0, 255, (height, width, 3), dtype=np.uint8)).save(buffer, format="JPEG")
+        return buffer.getvalue()
+
+    content_bytes = synthetic_jpeg(size, size * 3 // 4)
+    style_embedding = compute_style_embedding(synthetic_jpeg(512, 512))
+
+    start = time.perf_counter()
+    run_inference(content_bytes, style_embedding=style_embedding, output_size=size)
+    elapsed = time.perf_counter() - start
+
+    megapixels = size * (size * 3 // 4) / 1e6
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"{size:>6} {megapixels:>6.1f} {peak_mb:>12.0f} {elapsed:>8.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=int)
+    args = parser.parse_args()
+
+    if args.size:
+        measure(args.size)
+    else:
+        print(f"{'size':>6} {'MP':>6} {'peak RSS MB':>12} {'seconds':>8}")
+        for size in SIZES:
+            subprocess.run([sys.executable, "-m", "benchmarks.bench_tiling", "--size", str(size)], check=True)
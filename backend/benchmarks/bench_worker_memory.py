@@ -0,0 +1,99 @@
+# Per-node worker memory against concurrency: every worker process holding its
+# own model (INFERENCE_MODE=local, prefork) against one inference server plus
+# TensorFlow-free worker processes (INFERENCE_MODE=server).
+#
+#   cd backend && python -m benchmarks.bench_worker_memory --concurrency 1 2 4 8
+#
+# Needs the worker's environment (.env), since each simulated worker process
+# imports celery_worker exactly as a prefork child would, then runs one job
+# through celery_worker.stylize so the model and its buffers are really in use.
+# Memory is PSS from /proc/<pid>/smaps_rollup: shared pages are split between
+# the processes mapping them, so the per-node total is a plain sum (Linux).
+#
+# Without TensorFlow, "local" is skipped and "server" measures the worker
+# processes alone after imports, with no server and no job.
+import argparse
+import importlib.util
+import multiprocessing
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.bench_decode import synthetic_photo
+
+
+def pss_mb(pid: int) -> float:
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            if line.startswith("Pss:"):
+                return int(line.split()[1]) / 1024
+    raise RuntimeError(f"no Pss for {pid}")
+
+
+def worker_process(mode: str, socket_path: str, run_job: bool, ready, done):
+    os.environ["INFERENCE_MODE"] = mode
+    os.environ["INFERENCE_SOCKET"] = socket_path
+    import celery_worker
+
+    if run_job:
+        celery_worker.load_and_warm_model()
+        content = synthetic_photo(640, 480)
+        style = synthetic_photo(512, 512)
+        celery_worker.stylize(content, style, None, None, None)
+
+    ready.put(os.getpid())
+    done.wait()
+
+
+def start_server(socket_path: str) -> subprocess.Popen:
+    env = dict(os.environ, INFERENCE_SOCKET=socket_path)
+    return subprocess.Popen([sys.executable, "-m", "ml_engine.inference_server"], env=env)
+
+
+def measure(mode: str, concurrency: int, run_job: bool, use_server: bool, socket_path: str) -> tuple[float, float]:
+    context = multiprocessing.get_context("spawn")
+    server = start_server(socket_path) if use_server else None
+    ready, done = context.Queue(), context.Event()
+    workers = [
+        context.Process(target=worker_process, args=(mode, socket_path, run_job, ready, done))
+        for _ in range(concurrency)
+    ]
+    try:
+        for worker in workers:
+            worker.start()
+        pids = [ready.get(timeout=600) for _ in workers]
+        time.sleep(1)
+        workers_mb = sum(pss_mb(pid) for pid in pids)
+        server_mb = pss_mb(server.pid) if server else 0.0
+        return workers_mb, server_mb
+    finally:
+        done.set()
+        for worker in workers:
+            worker.join(timeout=30)
+        if server:
+            server.terminate()
+            server.wait(timeout=30)
+
+
+def run(concurrency: list[int]):
+    has_tf = importlib.util.find_spec("tensorflow") is not None
+    socket_path = os.path.join(tempfile.mkdtemp(), "inference.sock")
+
+    print(f"{'mode':<7} {'concurrency':>11} {'per worker MB':>14} {'server MB':>10} {'node total MB':>14}")
+    for mode in ("local", "server"):
+        if mode == "local" and not has_tf:
+            print(f"{mode:<7} skipped (no tensorflow)")
+            continue
+        for count in concurrency:
+            workers_mb, server_mb = measure(mode, count, has_tf, mode == "server" and has_tf, socket_path)
+            server_col = f"{server_mb:>10.0f}" if mode == "server" and has_tf else f"{'-':>10}"
+            print(f"{mode:<7} {count:>11} {workers_mb / count:>14.0f} {server_col} {workers_mb + server_mb:>14.0f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--concurrency", nargs="+", type=int, default=[1, 2, 4, 8])
+    args = parser.parse_args()
+    run(args.concurrency)
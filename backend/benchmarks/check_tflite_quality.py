@@ -0,0 +1,93 @@
+# Quality regression check: TFLite outputs against the float32 SavedModel.
+#
+#   cd backend && python -m benchmarks.check_tflite_quality --variant int8 --content-dir input/ --style-dir styles/
+#
+# Every content/style pair is rendered by both models from identical inputs
+# (content at --size, style centre-cropped to 256x256 as the TFLite prediction
+# network requires). Prints PSNR and SSIM per pair and exits non-zero when the
+# mean drops below --min-psnr / --min-ssim, so it can gate a model or runtime
+# upgrade. Without image directories it falls back to synthetic images, which
+# only shows gross breakage; use real photos and paintings for the real check.
+import argparse
+import glob
+import io
+import os
+import statistics
+import sys
+
+os.environ.setdefault("CUDA_VISIBLE_DEVICES", "-1")
+
+import numpy as np
+import tensorflow as tf
+import tensorflow_hub as hub
+from PIL import Image
+
+from ml_engine.cpu import available_cpus
+from ml_engine.model_store import resolve_model_handle
+from ml_engine.preprocess import decode_resized
+from ml_engine.quality import psnr, ssim
+from ml_engine.tflite_backend import load_tflite_stylizer, style_input
+from ml_engine.inference import HUB_MODEL_URL
+
+
+def load_images(directory: str, count: int, seed: int) -> list[bytes]:
+    if directory:
+        paths = sorted(glob.glob(os.path.join(directory, "*")))[:count]
+        images = []
+        for path in paths:
+            with open(path, "rb") as f:
+                images.append(f.read())
+        return images
+
+    rng = np.random.default_rng(seed)
+    images = []
+    for _ in range(count):
+        # Blurred noise with random colour bands: structure for the model to act on
+        pixels = rng.integers(0, 256, (48, 64, 3), dtype=np.uint8)
+        buffer = io.BytesIO()
+        Image.fromarray(pixels).resize((640, 480), Image.BICUBIC).save(buffer, format="JPEG")
+        images.append(buffer.getvalue())
+    return images
+
+
+def run(variant: str, content_dir: str, style_dir: str, count: int, size: int, model_dir: str, min_psnr: float, min_ssim: float) -> bool:
+    float_model = hub.load(resolve_model_handle(HUB_MODEL_URL, model_dir=model_dir))
+    lite_model = load_tflite_stylizer(model_dir, variant, num_threads=available_cpus())
+
+    contents = load_images(content_dir, count, seed=1)
+    styles = load_images(style_dir, count, seed=2)
+
+    scores = []
+    print(f"{'pair':>4} {'PSNR dB':>8} {'SSIM':>6}")
+    for i, (content_bytes, style_bytes) in enumerate(zip(contents, styles)):
+        content = np.asarray(decode_resized(content_bytes, size), dtype=np.float32)[np.newaxis] / 255.0
+        style = style_input(decode_resized(style_bytes, 512))
+
+        reference = float_model(tf.constant(content), tf.constant(style))[0].numpy()
+        candidate = lite_model(content, lite_model.embed(style))[0]
+        if candidate.shape != reference.shape:
+            candidate = tf.image.resize(candidate, reference.shape[1:3]).numpy()
+
+        scores.append((psnr(reference, candidate), ssim(reference, candidate)))
+        print(f"{i:>4} {scores[-1][0]:>8.2f} {scores[-1][1]:>6.3f}")
+
+    mean_psnr = statistics.mean(score[0] for score in scores)
+    mean_ssim = statistics.mean(score[1] for score in scores)
+    passed = mean_psnr >= min_psnr and mean_ssim >= min_ssim
+    print(f"mean PSNR {mean_psnr:.2f} dB (min {min_psnr}), mean SSIM {mean_ssim:.3f} (min {min_ssim}): {'PASS' if passed else 'FAIL'}")
+    return passed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--variant", choices=["int8", "fp16"], default="int8")
+    parser.add_argument("--content-dir")
+    parser.add_argument("--style-dir")
+    parser.add_argument("--count", type=int, default=8)
+    parser.add_argument("--size", type=int, default=384)
+    parser.add_argument("--model-dir", default=os.environ.get("MODEL_DIR", "/models"))
+    parser.add_argument("--min-psnr", type=float, default=25.0)
+    parser.add_argument("--min-ssim", type=float, default=0.85)
+    args = parser.parse_args()
+    ok = run(args.variant, args.content_dir, args.style_dir, args.count, args.size, args.model_dir, args.min_psnr, args.min_ssim)
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,74 @@
+# Latency of a cheap endpoint while large uploads are in flight.
+#
+#   cd backend && python -m benchmarks.load_upload_latency --api http://localhost:8000 --uploads 8 --size-mb 15
+#
+# Probes GET / at a fixed rate, first on an idle API and then while --uploads
+# concurrent /generate-public requests push --size-mb files each. If uploads
+# block the event loop, the probe p95/max jump by roughly the upload time.
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+import httpx
+
+
+async def probe(client: httpx.AsyncClient, stop: asyncio.Event, interval: float) -> list[float]:
+    latencies = []
+    while not stop.is_set():
+        start = time.perf_counter()
+        await client.get("/")
+        latencies.append((time.perf_counter() - start) * 1000)
+        await asyncio.sleep(interval)
+    return latencies
+
+
+async def upload(client: httpx.AsyncClient, payload: bytes):
+    files = {
+        "content_file": ("content.jpg", payload, "image/jpeg"),
+        "style_file": ("style.jpg", payload, "image/jpeg"),
+    }
+    response = await client.post("/generate-public", files=files)
+    return response.status_code
+
+
+def summary(label: str, latencies: list[float]):
+    latencies = sorted(latencies)
+    p95 = latencies[int(len(latencies) * 0.95) - 1] if len(latencies) > 1 else latencies[0]
+    print(
+        f"{label:<16} n={len(latencies):<5} p50={statistics.median(latencies):7.1f}ms "
+        f"p95={p95:7.1f}ms max={latencies[-1]:7.1f}ms"
+    )
+
+
+async def main(api: str, uploads: int, size_mb: int, idle_seconds: float, interval: float):
+    # Random bytes so the result cache never short-circuits the upload
+    payloads = [os.urandom(size_mb * 1024 * 1024) for _ in range(uploads)]
+
+    async with httpx.AsyncClient(base_url=api, timeout=300) as client:
+        stop = asyncio.Event()
+        idle = asyncio.create_task(probe(client, stop, interval))
+        await asyncio.sleep(idle_seconds)
+        stop.set()
+        summary("idle", await idle)
+
+        stop = asyncio.Event()
+        loaded = asyncio.create_task(probe(client, stop, interval))
+        start = time.perf_counter()
+        statuses = await asyncio.gather(*(upload(client, payload) for payload in payloads))
+        elapsed = time.perf_counter() - start
+        stop.set()
+        summary("during uploads", await loaded)
+        print(f"{uploads} uploads of {size_mb} MB x2 finished in {elapsed:.1f}s, statuses: {sorted(set(statuses))}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--api", default="http://localhost:8000")
+    parser.add_argument("--uploads", type=int, default=8)
+    parser.add_argument("--size-mb", type=int, default=15)
+    parser.add_argument("--idle-seconds", type=float, default=5)
+    parser.add_argument("--interval", type=float, default=0.05)
+    args = parser.parse_args()
+    asyncio.run(main(args.api, args.uploads, args.size_mb, args.idle_seconds, args.interval))
@@ -1,14 +1,27 @@
 import time
 import uuid
-import requests
-import boto3
 from celery import Celery
-from ml_engine.inference import run_inference
+from kombu import Queue
+from celery.signals import worker_init, worker_process_init
+import numpy as np
+from ml_engine.inference_server import InferenceClient
+from ml_engine.preprocess import decode_resized, content_array, fit_output
+from ml_engine.encoding import OutputEncoding, encode_renditions
+from ml_engine.style_cache import build_style_cache, style_key as compute_style_key
+from worker_pipeline import JobPipeline
 from app.db import engine
 from app.models import Image
 from app.config import settings
-from app.storage import get_presigned_url
-from sqlmodel import Session
+from app import storage
+from app.storage import object_key, blob_store
+from app.result_cache import record_result, expired_entries, forget_hot, referenced_paths
+from app.deletion import DELETE_TASK, delete_in_batches
+from app.events import publish_job_event
+from app.admission import PRIVATE, PUBLIC, QUEUES, record_wait
+from app import metrics
+from app.metrics import JobTimer, span
+from sqlalchemy import update
+from sqlmodel import Session, col
 
 celery_app = Celery(
     "nst_worker",
@@ -16,76 +29,512 @@ celery_app = Celery(
     backend=settings.redis_url
 )
 
-s3_client = boto3.client(
-    's3',
-    region_name=settings.do_space_region,
-    endpoint_url=f"https://{settings.do_space_region}.digitaloceanspaces.com",
-    aws_access_key_id=settings.do_access_key,
-    aws_secret_access_key=settings.do_secret_key
-)
+# Loading and warming the model happens inside worker_process_init, which Celery
+# otherwise gives only 4 seconds before treating the child as dead.
+celery_app.conf.worker_proc_alive_timeout = settings.model_warmup_timeout
+
+# Strict queue order instead of kombu's default round robin: a worker only takes
+# a public job when there is no maintenance or signed-in job waiting. Prefetching
+# one task at a time keeps a worker from reserving public jobs ahead of later
+# private ones.
+celery_app.conf.task_queues = [Queue("celery"), Queue(QUEUES[PRIVATE]), Queue(QUEUES[PUBLIC])]
+celery_app.conf.broker_transport_options = {"queue_order_strategy": "priority"}
+celery_app.conf.worker_prefetch_multiplier = 1
+
+# Objects of signed-out jobs; each eviction run sweeps at most SWEEP_LIMIT expired ones
+PUBLIC_PREFIX = "temp-public/"
+SWEEP_LIMIT = 5000
+
+celery_app.conf.beat_schedule = {
+    "evict-expired-results": {"task": "evict_expired_results", "schedule": 15 * 60},
+    "sweep-input-blobs": {"task": "sweep_input_blobs", "schedule": 5 * 60}
+}
+
+if settings.inference_mode == "server":
+    # The node's inference server holds the only copy of the model; this process
+    # (and every prefork child) stays free of TensorFlow
+    inference = None
+    remote = InferenceClient(settings.inference_socket, settings.secret_key.encode())
+    # The server batches, across every worker on the node
+    batcher = None
+else:
+    import ml_engine.inference as inference
+    remote = None
+    inference.configure(settings)
+    batcher = inference.build_batcher(settings)
+
+style_cache = build_style_cache(settings)
+
+pipeline = JobPipeline(settings)
+
+first_job_pending = True
+
+def load_and_warm_model():
+    if remote is not None:
+        start = time.time()
+        info = remote.wait_ready(settings.model_warmup_timeout)
+        print(f"Inference server (pid {info['pid']}) ready after {time.time() - start:.2f}s at {settings.inference_socket}")
+        metrics.record_model(info.get("model_load_seconds"), info.get("warmup_seconds"), info.get("tracing"))
+        return
+    inference.load_and_warm(settings.model_warmup)
+    metrics.record_model(inference.model_load_seconds, inference.warmup_seconds, inference.tracing_stats())
+
+def record_worker_metrics():
+    metrics.record_cache("style_embedding", style_cache.stats())
+    if inference is not None:
+        metrics.record_model(tracing=inference.tracing_stats())
+
+def _uses_prefork(worker) -> bool:
+    pool = worker.pool_cls
+    name = pool if isinstance(pool, str) else getattr(pool, "__module__", "")
+    return "prefork" in name
+
+@worker_init.connect
+def prepare_model_in_main_process(sender=None, **kwargs):
+    if settings.worker_metrics_port:
+        if sender is not None and _uses_prefork(sender) and not metrics.MULTIPROCESS:
+            print("Prefork children record metrics only with PROMETHEUS_MULTIPROC_DIR set")
+        metrics.start_metrics_server(settings.worker_metrics_port)
+
+    # TensorFlow is not fork-safe, so prefork children load their own copy below.
+    # With an inference server, just wait for it before taking jobs.
+    if remote is not None or (sender is not None and not _uses_prefork(sender)):
+        load_and_warm_model()
+
+@worker_process_init.connect
+def prepare_model_in_child(**kwargs):
+    # Server mode children connect on their first job
+    if remote is None:
+        load_and_warm_model()
+
+def embedding_key(style_key):
+    # Style cache tiers may be shared by workers on different backends, whose
+    # embeddings are not interchangeable (style tensor vs TFLite bottleneck)
+    if settings.inference_backend.startswith("tflite"):
+        return f"{settings.inference_backend}.{style_key}"
+    return style_key
+
+def read_input(file_url, blob_key):
+    # Small inputs come through the blob store; the durable copy may still be uploading
+    if blob_key and blob_store is not None:
+        try:
+            data = blob_store.get(blob_key)
+            if data is not None:
+                return data
+        except Exception as e:
+            print(f"Blob store read failed, falling back to storage: {e}")
+
+    # Read straight from the storage backend (boto3 keeps a pooled connection per
+    # host), rather than presigning a URL and fetching it over HTTP
+    return storage.backend.get(object_key(file_url))
+
+def download_inputs(content_url, style_url, style_key, input_blobs=None, timer=None):
+    input_blobs = input_blobs or {}
+    with span(timer, "download"):
+        content_bytes = read_input(content_url, input_blobs.get("content"))
+
+    # A cached embedding means the style image never has to be downloaded or decoded again
+    style_bytes = None
+    style_embedding = style_cache.get(embedding_key(style_key)) if style_key else None
+    if style_embedding is None:
+        print("Style embedding cache miss, downloading style image...")
+        with span(timer, "download"):
+            style_bytes = read_input(style_url, input_blobs.get("style"))
+
+    return content_bytes, style_bytes, style_embedding
 
-@celery_app.task(name="generate_art")
-def generate_art_task(content_url, style_url, image_id=None, is_public=False):
+def ensure_style_embedding(style_bytes, style_embedding, style_key, timer=None):
+    if style_embedding is None:
+        style_key = style_key or compute_style_key(style_bytes)
+        with span(timer, "style_embedding"):
+            style_embedding = remote.embed(style_bytes) if remote else inference.compute_style_embedding(style_bytes)
+        style_cache.put(embedding_key(style_key), style_embedding)
+    return style_embedding
 
+# With an inference server, decoding happens there and counts towards "model"
+
+def render_preview(content_bytes, style_bytes, style_embedding, style_key, timer=None):
+    # Also returns the embedding, so the full pass reuses it
+    style_embedding = ensure_style_embedding(style_bytes, style_embedding, style_key, timer)
+    if remote is not None:
+        with span(timer, "preview_model"):
+            return style_embedding, remote.preview_array(content_bytes, style_embedding, settings.preview_size)
+    with span(timer, "decode"):
+        content = np.asarray(decode_resized(content_bytes, settings.preview_size))
+    with span(timer, "preview_model"):
+        return style_embedding, inference.stylize_preview(content, style_embedding, settings.preview_size)
+
+def stylize(content_bytes, style_bytes, style_embedding, style_key, output_size, timer=None):
+    # The stylized uint8 array; encoding happens on the upload stage
+    style_embedding = ensure_style_embedding(style_bytes, style_embedding, style_key, timer)
+
+    if remote is not None:
+        with span(timer, "model"):
+            pixels = remote.stylize_array(content_bytes, style_embedding, output_size)
+    else:
+        with span(timer, "decode"):
+            content = content_array(content_bytes, output_size)
+        with span(timer, "model"):
+            pixels = inference.stylize_array(content, style_embedding, output_size, batcher)
+    return fit_output(pixels, output_size)
+
+def download_batch_inputs(content_url, outputs, timer=None):
+    # Multi-style jobs: the content once, and each style image whose embedding is not cached
+    with span(timer, "download"):
+        content_bytes = read_input(content_url, None)
+
+    styles = []
+    for output in outputs:
+        style_key = output.get("style_key")
+        style_embedding = style_cache.get(embedding_key(style_key)) if style_key else None
+        style_bytes = None
+        if style_embedding is None:
+            with span(timer, "download"):
+                style_bytes = read_input(output["style_url"], None)
+        styles.append((style_bytes, style_embedding, style_key))
+    return content_bytes, styles
+
+def stylize_styles(content_bytes, styles, output_size, timer=None):
+    # One stylized uint8 array per style, for a content image decoded once
+    style_embeddings = [ensure_style_embedding(*style, timer) for style in styles]
+
+    if remote is not None:
+        # The server decodes for every call; its batcher still groups the calls
+        with span(timer, "model"):
+            outputs = [remote.stylize_array(content_bytes, style_embedding, output_size) for style_embedding in style_embeddings]
+    else:
+        with span(timer, "decode"):
+            content = content_array(content_bytes, output_size)
+        with span(timer, "model"):
+            outputs = inference.stylize_styles(content, style_embeddings, output_size, settings.style_batch_size)
+    return [fit_output(pixels, output_size) for pixels in outputs]
+
+def upload_result(output_stream, cloud_output_key, content_type='image/jpeg'):
+    storage.backend.put(cloud_output_key, output_stream, content_type)
+
+def store_renditions(pixels, encoding, keys, timer=None):
+    # Encodes every rendition from the one array and uploads each; returns their URLs
+    start = time.time()
+    with span(timer, "encode"):
+        renditions = encode_renditions(pixels, encoding, settings.thumbnail_size if "thumbnail" in keys else None)
+    sizes = ", ".join(f"{name} {stream.getbuffer().nbytes / 1024:.0f} KB" for name, stream in renditions.items())
+    print(f"Encoded {encoding.format} q{encoding.quality} in {time.time() - start:.2f}s: {sizes}")
+
+    urls = {}
+    with span(timer, "upload"):
+        for name, stream in renditions.items():
+            upload_result(stream, keys[name], encoding.content_type)
+            urls[name] = storage.backend.url_for(keys[name])
+    return urls
+
+def update_image(image_id, timer=None, **fields):
+    with span(timer, "db_update"), Session(engine) as session:
+        image = session.get(Image, image_id)
+        if image:
+            for name, value in fields.items():
+                setattr(image, name, value)
+            session.add(image)
+            session.commit()
+
+def complete_image(image_id, timer=None, **fields) -> bool:
+    # COMPLETED unless the job was already marked FAILED
+    with span(timer, "db_update"), Session(engine) as session:
+        result = session.exec(
+            update(Image).where(Image.id == image_id, Image.status != "FAILED").values(status="COMPLETED", **fields)
+        )
+        session.commit()
+        return result.rowcount > 0
+
+def inputs_stored(*file_urls) -> bool:
+    try:
+        return all(storage.backend.exists(object_key(file_url)) for file_url in file_urls)
+    except Exception as e:
+        print(f"Could not check stored inputs: {e}")
+        return False
+
+def update_images(image_ids, timer=None, **fields):
+    with span(timer, "db_update"), Session(engine) as session:
+        session.exec(update(Image).where(col(Image.id).in_(image_ids)).values(**fields))
+        session.commit()
+
+@celery_app.task(name="generate_art", bind=True)
+def generate_art_task(self, content_url, style_url, image_id=None, is_public=False, style_key=None, output_size=None, result_key=None, input_blobs=None, enqueued_at=None, output_format=None, output_quality=None):
+
+    global first_job_pending
     print(f"Worker received job. Public Mode: {is_public}, DB ID: {image_id}")
     job_id = str(uuid.uuid4())
-    
+    job_start = time.time()
+    job_class = PUBLIC if is_public else PRIVATE
+    timer = JobTimer(job_class, job_id)
+
+    if enqueued_at:
+        wait = record_wait(job_class, enqueued_at)
+        metrics.QUEUE_WAIT_SECONDS.labels(job_class).observe(wait)
+        print(f"Job waited {wait:.2f}s in the queue")
+
+    # Set once the preview is stored, and carried on every later event so a
+    # late subscriber still gets it
+    preview = {}
+
+    def notify(status, **fields):
+        publish_job_event(status, image_id=None if is_public else image_id, task_id=self.request.id, **preview, **fields)
+
+    encoding = OutputEncoding(
+        format=output_format or settings.output_format,
+        quality=output_quality or settings.output_quality,
+        progressive=settings.output_progressive_jpeg
+    )
+
+    def publish_preview(preview_pixels, preview_key):
+        # Overlaps the full pass, so it gets one span of its own rather than
+        # adding to the encode/upload stages on the job's critical path
+        with timer.span("preview_publish"):
+            preview_url = store_renditions(preview_pixels, encoding, {"full": preview_key})["full"]
+            if not is_public and image_id:
+                update_image(image_id, preview_path=preview_url)
+        preview["preview_path"] = preview_url
+        notify("PROCESSING", stage="preview")
+        print(f"Preview published {time.time() - job_start:.2f}s after the job started")
+
+    prefix = PUBLIC_PREFIX if is_public else ""
+    preview_key = f"{prefix}previews/{job_id}.{encoding.extension}"
+    preview_upload = None
+
     try:
         print("Downloading image bytes from cloud...")
-        secure_content_url = get_presigned_url(content_url)
-        secure_style_url = get_presigned_url(style_url)
-        content_bytes = requests.get(secure_content_url).content
-        style_bytes = requests.get(secure_style_url).content
+        start = time.time()
+        content_bytes, style_bytes, style_embedding = pipeline.download.run(download_inputs, content_url, style_url, style_key, input_blobs, timer)
+        print(f"Inputs ready in {time.time() - start:.2f}s (blob fast path: {bool(input_blobs)})")
 
         if not is_public and image_id:
-            with Session(engine) as session:
-                image = session.get(Image, image_id)
-                if image:
-                    image.status = "PROCESSING"
-                    session.add(image)
-                    session.commit()
+            update_image(image_id, timer, status="PROCESSING")
+        notify("PROCESSING", stage="inference")
+
+        if settings.preview_enabled:
+            # First pass: a small preview, uploaded while the full pass runs
+            start = time.time()
+            style_embedding, preview_pixels = pipeline.inference.run(
+                render_preview, content_bytes, style_bytes, style_embedding, style_key, timer
+            )
+            print(f"Preview rendered in {time.time() - start:.2f}s")
+            preview_upload = pipeline.upload.submit(publish_preview, preview_pixels, preview_key)
 
         print("Running ML Inference in RAM...")
         start = time.time()
         
-        output_stream = run_inference(content_bytes, style_bytes) 
+        output_pixels = pipeline.inference.run(
+            stylize, content_bytes, style_bytes, style_embedding, style_key, output_size, timer
+        )
         
         print(f"Inference finished in {time.time() - start:.2f}s")
 
+        if preview_upload is not None:
+            # Publish the preview before the final result, never after it
+            try:
+                with timer.span("preview_wait"):
+                    preview_upload.result()
+            except Exception as e:
+                print(f"Could not publish preview: {e}")
+
         print("Uploading result stream to cloud...")
+        notify("PROCESSING", stage="upload")
         
-        if is_public:
-            cloud_output_key = f"temp-public/results/{job_id}.jpg"
-        else:
-            cloud_output_key = f"results/{job_id}.jpg"
-        
-        s3_client.upload_fileobj(
-            output_stream,
-            settings.do_space_name,
-            cloud_output_key,
-            ExtraArgs={'ACL': 'private', 'ContentType': 'image/jpeg'}
-        )
-        
-        result_url = f"https://{settings.do_space_name}.{settings.do_space_region}.cdn.digitaloceanspaces.com/{cloud_output_key}"
+        keys = {"full": f"{prefix}results/{job_id}.{encoding.extension}"}
+        if not is_public and settings.thumbnail_size:
+            # Only signed-in results appear in the /library grid
+            keys["thumbnail"] = f"thumbnails/{job_id}.{encoding.extension}"
 
-        if not is_public and image_id:
-            with Session(engine) as session:
-                image = session.get(Image, image_id)
-                if image:
-                    image.status = "COMPLETED"
-                    image.result_path = result_url
-                    session.add(image)
-                    session.commit()
+        urls = pipeline.upload.run(store_renditions, output_pixels, encoding, keys, timer)
+        result_url = urls["full"]
+
+        if not is_public and image_id and not complete_image(image_id, timer, result_path=result_url, thumbnail_path=urls.get("thumbnail")):
+            # The API failed the job meanwhile: its deferred input upload never landed
+            delete_in_batches(storage.backend, list(keys.values()))
+            raise RuntimeError("Input images could not be stored")
+        notify("COMPLETED", result_path=result_url)
+
+        # Fast-path inputs are uploaded after the job was queued; only index a
+        # result once they are actually in storage
+        if result_key and (not input_blobs or inputs_stored(content_url, style_url)):
+            try:
+                with timer.span("db_update"), Session(engine) as session:
+                    record_result(
+                        session,
+                        result_key,
+                        "public" if is_public else "private",
+                        content_url,
+                        style_url,
+                        result_url
+                    )
+            except Exception as e:
+                print(f"Could not record result in cache index: {e}")
 
+        if first_job_pending:
+            first_job_pending = False
+            print(f"First job in this process finished in {time.time() - job_start:.2f}s")
+
+        timer.finish("completed", output_size=output_size, format=encoding.format, style_cached=style_bytes is None)
         return {"status": "completed", "result_url": result_url}
 
     except Exception as e:
         print(f"Worker Error: {e}")
+        if preview_upload is not None:
+            # Let an in-flight preview land first, so deleting it is final
+            try:
+                preview_upload.result()
+            except Exception:
+                pass
+            delete_in_batches(storage.backend, [preview_key])
+            preview.clear()
         if not is_public and image_id:
-            with Session(engine) as session:
-                image = session.get(Image, image_id)
-                if image:
-                    image.status = "FAILED"
-                    session.add(image)
-                    session.commit()
-        return {"status": "failed", "error": str(e)}
\ No newline at end of file
+            update_image(image_id, timer, status="FAILED", preview_path=None)
+        notify("FAILED", error=str(e))
+        timer.finish("failed", error=str(e))
+        return {"status": "failed", "error": str(e)}
+
+    finally:
+        record_worker_metrics()
+
+@celery_app.task(name="generate_art_batch", bind=True)
+def generate_art_batch_task(self, content_url, outputs, output_size=None, enqueued_at=None, output_format=None, output_quality=None):
+    # One content image in several styles (POST /generate-batch). `outputs` holds
+    # one {image_id, style_url, style_key, result_key} per style. Multi-style jobs
+    # skip the preview pass: the batched full pass is what they are for.
+    batch_id = self.request.id
+    print(f"Worker received multi-style job {batch_id} with {len(outputs)} styles")
+    timer = JobTimer(PRIVATE, batch_id)
+
+    if enqueued_at:
+        wait = record_wait(PRIVATE, enqueued_at)
+        metrics.QUEUE_WAIT_SECONDS.labels(PRIVATE).observe(wait)
+        print(f"Job waited {wait:.2f}s in the queue")
+
+    encoding = OutputEncoding(
+        format=output_format or settings.output_format,
+        quality=output_quality or settings.output_quality,
+        progressive=settings.output_progressive_jpeg
+    )
+    image_ids = [output["image_id"] for output in outputs]
+    results = [{"image_id": image_id, "status": "FAILED"} for image_id in image_ids]
+
+    def notify(image_id, status, **fields):
+        publish_job_event(status, image_id=image_id, task_id=batch_id, **fields)
+
+    def report():
+        done = sum(result["status"] == "COMPLETED" for result in results)
+        self.update_state(state="PROGRESS", meta={"completed": done, "total": len(outputs)})
+
+    try:
+        try:
+            start = time.time()
+            content_bytes, styles = pipeline.download.run(download_batch_inputs, content_url, outputs, timer)
+            print(f"Inputs ready in {time.time() - start:.2f}s ({sum(style[0] is None for style in styles)}/{len(styles)} style embeddings cached)")
+
+            update_images(image_ids, timer, status="PROCESSING")
+            for image_id in image_ids:
+                notify(image_id, "PROCESSING", stage="inference")
+
+            start = time.time()
+            output_pixels = pipeline.inference.run(stylize_styles, content_bytes, styles, output_size, timer)
+            print(f"Inference for {len(outputs)} styles finished in {time.time() - start:.2f}s")
+        except Exception as e:
+            print(f"Worker Error: {e}")
+            update_images(image_ids, timer, status="FAILED")
+            for image_id in image_ids:
+                notify(image_id, "FAILED", error=str(e))
+            timer.finish("failed", error=str(e), styles=len(outputs))
+            return {"status": "failed", "error": str(e), "outputs": results}
+
+        # Outputs are encoded and uploaded side by side; one failing leaves the others intact
+        uploads = []
+        for output, pixels in zip(outputs, output_pixels):
+            keys = {"full": f"results/{batch_id}-{output['image_id']}.{encoding.extension}"}
+            if settings.thumbnail_size:
+                keys["thumbnail"] = f"thumbnails/{batch_id}-{output['image_id']}.{encoding.extension}"
+            uploads.append(pipeline.upload.submit(store_renditions, pixels, encoding, keys, timer))
+
+        for output, upload, result in zip(outputs, uploads, results):
+            image_id = output["image_id"]
+            try:
+                urls = upload.result()
+            except Exception as e:
+                print(f"Could not store output for image {image_id}: {e}")
+                update_image(image_id, timer, status="FAILED")
+                notify(image_id, "FAILED", error=str(e))
+                result["error"] = str(e)
+                continue
+
+            if not complete_image(image_id, timer, result_path=urls["full"], thumbnail_path=urls.get("thumbnail")):
+                # The row was deleted or failed meanwhile: nothing will point at these objects
+                delete_in_batches(storage.backend, [object_key(url) for url in urls.values()])
+                result["error"] = "Image was deleted or failed before its output was stored"
+                continue
+
+            notify(image_id, "COMPLETED", result_path=urls["full"])
+            result.update(status="COMPLETED", result_url=urls["full"])
+            report()
+
+            if output.get("result_key"):
+                try:
+                    with timer.span("db_update"), Session(engine) as session:
+                        record_result(session, output["result_key"], "private", content_url, output["style_url"], urls["full"])
+                except Exception as e:
+                    print(f"Could not record result in cache index: {e}")
+
+        completed = sum(result["status"] == "COMPLETED" for result in results)
+        status = "completed" if completed == len(results) else "partial" if completed else "failed"
+        timer.finish(status, output_size=output_size, format=encoding.format, styles=len(outputs))
+        return {"status": status, "outputs": results}
+
+    finally:
+        record_worker_metrics()
+
+@celery_app.task(name=DELETE_TASK, bind=True)
+def delete_objects_task(self, keys):
+    # Queued by account and library deletion once the rows are gone; progress
+    # shows up at the API's /deletions/{task_id}
+    start = time.time()
+
+    def report(progress):
+        self.update_state(state="PROGRESS", meta=progress)
+
+    progress = delete_in_batches(storage.backend, keys, report)
+    print(f"Deleted {progress['deleted']}/{progress['total']} objects in {time.time() - start:.2f}s ({progress['failed']} failed)")
+    return progress
+
+@celery_app.task(name="evict_expired_results")
+def evict_expired_results_task():
+    # Expired entries are public results: drop their temp-public/ objects with the index row
+    with Session(engine) as session:
+        entries = expired_entries(session)
+        keys = [
+            key
+            for entry in entries
+            for key in (object_key(path) for path in (entry.result_path, entry.content_path, entry.style_path))
+            if key
+        ]
+        delete_in_batches(storage.backend, keys)
+        for entry in entries:
+            session.delete(entry)
+        session.commit()
+    forget_hot([entry.key for entry in entries])
+    evicted = len(entries)
+
+    # Public jobs that failed, or finished without a cache entry, leave objects
+    # no entry points at; anything under temp-public/ older than the TTL is expired
+    cutoff = time.time() - settings.public_result_ttl_seconds
+    stale = storage.backend.list_older_than(PUBLIC_PREFIX, cutoff)[:SWEEP_LIMIT]
+    with Session(engine) as session:
+        kept = referenced_paths(session, [storage.backend.url_for(key) for key in stale])
+    swept = [key for key in stale if storage.backend.url_for(key) not in kept]
+    delete_in_batches(storage.backend, swept)
+
+    print(f"Evicted {evicted} expired cached results, swept {len(swept)} unindexed public objects")
+    return {"evicted": evicted, "swept": len(swept)}
+
+@celery_app.task(name="sweep_input_blobs")
+def sweep_input_blobs_task():
+    removed = blob_store.sweep() if blob_store is not None else 0
+    if removed:
+        print(f"Removed {removed} expired input blobs")
+    return {"removed": removed}
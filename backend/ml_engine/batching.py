@@ -0,0 +1,96 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Hashable
+
+# Aspect ratios (long side / short side) that content images are snapped to,
+# so that jobs with similar shapes can share one batched tensor.
+BUCKET_ASPECTS = (1.0, 4 / 3, 3 / 2, 16 / 9)
+
+
+def bucket_shape(height: int, width: int, max_dim: int = 512) -> tuple[int, int]:
+    long_side, short_side = max(height, width), max(min(height, width), 1)
+    aspect = min(BUCKET_ASPECTS, key=lambda a: abs(a - long_side / short_side))
+    short_dim = int(round(max_dim / aspect))
+    return (short_dim, max_dim) if width >= height else (max_dim, short_dim)
+
+
+def all_bucket_shapes(max_dim: int = 512) -> list[tuple[int, int]]:
+    shapes = set()
+    for aspect in BUCKET_ASPECTS:
+        short_dim = int(round(max_dim / aspect))
+        shapes.update({(short_dim, max_dim), (max_dim, short_dim)})
+    return sorted(shapes)
+
+
+class MicroBatcher:
+    """
+    Collects items submitted from many threads (one per Celery task) and hands
+    them to `run_batch` in groups that share a key.
+
+    A batch is flushed when it reaches `max_batch_size` or when the oldest item
+    has waited `max_wait_ms`, whichever comes first. A larger wait buys bigger
+    batches (throughput) at the cost of per-job latency.
+    """
+
+    def __init__(
+        self,
+        run_batch: Callable[[Hashable, list[Any]], list[Any]],
+        max_batch_size: int = 4,
+        max_wait_ms: int = 25,
+    ):
+        self.run_batch = run_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._queue: queue.Queue = queue.Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    def _ensure_started(self):
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._loop, name="micro-batcher", daemon=True)
+                self._thread.start()
+
+    def submit(self, key: Hashable, item: Any) -> Future:
+        self._ensure_started()
+        future = Future()
+        self._queue.put((key, item, future))
+        return future
+
+    def __call__(self, key: Hashable, item: Any) -> Any:
+        return self.submit(key, item).result()
+
+    def _collect(self) -> dict[Hashable, list]:
+        key, item, future = self._queue.get()
+        groups = {key: [(item, future)]}
+        deadline = time.monotonic() + self.max_wait
+
+        while len(groups[key]) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                next_key, next_item, next_future = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            groups.setdefault(next_key, []).append((next_item, next_future))
+
+        return groups
+
+    def _loop(self):
+        while True:
+            for key, entries in self._collect().items():
+                for start in range(0, len(entries), self.max_batch_size):
+                    self._flush(key, entries[start:start + self.max_batch_size])
+
+    def _flush(self, key: Hashable, entries: list):
+        items = [item for item, _ in entries]
+        try:
+            results = self.run_batch(key, items)
+            for (_, future), result in zip(entries, results):
+                future.set_result(result)
+        except Exception as e:
+            for _, future in entries:
+                future.set_exception(e)
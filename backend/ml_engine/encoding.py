@@ -0,0 +1,71 @@
+import io
+from typing import Optional
+
+import numpy as np
+from PIL import Image, features
+
+# Output format name -> (PIL format, content type, file extension)
+FORMATS = {
+    "jpeg": ("JPEG", "image/jpeg", "jpg"),
+    "webp": ("WEBP", "image/webp", "webp"),
+    "avif": ("AVIF", "image/avif", "avif"),
+}
+
+
+def available_formats() -> list[str]:
+    # WebP and AVIF depend on how Pillow was built
+    return [name for name in FORMATS if name == "jpeg" or features.check(name)]
+
+
+class OutputEncoding:
+    """
+    How a job's output is stored. JPEGs are Huffman-optimized and, unless
+    `progressive` is off, progressive, so browsers can paint them while they
+    load. `quality` is the codec's own 1-100 scale for all three formats.
+    """
+
+    def __init__(self, format: str = "jpeg", quality: int = 75, progressive: bool = True):
+        if format not in FORMATS:
+            raise ValueError(f"unknown output format {format!r}")
+        self.format = format
+        self.quality = quality
+        self.progressive = progressive
+
+    @property
+    def content_type(self) -> str:
+        return FORMATS[self.format][1]
+
+    @property
+    def extension(self) -> str:
+        return FORMATS[self.format][2]
+
+    def encode(self, image: Image.Image) -> io.BytesIO:
+        params = {"quality": self.quality}
+        if self.format == "jpeg":
+            params.update(optimize=True, progressive=self.progressive)
+        elif self.format == "webp":
+            params.update(method=4)
+        elif self.format == "avif":
+            params.update(speed=6)
+
+        output = io.BytesIO()
+        image.save(output, format=FORMATS[self.format][0], **params)
+        output.seek(0)
+        return output
+
+
+def encode_renditions(pixels: np.ndarray, encoding: OutputEncoding, thumbnail_size: Optional[int] = None) -> dict[str, io.BytesIO]:
+    """
+    Every stored rendition of one output, from the single decoded array: "full"
+    always, plus "thumbnail" (long side `thumbnail_size`) when the output is
+    larger than that.
+    """
+    image = Image.fromarray(pixels)
+    renditions = {"full": encoding.encode(image)}
+
+    if thumbnail_size and max(image.size) > thumbnail_size:
+        thumbnail = image.copy()
+        thumbnail.thumbnail((thumbnail_size, thumbnail_size), Image.LANCZOS, reducing_gap=2.0)
+        renditions["thumbnail"] = encoding.encode(thumbnail)
+
+    return renditions
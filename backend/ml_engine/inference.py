@@ -4,23 +4,168 @@ import numpy as np
 from PIL import Image
 import os
 import io
-from PIL import Image
+import threading
+import time
+from ml_engine.batching import MicroBatcher, bucket_shape, all_bucket_shapes
+from ml_engine.cpu import inference_threads as available_inference_threads
+from ml_engine.model_store import resolve_model_handle
+from ml_engine.tiling import stylize_tiled
+from ml_engine.preprocess import MODEL_DIM, decode_resized, content_array, style_array, encode_image
+from ml_engine.tflite_backend import STYLE_SIZE, load_tflite_stylizer, style_input
 
 HUB_MODEL_URL = 'https://tfhub.dev/google/magenta/arbitrary-image-stylization-v1-256/2'
 hub_model = None  
+model_handle = HUB_MODEL_URL
+model_load_seconds = None
+warmup_seconds = None
+
+# "savedmodel" runs the float32 hub model; "tflite-fp16" / "tflite-int8" run the
+# quantized TFLite export, in which case hub_model holds a TFLiteStylizer and style
+# embeddings are the real 100-d bottleneck instead of a style image tensor.
+inference_backend = "savedmodel"
+inference_threads = None
+model_dir = "/models"
+
+MAX_DIM = MODEL_DIM
+TILE_SIZE = 512
+TILE_OVERLAP = 64
+
+# Content is resized into one of a few aspect buckets and style to one square
+# shape, so the SavedModel only ever sees len(all_bucket_shapes()) input shapes.
+# Each bucket gets a tf.function with a fixed input signature, traced at warm-up.
+STYLE_DIM = MAX_DIM
+# Long side of the quick first-pass preview; its buckets are traced at warm-up too
+preview_dim = None
+compile_model = True
+compiled = {}
+compile_lock = threading.Lock()
+traces = {}
+late_traces = 0
+warmed_up = False
+
+def configure(settings):
+    # Everything below reads these module globals; set them before the first get_model()
+    global model_handle, inference_backend, inference_threads, compile_model, model_dir, preview_dim
+    model_handle = resolve_model_handle(HUB_MODEL_URL, settings.model_path, settings.model_dir)
+    inference_backend = settings.inference_backend
+    inference_threads = available_inference_threads(settings.inference_threads)
+    compile_model = settings.inference_compile
+    model_dir = settings.model_dir
+    preview_dim = settings.preview_size if settings.preview_enabled else None
+
+def build_batcher(settings):
+    if settings.inference_batch_size <= 1:
+        return None
+    if uses_tflite():
+        # The TFLite networks take one image at a time
+        print("INFERENCE_BATCH_SIZE is ignored with the TFLite backend")
+        return None
+    return MicroBatcher(
+        stylize_batch,
+        max_batch_size=settings.inference_batch_size,
+        max_wait_ms=settings.inference_batch_wait_ms
+    )
+
+def load_and_warm(warmup: bool = True):
+    start = time.time()
+    get_model()
+    if warmup:
+        warm_up()
+    print(
+        f"Model ready: load {model_load_seconds:.2f}s, "
+        f"startup total {time.time() - start:.2f}s "
+        f"(backend: {inference_backend}, threads: {inference_threads}, source: {model_handle})"
+    )
+
+def uses_tflite() -> bool:
+    return inference_backend.startswith("tflite")
+
+def pin_threads(threads: int):
+    # Must run before TensorFlow's runtime starts; later calls raise and are ignored
+    try:
+        tf.config.threading.set_intra_op_parallelism_threads(threads)
+        tf.config.threading.set_inter_op_parallelism_threads(min(2, threads))
+    except RuntimeError as e:
+        print(f"Could not pin TensorFlow threads: {e}")
 
 def get_model():
-    global hub_model
+    global hub_model, model_load_seconds
     if hub_model is None:
-        print("Loading TensorFlow Model (First Run Only)...")
-        hub_model = hub.load(HUB_MODEL_URL)
-        print("Model Loaded!")
+        start = time.time()
+        if uses_tflite():
+            variant = inference_backend.split("-", 1)[1]
+            hub_model = load_tflite_stylizer(model_dir, variant, num_threads=inference_threads or 1)
+        else:
+            print(f"Loading TensorFlow Model from {model_handle} (First Run Only)...")
+            if inference_threads:
+                pin_threads(inference_threads)
+            hub_model = hub.load(model_handle)
+        model_load_seconds = time.time() - start
+        print(f"Model Loaded in {model_load_seconds:.2f}s!")
     return hub_model
 
-def load_img(img_bytes: bytes):
-    max_dim = 512
-    img = tf.image.decode_image(img_bytes, channels=3)
-    img = tf.image.convert_image_dtype(img, tf.float32)
+def compiled_stylizer(bucket: tuple[int, int]):
+    with compile_lock:
+        if bucket not in compiled:
+            compiled[bucket] = _compile(bucket)
+        return compiled[bucket]
+
+def _compile(bucket: tuple[int, int]):
+    model = get_model()
+
+    def stylize(content, style):
+        # Python side effects run only while tracing, so this counts traces
+        global late_traces
+        traces[bucket] = traces.get(bucket, 0) + 1
+        if warmed_up:
+            late_traces += 1
+            print(f"Tracing inference for bucket {bucket} after warm-up")
+        return model(content, style)[0]
+
+    # Batch dimension left open so micro-batches reuse the same trace
+    return tf.function(stylize, input_signature=[
+        tf.TensorSpec([None, bucket[0], bucket[1], 3], tf.float32),
+        tf.TensorSpec([None, STYLE_DIM, STYLE_DIM, 3], tf.float32)
+    ])
+
+def tracing_stats() -> dict:
+    # With fixed signatures each bucket traces exactly once, at warm-up. Retraces
+    # or traces after warm-up mean a job paid a tracing spike: worth alerting on.
+    return {
+        "buckets": len(compiled),
+        "traces": sum(traces.values()),
+        "retraces": sum(count - 1 for count in traces.values()),
+        "traces_after_warmup": late_traces
+    }
+
+def run_model(content, style):
+    # content is already bucket-shaped; style is a STYLE_DIM square (or a TFLite bottleneck)
+    if uses_tflite() or not compile_model:
+        return get_model()(content, style)[0]
+    return compiled_stylizer(tuple(content.shape[1:3]))(content, style)
+
+def warm_up(shapes=None) -> float:
+    # Traces (or, for TFLite, allocates) every content bucket so no job pays a
+    # first-time-shape cost
+    global warmed_up, warmup_seconds
+    model = get_model()
+    start = time.time()
+    if uses_tflite():
+        style = model.embed(np.zeros((1, STYLE_SIZE, STYLE_SIZE, 3), dtype=np.float32))
+    else:
+        style = tf.zeros((1, STYLE_DIM, STYLE_DIM, 3))
+    if shapes is None:
+        shapes = all_bucket_shapes(MAX_DIM) + (all_bucket_shapes(preview_dim) if preview_dim else [])
+    for height, width in shapes:
+        run_model(tf.zeros((1, height, width, 3)), style)
+    warmed_up = True
+    elapsed = warmup_seconds = time.time() - start
+    print(f"Model warm-up finished in {elapsed:.2f}s ({tracing_stats()})")
+    return elapsed
+
+def to_model_input(content: np.ndarray, max_dim: int = MAX_DIM):
+    # uint8 HxWx3 to a 1xHxWx3 float tensor with its long side at max_dim
+    img = tf.image.convert_image_dtype(tf.constant(content), tf.float32)
 
     shape = tf.cast(tf.shape(img)[:-1], tf.float32)
     long_dim = max(shape)
@@ -31,6 +176,11 @@ def load_img(img_bytes: bytes):
     img = img[tf.newaxis, :]
     return img
 
+def load_img(img_bytes: bytes, max_dim: int = MAX_DIM):
+    # Reduced-size decode straight to about max_dim instead of decoding every
+    # pixel of the upload; inputs normalized at ingest are already that size.
+    return to_model_input(np.asarray(decode_resized(img_bytes, max_dim)), max_dim)
+
 def tensor_to_image(tensor):
     tensor = tensor * 255
     tensor = np.array(tensor, dtype=np.uint8)
@@ -39,22 +189,126 @@ def tensor_to_image(tensor):
         tensor = tensor[0]
     return Image.fromarray(tensor)
 
-def run_inference(content_bytes: bytes, style_bytes: bytes) -> io.BytesIO:
-   
-    model = get_model()
+def embed_style_image(style: np.ndarray) -> np.ndarray:
+    # style: uint8 HxWx3, as decoded by style_array
+    style = Image.fromarray(style)
+    if uses_tflite():
+        # The TFLite export has a separate prediction network: cache its bottleneck
+        return get_model().embed(style_input(style, STYLE_SIZE))
+
+    # The hub SavedModel only exposes the fused (content, style) signature, so the
+    # reusable part of the style branch is the decoded style tensor, already
+    # centre-cropped to the single square style shape the compiled model takes.
+    return style_input(style, STYLE_DIM)
+
+def compute_style_embedding(style_bytes: bytes) -> np.ndarray:
+    return embed_style_image(style_array(style_bytes))
+
+def fit_style(style_embedding):
+    # Embeddings cached before styles were cropped square are resized on the fly
+    if uses_tflite() or tuple(style_embedding.shape[1:3]) == (STYLE_DIM, STYLE_DIM):
+        return tf.constant(style_embedding)
+    return tf.image.resize(style_embedding, (STYLE_DIM, STYLE_DIM))
+
+def stylize_bucketed(content, style, max_dim: int = MAX_DIM):
+    # Resize into the content's bucket, run the compiled model, resize back
+    height, width = int(content.shape[1]), int(content.shape[2])
+    bucket = bucket_shape(height, width, max_dim)
+    if (height, width) != bucket:
+        content = tf.image.resize(content, bucket)
+    stylized = run_model(content, style)
+    if tuple(stylized.shape[1:3]) != (height, width):
+        stylized = tf.image.resize(stylized, (height, width))
+    return stylized
+
+def batch_key(content_img, style_embedding) -> tuple:
+    return bucket_shape(int(content_img.shape[1]), int(content_img.shape[2]), MAX_DIM)
+
+def stylize_batch(key: tuple, items: list) -> list:
+    # Every item in a batch is resized to the shared bucket shape, run through the
+    # model as one tensor, and resized back to its own content shape afterwards.
+    contents = tf.concat([tf.image.resize(content, key) for content, _ in items], axis=0)
+    styles = tf.concat([fit_style(style) for _, style in items], axis=0)
+
+    outputs = run_model(contents, styles)
+
+    return [
+        tf.image.resize(outputs[i:i + 1], tf.shape(content)[1:3])
+        for i, (content, _) in enumerate(items)
+    ]
+
+def stylize_tiled_array(content: np.ndarray, style_embedding: np.ndarray) -> np.ndarray:
+    # Content stays uint8 rather than a float tensor: at 12 MP the float copy
+    # alone would be ~150 MB.
+    style = fit_style(style_embedding)
+
+    def stylize_tile(tile: np.ndarray) -> np.ndarray:
+        return np.asarray(stylize_bucketed(tf.constant(tile), style))
+
+    result = stylize_tiled(content, stylize_tile, tile_size=TILE_SIZE, overlap=TILE_OVERLAP)
+    print(f"Tiled processing complete at {result.shape[1]}x{result.shape[0]}")
+    return result
+
+def stylize_array(content: np.ndarray, style_embedding: np.ndarray, output_size: int = None, batcher=None) -> np.ndarray:
+    """
+    uint8 HxWx3 content (as decoded by content_array) to the uint8 HxWx3
+    stylized image. Everything that touches the model goes through here, so the
+    inference server can run it for clients that never import TensorFlow.
+    """
+    if output_size and output_size > MAX_DIM:
+        return stylize_tiled_array(content, style_embedding)
+
+    content_img = to_model_input(content)
+
+    if batcher is not None:
+        stylized_image = batcher(batch_key(content_img, style_embedding), (content_img, style_embedding))
+    else:
+        stylized_image = stylize_bucketed(content_img, fit_style(style_embedding))
+
+    return np.asarray(tensor_to_image(stylized_image))
+
+def stylize_styles(content: np.ndarray, style_embeddings: list, output_size: int = None, chunk_size: int = 4) -> list[np.ndarray]:
+    """
+    One content image in many styles (multi-style jobs). The content is
+    converted and resized into its bucket once, then repeated along the batch
+    dimension so `chunk_size` styles share each model call.
+    """
+    if output_size and output_size > MAX_DIM:
+        # Tiles are already cut per call; only the decode is shared
+        return [stylize_tiled_array(content, style_embedding) for style_embedding in style_embeddings]
+
+    content_img = to_model_input(content)
+    height, width = int(content_img.shape[1]), int(content_img.shape[2])
+    bucket = bucket_shape(height, width, MAX_DIM)
+    if (height, width) != bucket:
+        content_img = tf.image.resize(content_img, bucket)
+    if uses_tflite():
+        # The TFLite networks take one image at a time
+        chunk_size = 1
+
+    results = []
+    for start in range(0, len(style_embeddings), chunk_size):
+        styles = tf.concat([fit_style(style) for style in style_embeddings[start:start + chunk_size]], axis=0)
+        outputs = run_model(tf.repeat(content_img, int(styles.shape[0]), axis=0), styles)
+        if tuple(outputs.shape[1:3]) != (height, width):
+            outputs = tf.image.resize(outputs, (height, width))
+        results.extend(np.asarray(tensor_to_image(outputs[i:i + 1])) for i in range(int(outputs.shape[0])))
+    return results
+
+def stylize_preview(content: np.ndarray, style_embedding: np.ndarray, size: int) -> np.ndarray:
+    # The first pass of a two-pass job: same model and style embedding, with the
+    # content at `size` on the long side, so it costs a fraction of the full pass
+    content_img = to_model_input(content, size)
+    return np.asarray(tensor_to_image(stylize_bucketed(content_img, fit_style(style_embedding), size)))
 
-    content_img = load_img(content_bytes)
-    style_img = load_img(style_bytes)
+def run_inference(content_bytes: bytes, style_bytes: bytes = None, style_embedding: np.ndarray = None, batcher=None, output_size: int = None) -> io.BytesIO:
 
-    outputs = model(tf.constant(content_img), tf.constant(style_img))
-    stylized_image = outputs[0]
+    if style_embedding is None:
+        style_embedding = compute_style_embedding(style_bytes)
 
-    result = tensor_to_image(stylized_image)
-    output_buffer = io.BytesIO()
-    result.save(output_buffer, format="JPEG")
-    output_buffer.seek(0)
+    result = stylize_array(content_array(content_bytes, output_size), style_embedding, output_size, batcher)
     print("In-memory processing complete!")
-    return output_buffer
+    return encode_image(Image.fromarray(result))
 
 if __name__ == "__main__":
     print("Testing in-memory pipeline...")
@@ -0,0 +1,276 @@
+"""
+One inference server per node, shared by every worker process on it.
+
+The server is the only process that imports TensorFlow and holds the model.
+Workers (any Celery pool, any concurrency) connect over a Unix socket and send
+small request headers; the tensors themselves go through POSIX shared memory:
+the client decodes its image into a segment, the server reads it, runs the
+model and writes the result into a segment of its own for the client to read
+and unlink. Concurrent requests from all clients land on one model, and on
+the server's micro-batcher when batching is enabled.
+
+    cd backend && python -m ml_engine.inference_server
+"""
+import os
+import threading
+import time
+from multiprocessing import resource_tracker
+from multiprocessing.connection import Client, Listener
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+
+from ml_engine.preprocess import decode_resized, content_array, style_array
+
+
+def share_array(array: np.ndarray) -> tuple[SharedMemory, dict]:
+    # Copies `array` into a new segment; the caller owns it and must unlink it
+    array = np.ascontiguousarray(array)
+    segment = SharedMemory(create=True, size=max(1, array.nbytes))
+    np.ndarray(array.shape, array.dtype, buffer=segment.buf)[...] = array
+    return segment, {"shm": segment.name, "shape": array.shape, "dtype": array.dtype.str}
+
+
+def read_array(meta: dict, unlink: bool = False) -> np.ndarray:
+    segment = SharedMemory(name=meta["shm"])
+    try:
+        return np.ndarray(meta["shape"], np.dtype(meta["dtype"]), buffer=segment.buf).copy()
+    finally:
+        segment.close()
+        if unlink:
+            segment.unlink()
+        else:
+            # Before Python 3.13, attaching registers the segment with this
+            # process's resource tracker as if it owned it, and the tracker would
+            # unlink it (and warn) when this process exits
+            resource_tracker.unregister(segment._name, "shared_memory")
+
+
+class ModelEngine:
+    """The in-process model as array calls: uint8 images in, arrays out."""
+
+    def __init__(self, batcher=None):
+        import ml_engine.inference as inference
+        self.inference = inference
+        self.batcher = batcher
+
+    def embed(self, style: np.ndarray) -> np.ndarray:
+        return self.inference.embed_style_image(style)
+
+    def stylize(self, content: np.ndarray, style_embedding: np.ndarray, output_size: int = None) -> np.ndarray:
+        return self.inference.stylize_array(content, style_embedding, output_size, self.batcher)
+
+    def preview(self, content: np.ndarray, style_embedding: np.ndarray, size: int) -> np.ndarray:
+        return self.inference.stylize_preview(content, style_embedding, size)
+
+    def stats(self) -> dict:
+        return {
+            "model_load_seconds": self.inference.model_load_seconds,
+            "warmup_seconds": self.inference.warmup_seconds,
+            "tracing": self.inference.tracing_stats()
+        }
+
+
+class InferenceServer:
+    def __init__(self, address: str, authkey: bytes, engine):
+        self.address = address
+        self.authkey = authkey
+        self.engine = engine
+        self.listener = None
+        self.closed = False
+        self.requests = 0
+
+    def listen(self):
+        # A socket file left by a previous server on this node would make bind fail
+        if os.path.exists(self.address):
+            os.unlink(self.address)
+        os.makedirs(os.path.dirname(self.address) or ".", exist_ok=True)
+        self.listener = Listener(self.address, family="AF_UNIX", authkey=self.authkey)
+
+    def serve_forever(self):
+        if self.listener is None:
+            self.listen()
+        print(f"Inference server listening on {self.address}")
+        while True:
+            try:
+                conn = self.listener.accept()
+            except Exception as e:
+                if self.closed:
+                    return
+                # e.g. a client with the wrong authkey, or one that hung up mid-handshake
+                print(f"Inference server rejected a connection: {e}")
+                continue
+            if self.closed:
+                conn.close()
+                return
+            threading.Thread(target=self.handle, args=(conn,), name="inference-client", daemon=True).start()
+
+    def close(self):
+        self.closed = True
+        if self.listener is not None:
+            # Closing the socket does not interrupt a blocking accept(); a last
+            # connection does
+            try:
+                Client(self.address, family="AF_UNIX", authkey=self.authkey).close()
+            except OSError:
+                pass
+            self.listener.close()
+
+    def handle(self, conn):
+        with conn:
+            while True:
+                try:
+                    request = conn.recv()
+                except (EOFError, OSError):
+                    return
+
+                segments = []
+                try:
+                    reply = self.dispatch(request, segments)
+                except Exception as e:
+                    print(f"Inference server error on {request.get('op')}: {e}")
+                    reply = {"error": f"{type(e).__name__}: {e}"}
+
+                try:
+                    conn.send(reply)
+                except (EOFError, OSError):
+                    # The client went away: nobody will read (and unlink) the outputs
+                    for segment in segments:
+                        segment.close()
+                        segment.unlink()
+                    return
+
+                for segment in segments:
+                    # Handed off: the client unlinks it once read
+                    segment.close()
+                    resource_tracker.unregister(segment._name, "shared_memory")
+
+    def dispatch(self, request: dict, segments: list) -> dict:
+        op = request["op"]
+        if op == "ping":
+            stats = self.engine.stats() if hasattr(self.engine, "stats") else {}
+            return {"pid": os.getpid(), "requests": self.requests, **stats}
+
+        self.requests += 1
+        if op == "embed":
+            result = self.engine.embed(read_array(request["style"]))
+            name = "embedding"
+        elif op == "stylize":
+            result = self.engine.stylize(
+                read_array(request["content"]),
+                read_array(request["embedding"]),
+                request.get("output_size")
+            )
+            name = "output"
+        elif op == "preview":
+            result = self.engine.preview(read_array(request["content"]), read_array(request["embedding"]), request["size"])
+            name = "output"
+        else:
+            raise ValueError(f"unknown op {op!r}")
+
+        segment, meta = share_array(result)
+        segments.append(segment)
+        return {name: meta}
+
+
+class InferenceClient:
+    """
+    The worker side. Never imports TensorFlow: images are decoded and encoded
+    here, in the worker, and only the model call happens in the server.
+
+    Each thread (and each forked child) gets its own connection, so concurrent
+    jobs in one worker are concurrent requests to the server.
+    """
+
+    def __init__(self, address: str, authkey: bytes):
+        self.address = address
+        self.authkey = authkey
+        self._local = threading.local()
+
+    def _connection(self):
+        # A connection inherited across fork would be shared with the parent
+        if getattr(self._local, "pid", None) != os.getpid():
+            self._local.conn = Client(self.address, family="AF_UNIX", authkey=self.authkey)
+            self._local.pid = os.getpid()
+        return self._local.conn
+
+    def _drop_connection(self):
+        conn = getattr(self._local, "conn", None)
+        self._local.pid = None
+        if conn is not None:
+            conn.close()
+
+    def call(self, op: str, arrays: dict = None, **fields) -> dict:
+        request = {"op": op, **fields}
+        segments = []
+        try:
+            for name, array in (arrays or {}).items():
+                segment, request[name] = share_array(array)
+                segments.append(segment)
+
+            try:
+                conn = self._connection()
+                conn.send(request)
+                reply = conn.recv()
+            except (EOFError, OSError):
+                # The server restarted since this connection was opened: retry once
+                self._drop_connection()
+                conn = self._connection()
+                conn.send(request)
+                reply = conn.recv()
+        finally:
+            for segment in segments:
+                segment.close()
+                segment.unlink()
+
+        if "error" in reply:
+            raise RuntimeError(f"Inference server: {reply['error']}")
+        return reply
+
+    def embed(self, style_bytes: bytes) -> np.ndarray:
+        reply = self.call("embed", {"style": style_array(style_bytes)})
+        return read_array(reply["embedding"], unlink=True)
+
+    def stylize_array(self, content_bytes: bytes, style_embedding: np.ndarray, output_size: int = None) -> np.ndarray:
+        reply = self.call(
+            "stylize",
+            {"content": content_array(content_bytes, output_size), "embedding": style_embedding},
+            output_size=output_size
+        )
+        return read_array(reply["output"], unlink=True)
+
+    def preview_array(self, content_bytes: bytes, style_embedding: np.ndarray, size: int) -> np.ndarray:
+        reply = self.call(
+            "preview",
+            {"content": np.asarray(decode_resized(content_bytes, size)), "embedding": style_embedding},
+            size=size
+        )
+        return read_array(reply["output"], unlink=True)
+
+    def wait_ready(self, timeout: float) -> dict:
+        # The server may still be loading and warming the model
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                return self.call("ping")
+            except (FileNotFoundError, ConnectionRefusedError):
+                self._drop_connection()
+                if time.monotonic() > deadline:
+                    raise
+                time.sleep(0.5)
+
+
+def main():
+    from app.config import settings
+    import ml_engine.inference as inference
+
+    inference.configure(settings)
+    batcher = inference.build_batcher(settings)
+    inference.load_and_warm(settings.model_warmup)
+
+    server = InferenceServer(settings.inference_socket, settings.secret_key.encode(), ModelEngine(batcher))
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+import argparse
+import json
+import os
+import shutil
+import time
+from datetime import datetime, timezone
+
+# Local layout: <model_dir>/<name>/<version>/ holds the SavedModel plus a
+# manifest.json recording where it came from.
+DEFAULT_MODEL_DIR = "/models"
+
+
+def version_from_url(url: str) -> tuple[str, str]:
+    # https://tfhub.dev/google/magenta/arbitrary-image-stylization-v1-256/2
+    #   -> ("arbitrary-image-stylization-v1-256", "2")
+    parts = url.rstrip("/").split("?")[0].split("/")
+    return parts[-2], parts[-1]
+
+
+def local_model_path(model_dir: str, url: str) -> str:
+    name, version = version_from_url(url)
+    return os.path.join(model_dir, name, version)
+
+
+def is_prefetched(path: str) -> bool:
+    return os.path.exists(os.path.join(path, "saved_model.pb"))
+
+
+def prefetch(url: str, model_dir: str = DEFAULT_MODEL_DIR, force: bool = False) -> str:
+    import tensorflow_hub as hub
+
+    target = local_model_path(model_dir, url)
+    if is_prefetched(target) and not force:
+        print(f"Model already present at {target}")
+        return target
+
+    start = time.time()
+    resolved = hub.resolve(url)
+
+    # Copy into a temp sibling and rename, so a worker never sees a half-written model
+    staging = f"{target}.partial"
+    shutil.rmtree(staging, ignore_errors=True)
+    shutil.copytree(resolved, staging)
+    with open(os.path.join(staging, "manifest.json"), "w") as f:
+        json.dump({"url": url, "fetched_at": datetime.now(timezone.utc).isoformat()}, f)
+
+    shutil.rmtree(target, ignore_errors=True)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    os.replace(staging, target)
+
+    print(f"Model fetched to {target} in {time.time() - start:.1f}s")
+    return target
+
+
+def resolve_model_handle(url: str, model_path: str = None, model_dir: str = None) -> str:
+    """
+    Picks what `hub.load` should be given: an explicit local path, a prefetched
+    copy under `model_dir`, or the remote URL as a last resort.
+    """
+    if model_path:
+        if not is_prefetched(model_path):
+            raise FileNotFoundError(f"No SavedModel found at MODEL_PATH={model_path}")
+        return model_path
+
+    if model_dir:
+        candidate = local_model_path(model_dir, url)
+        if is_prefetched(candidate):
+            return candidate
+
+    return url
+
+
+if __name__ == "__main__":
+    from ml_engine.inference import HUB_MODEL_URL
+
+    parser = argparse.ArgumentParser(description="Manage local copies of the style transfer model")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    fetch = subcommands.add_parser("prefetch", help="Download the model into the local model directory")
+    fetch.add_argument("--url", default=HUB_MODEL_URL)
+    fetch.add_argument("--dest", default=os.environ.get("MODEL_DIR", DEFAULT_MODEL_DIR))
+    fetch.add_argument("--force", action="store_true")
+    fetch_lite = subcommands.add_parser("prefetch-tflite", help="Download the TFLite prediction and transfer networks")
+    fetch_lite.add_argument("--variant", choices=["int8", "fp16"], default="int8")
+    fetch_lite.add_argument("--dest", default=os.environ.get("MODEL_DIR", DEFAULT_MODEL_DIR))
+    fetch_lite.add_argument("--force", action="store_true")
+    args = parser.parse_args()
+
+    if args.command == "prefetch":
+        print(prefetch(args.url, args.dest, force=args.force))
+    elif args.command == "prefetch-tflite":
+        from ml_engine.tflite_backend import prefetch_tflite
+        print(prefetch_tflite(args.dest, args.variant, force=args.force))
@@ -0,0 +1,89 @@
+import io
+import math
+from typing import Optional
+
+import numpy as np
+from PIL import ExifTags, Image, ImageOps
+
+# Long side of the content the model sees; larger output sizes are tiled
+MODEL_DIM = 512
+
+
+def decode_resized(data: bytes, max_dim: int) -> Image.Image:
+    """
+    Decodes an image with its long side at most `max_dim`, upright and in RGB.
+
+    For JPEGs, `draft` lets libjpeg decode at 1/2, 1/4 or 1/8 scale directly, so
+    a 12 MP phone photo never exists in memory at full size. The remaining
+    downscale is done with a proper filter. Never upscales.
+    """
+    image = Image.open(io.BytesIO(data))
+
+    scale = max_dim / max(image.size)
+    if scale < 1:
+        # draft keeps the result at least this large, so the final resize stays a downscale
+        image.draft("RGB", (math.ceil(image.width * scale), math.ceil(image.height * scale)))
+
+    # Phones store rotation as an EXIF tag instead of rotating the pixels
+    image = ImageOps.exif_transpose(image)
+    image = image.convert("RGB")
+
+    if max(image.size) > max_dim:
+        scale = max_dim / max(image.size)
+        image = image.resize(
+            (max(1, round(image.width * scale)), max(1, round(image.height * scale))),
+            Image.LANCZOS,
+            reducing_gap=3.0
+        )
+    return image
+
+
+def needs_normalizing(data: bytes, max_dim: int) -> bool:
+    # Already a small, upright JPEG: re-encoding would only lose quality
+    image = Image.open(io.BytesIO(data))
+    orientation = image.getexif().get(ExifTags.Base.Orientation, 1)
+    return image.format != "JPEG" or max(image.size) > max_dim or orientation != 1
+
+
+def normalize_image(data: bytes, max_dim: int, quality: int = 95) -> Optional[bytes]:
+    """
+    The ingest-time version of an upload: at most `max_dim` on the long side,
+    EXIF orientation applied, as JPEG. Returns None if `data` is already that.
+    Raises PIL.UnidentifiedImageError for anything that is not an image.
+    """
+    if not needs_normalizing(data, max_dim):
+        return None
+
+    output = io.BytesIO()
+    decode_resized(data, max_dim).save(output, format="JPEG", quality=quality)
+    return output.getvalue()
+
+
+def content_array(data: bytes, output_size: Optional[int] = None) -> np.ndarray:
+    # uint8 HxWx3 at the resolution inference needs: the model size, or the
+    # requested output size when that is larger (the tiled path)
+    max_dim = output_size if output_size and output_size > MODEL_DIM else MODEL_DIM
+    return np.asarray(decode_resized(data, max_dim))
+
+
+def fit_output(pixels: np.ndarray, output_size: Optional[int] = None) -> np.ndarray:
+    # The model always renders at MODEL_DIM; smaller requested sizes are a
+    # downscale of that render (larger ones come out of the tiled path as is)
+    if not output_size or max(pixels.shape[:2]) <= output_size:
+        return pixels
+    image = Image.fromarray(pixels)
+    scale = output_size / max(image.size)
+    size = (max(1, round(image.width * scale)), max(1, round(image.height * scale)))
+    return np.asarray(image.resize(size, Image.LANCZOS))
+
+
+def style_array(data: bytes) -> np.ndarray:
+    # Decoded at twice the square the style is cropped to, so the crop still downscales
+    return np.asarray(decode_resized(data, 2 * MODEL_DIM))
+
+
+def encode_image(image: Image.Image) -> io.BytesIO:
+    output_buffer = io.BytesIO()
+    image.save(output_buffer, format="JPEG")
+    output_buffer.seek(0)
+    return output_buffer
@@ -0,0 +1,42 @@
+import numpy as np
+
+# Image quality metrics for comparing a fast inference backend against the float
+# model. Inputs are HxWx3 (or 1xHxWx3) arrays in [0, 1] or uint8.
+
+
+def _as_float(image: np.ndarray) -> np.ndarray:
+    image = np.asarray(image)
+    if image.ndim == 4:
+        image = image[0]
+    if image.dtype == np.uint8:
+        return image.astype(np.float64) / 255.0
+    return image.astype(np.float64)
+
+
+def psnr(reference: np.ndarray, candidate: np.ndarray) -> float:
+    mse = np.mean((_as_float(reference) - _as_float(candidate)) ** 2)
+    return float("inf") if mse == 0 else float(10 * np.log10(1.0 / mse))
+
+
+def _gaussian_filter(image: np.ndarray, size: int = 11, sigma: float = 1.5) -> np.ndarray:
+    # Separable "valid" Gaussian blur over the two spatial axes
+    coords = np.arange(size) - (size - 1) / 2
+    kernel = np.exp(-(coords ** 2) / (2 * sigma ** 2))
+    kernel /= kernel.sum()
+    rows = np.apply_along_axis(lambda line: np.convolve(line, kernel, mode="valid"), 0, image)
+    return np.apply_along_axis(lambda line: np.convolve(line, kernel, mode="valid"), 1, rows)
+
+
+def ssim(reference: np.ndarray, candidate: np.ndarray) -> float:
+    # Standard SSIM (11x11 Gaussian window, sigma 1.5), averaged over channels,
+    # matching tf.image.ssim with max_val=1.0
+    x, y = _as_float(reference), _as_float(candidate)
+    c1, c2 = 0.01 ** 2, 0.03 ** 2
+
+    mu_x, mu_y = _gaussian_filter(x), _gaussian_filter(y)
+    sigma_x = _gaussian_filter(x * x) - mu_x ** 2
+    sigma_y = _gaussian_filter(y * y) - mu_y ** 2
+    sigma_xy = _gaussian_filter(x * y) - mu_x * mu_y
+
+    ssim_map = ((2 * mu_x * mu_y + c1) * (2 * sigma_xy + c2)) / ((mu_x ** 2 + mu_y ** 2 + c1) * (sigma_x + sigma_y + c2))
+    return float(ssim_map.mean())
@@ -0,0 +1,136 @@
+import hashlib
+import io
+import os
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+import numpy as np
+
+
+def style_key(style_bytes: bytes) -> str:
+    return hashlib.sha256(style_bytes).hexdigest()
+
+
+def _dump(embedding: np.ndarray) -> bytes:
+    buffer = io.BytesIO()
+    np.save(buffer, embedding, allow_pickle=False)
+    return buffer.getvalue()
+
+
+def _load(raw: bytes) -> np.ndarray:
+    return np.load(io.BytesIO(raw), allow_pickle=False)
+
+
+class DiskTier:
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.npy")
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        try:
+            with open(self._path(key), "rb") as f:
+                return _load(f.read())
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def put(self, key: str, embedding: np.ndarray):
+        # Write to a temp file first so a concurrent reader never sees half an array
+        tmp_path = f"{self._path(key)}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(_dump(embedding))
+        os.replace(tmp_path, self._path(key))
+
+
+class RedisTier:
+    def __init__(self, redis_url: str, ttl_seconds: int):
+        import redis
+        # Short timeouts like the other Redis clients: a missing Redis is a cache
+        # miss, not a stalled job
+        self.client = redis.Redis.from_url(redis_url, socket_connect_timeout=0.5, socket_timeout=0.5)
+        self.ttl_seconds = ttl_seconds
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        raw = self.client.get(f"style-embedding:{key}")
+        return _load(raw) if raw else None
+
+    def put(self, key: str, embedding: np.ndarray):
+        self.client.set(f"style-embedding:{key}", _dump(embedding), ex=self.ttl_seconds)
+
+
+class StyleEmbeddingCache:
+    """
+    In-process LRU of style embeddings keyed by the sha256 of the style bytes,
+    optionally backed by a shared second tier (disk or Redis).
+    """
+
+    def __init__(self, max_entries: int = 32, second_tier=None):
+        self.max_entries = max_entries
+        self.second_tier = second_tier
+        self._entries: OrderedDict[str, np.ndarray] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _remember(self, key: str, embedding: np.ndarray):
+        with self._lock:
+            self._entries[key] = embedding
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        with self._lock:
+            embedding = self._entries.get(key)
+            if embedding is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return embedding
+
+        if self.second_tier is not None:
+            try:
+                embedding = self.second_tier.get(key)
+            except Exception as e:
+                print(f"Style cache second tier read failed: {e}")
+                embedding = None
+            if embedding is not None:
+                self._remember(key, embedding)
+                self.hits += 1
+                return embedding
+
+        self.misses += 1
+        return None
+
+    def put(self, key: str, embedding: np.ndarray):
+        self._remember(key, embedding)
+        if self.second_tier is not None:
+            try:
+                self.second_tier.put(key, embedding)
+            except Exception as e:
+                print(f"Style cache second tier write failed: {e}")
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
+
+
+def build_style_cache(settings) -> StyleEmbeddingCache:
+    second_tier = None
+    if settings.style_cache_tier != "none" and settings.inference_backend == "savedmodel":
+        # Only the TFLite backends cache the style network's output. For the SavedModel
+        # an entry is the decoded float32 style tensor (about 3 MB, the source image
+        # is tens of KB), so a shared tier would move more bytes than a miss costs.
+        print("STYLE_CACHE_TIER is ignored with the savedmodel backend; style tensors stay in process")
+    elif settings.style_cache_tier == "disk":
+        second_tier = DiskTier(settings.style_cache_dir)
+    elif settings.style_cache_tier == "redis":
+        second_tier = RedisTier(settings.redis_url, settings.style_cache_ttl_seconds)
+    return StyleEmbeddingCache(settings.style_cache_size, second_tier)
@@ -0,0 +1,162 @@
+import os
+import threading
+from collections import OrderedDict
+import time
+import urllib.request
+
+import numpy as np
+from PIL import Image, ImageOps
+
+# Magenta's TFLite export of the same arbitrary-image-stylization-v1-256 model,
+# split into its two halves: the prediction network turns a 256x256 style image
+# into a 100-d style bottleneck, the transfer network renders content with it.
+TFLITE_MODEL_URLS = {
+    "int8": {
+        "prediction": "https://tfhub.dev/google/lite-model/magenta/arbitrary-image-stylization-v1-256/int8/prediction/1?lite-format=tflite",
+        "transfer": "https://tfhub.dev/google/lite-model/magenta/arbitrary-image-stylization-v1-256/int8/transfer/1?lite-format=tflite",
+    },
+    "fp16": {
+        "prediction": "https://tfhub.dev/google/lite-model/magenta/arbitrary-image-stylization-v1-256/fp16/prediction/1?lite-format=tflite",
+        "transfer": "https://tfhub.dev/google/lite-model/magenta/arbitrary-image-stylization-v1-256/fp16/transfer/1?lite-format=tflite",
+    },
+}
+
+STYLE_SIZE = 256
+
+
+def tflite_model_paths(model_dir: str, variant: str) -> dict[str, str]:
+    return {
+        part: os.path.join(model_dir, "magenta-tflite", variant, f"{part}.tflite")
+        for part in ("prediction", "transfer")
+    }
+
+
+def prefetch_tflite(model_dir: str, variant: str, force: bool = False) -> dict[str, str]:
+    paths = tflite_model_paths(model_dir, variant)
+    for part, path in paths.items():
+        if os.path.exists(path) and not force:
+            print(f"TFLite {variant} {part} network already present at {path}")
+            continue
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        staging = f"{path}.partial"
+        with urllib.request.urlopen(TFLITE_MODEL_URLS[variant][part]) as response, open(staging, "wb") as f:
+            f.write(response.read())
+        os.replace(staging, path)
+        print(f"TFLite {variant} {part} network fetched to {path}")
+    return paths
+
+
+def style_input(style: Image.Image, size: int = STYLE_SIZE) -> np.ndarray:
+    # A square style input (the prediction network takes exactly 256x256): scale
+    # the short side, crop the centre
+    style = ImageOps.fit(style, (size, size), Image.LANCZOS)
+    return (np.asarray(style, dtype=np.float32) / 255.0)[np.newaxis]
+
+
+def _interpreter_class():
+    # The standalone runtime is much smaller than TensorFlow; use it when installed
+    try:
+        from tflite_runtime.interpreter import Interpreter
+    except ImportError:
+        import tensorflow as tf
+        Interpreter = tf.lite.Interpreter
+    return Interpreter
+
+
+def _set_input(interpreter, detail: dict, value: np.ndarray):
+    # Float I/O models take the value as is; fully integer models need it quantized
+    if detail["dtype"] in (np.int8, np.uint8):
+        scale, zero_point = detail["quantization"]
+        value = np.clip(np.round(value / scale + zero_point), np.iinfo(detail["dtype"]).min, np.iinfo(detail["dtype"]).max)
+    interpreter.set_tensor(detail["index"], value.astype(detail["dtype"]))
+
+
+def _get_output(interpreter, detail: dict) -> np.ndarray:
+    value = interpreter.get_tensor(detail["index"])
+    if detail["dtype"] in (np.int8, np.uint8):
+        scale, zero_point = detail["quantization"]
+        value = (value.astype(np.float32) - zero_point) * scale
+    return value
+
+
+class TFLiteStylizer:
+    """
+    Drop-in for the hub model's `model(content, style)[0]` call, where `style` is
+    the bottleneck from `embed` rather than a style image.
+
+    The transfer network is fully convolutional, so its content input is resized
+    to each job's shape. Resizing reallocates the interpreter, so the last
+    `max_shapes` shapes each keep their own. Interpreters are not thread-safe;
+    each is used under its own lock.
+    """
+
+    def __init__(self, prediction_path: str, transfer_path: str, num_threads: int = 1, max_shapes: int = 8):
+        self.prediction_path = prediction_path
+        self.transfer_path = transfer_path
+        self.num_threads = num_threads
+        self.max_shapes = max_shapes
+        self._interpreter = _interpreter_class()
+        self._lock = threading.Lock()
+
+        self._prediction = self._load(prediction_path)
+        self._prediction_lock = threading.Lock()
+        self._transfers: OrderedDict[tuple[int, int], tuple[object, threading.Lock]] = OrderedDict()
+
+    def _load(self, path: str):
+        interpreter = self._interpreter(model_path=path, num_threads=self.num_threads)
+        interpreter.allocate_tensors()
+        return interpreter
+
+    def embed(self, style_image: np.ndarray) -> np.ndarray:
+        # style_image: 1x256x256x3 float in [0, 1]
+        with self._prediction_lock:
+            _set_input(self._prediction, self._prediction.get_input_details()[0], np.asarray(style_image))
+            self._prediction.invoke()
+            return _get_output(self._prediction, self._prediction.get_output_details()[0])
+
+    def _transfer_for(self, height: int, width: int):
+        with self._lock:
+            if (height, width) not in self._transfers:
+                interpreter = self._interpreter(model_path=self.transfer_path, num_threads=self.num_threads)
+                content_input = self._content_input(interpreter)
+                interpreter.resize_tensor_input(content_input["index"], [1, height, width, 3])
+                interpreter.allocate_tensors()
+                self._transfers[(height, width)] = (interpreter, threading.Lock())
+                if len(self._transfers) > self.max_shapes:
+                    # A thread still holding the evicted interpreter finishes with it normally
+                    self._transfers.popitem(last=False)
+            self._transfers.move_to_end((height, width))
+            return self._transfers[(height, width)]
+
+    @staticmethod
+    def _content_input(interpreter) -> dict:
+        # The bottleneck input is 1x1x1x100; the content image is the other one
+        return next(d for d in interpreter.get_input_details() if d["shape"][-1] == 3)
+
+    def __call__(self, content, bottleneck) -> list:
+        content = np.asarray(content, dtype=np.float32)
+        height, width = content.shape[1:3]
+        interpreter, lock = self._transfer_for(height, width)
+
+        with lock:
+            for detail in interpreter.get_input_details():
+                _set_input(interpreter, detail, content if detail["shape"][-1] == 3 else np.asarray(bottleneck))
+            interpreter.invoke()
+            output = _get_output(interpreter, interpreter.get_output_details()[0])
+
+        return [np.clip(output, 0.0, 1.0)]
+
+
+def load_tflite_stylizer(model_dir: str, variant: str, num_threads: int) -> TFLiteStylizer:
+    paths = tflite_model_paths(model_dir, variant)
+    missing = [path for path in paths.values() if not os.path.exists(path)]
+    if missing:
+        # Same behaviour as the SavedModel: fetch on first use when not prefetched
+        print(f"TFLite {variant} model not prefetched ({', '.join(missing)}), downloading...")
+        prefetch_tflite(model_dir, variant)
+
+    start = time.time()
+    stylizer = TFLiteStylizer(paths["prediction"], paths["transfer"], num_threads=num_threads)
+    print(f"TFLite {variant} model loaded in {time.time() - start:.2f}s with {num_threads} threads")
+    return stylizer
@@ -0,0 +1,72 @@
+from typing import Callable
+
+import numpy as np
+
+
+def tile_starts(length: int, tile: int, overlap: int) -> list[int]:
+    if length <= tile:
+        return [0]
+    stride = tile - overlap
+    starts = list(range(0, length - tile, stride))
+    starts.append(length - tile)
+    return starts
+
+
+def feather_weights(length: int, overlap: int) -> np.ndarray:
+    # Linear ramp over the overlap on both sides. Never reaches zero, so pixels on
+    # the image border (covered by a single tile) still normalise correctly.
+    ramp = np.ones(length, dtype=np.float32)
+    if overlap > 0:
+        edge = np.arange(1, min(overlap, length) + 1, dtype=np.float32) / (overlap + 1)
+        ramp[:len(edge)] = np.minimum(ramp[:len(edge)], edge)
+        ramp[-len(edge):] = np.minimum(ramp[-len(edge):], edge[::-1])
+    return ramp
+
+
+def stylize_tiled(
+    content: np.ndarray,
+    stylize_tile: Callable[[np.ndarray], np.ndarray],
+    tile_size: int = 512,
+    overlap: int = 64,
+) -> np.ndarray:
+    """
+    Stylizes a uint8 HxWx3 image tile by tile and feather-blends the overlaps.
+
+    Tiles are processed one horizontal strip at a time. Rows are written to the
+    uint8 output as soon as no later strip can touch them, so besides the input
+    and output images only about one strip of float accumulators is alive.
+    """
+    height, width = content.shape[:2]
+    tile_h, tile_w = min(tile_size, height), min(tile_size, width)
+    ys = tile_starts(height, tile_h, overlap)
+    xs = tile_starts(width, tile_w, overlap)
+    weights = np.outer(feather_weights(tile_h, overlap), feather_weights(tile_w, overlap))[..., np.newaxis]
+
+    output = np.empty((height, width, 3), dtype=np.uint8)
+    acc = np.zeros((0, width, 3), dtype=np.float32)
+    acc_weight = np.zeros((0, width, 1), dtype=np.float32)
+    acc_top = 0
+
+    for i, y0 in enumerate(ys):
+        y1 = y0 + tile_h
+        missing = y1 - (acc_top + acc.shape[0])
+        if missing > 0:
+            acc = np.concatenate([acc, np.zeros((missing, width, 3), dtype=np.float32)])
+            acc_weight = np.concatenate([acc_weight, np.zeros((missing, width, 1), dtype=np.float32)])
+
+        for x0 in xs:
+            x1 = x0 + tile_w
+            tile = content[y0:y1, x0:x1].astype(np.float32)[np.newaxis] / 255.0
+            stylized = np.asarray(stylize_tile(tile))[0]
+            acc[y0 - acc_top:y1 - acc_top, x0:x1] += stylized * weights
+            acc_weight[y0 - acc_top:y1 - acc_top, x0:x1] += weights
+
+        next_top = ys[i + 1] if i + 1 < len(ys) else height
+        done = next_top - acc_top
+        blended = acc[:done] / acc_weight[:done]
+        output[acc_top:next_top] = np.clip(np.rint(blended * 255.0), 0, 255).astype(np.uint8)
+
+        acc, acc_weight = acc[done:], acc_weight[done:]
+        acc_top = next_top
+
+    return output
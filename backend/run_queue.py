@@ -1,15 +1,43 @@
-# backend/test_queue.py
-from celery_worker import generate_art_task
+# Sends one public job to a running worker, the way POST /generate-public does,
+# and waits for the result.
+#
+#   cd backend && python run_queue.py path/to/content.jpg path/to/style.jpg
+#
+# The inputs are uploaded to the configured storage backend first: the worker
+# downloads its inputs by URL and never reads local paths.
+import argparse
 import os
+import time
+import uuid
 
-base_dir = os.path.abspath("ml_engine")
-content = os.path.join(base_dir, "input", "content.jpg")
-style = os.path.join(base_dir, "input", "style.jpg")
-output = os.path.join(base_dir, "output", "test_queue_result.jpg")
+from app.admission import PUBLIC, QUEUES
+from app.storage import backend
+from app.tasks import celery_app
+
+parser = argparse.ArgumentParser()
+parser.add_argument("content", nargs="?", default=os.path.join("ml_engine", "input", "content.jpg"))
+parser.add_argument("style", nargs="?", default=os.path.join("ml_engine", "input", "style.jpg"))
+args = parser.parse_args()
+
+
+def upload(path: str, folder: str) -> str:
+    key = f"{folder}/{uuid.uuid4().hex}.{path.rsplit('.', 1)[-1]}"
+    with open(path, "rb") as f:
+        backend.put(key, f.read(), "image/jpeg")
+    return backend.url_for(key)
+
+
+content_url = upload(args.content, "temp-public/content")
+style_url = upload(args.style, "temp-public/style")
 
 print("🚀 Sending job to Celery Worker...")
 
-task = generate_art_task.delay(content, style, output)
+task = celery_app.send_task(
+    "generate_art",
+    args=[content_url, style_url],
+    kwargs={"image_id": None, "is_public": True, "enqueued_at": time.time()},
+    queue=QUEUES[PUBLIC]
+)
 
 print(f"✅ Job Sent! Task ID: {task.id}")
 print("Waiting for result...")
@@ -17,4 +45,4 @@ print("Waiting for result...")
 result = task.get()
 
 print("🎉 Result received from worker:")
-print(result)
\ No newline at end of file
+print(result)
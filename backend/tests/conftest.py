@@ -1,27 +1,43 @@
 import pytest
 from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlmodel import Session, SQLModel, create_engine
-from sqlmodel.pool import StaticPool 
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy.pool import NullPool
 from app.db import get_session
+from app.dependencies import principal_cache
 from app.main import app
 
+@pytest.fixture(name="database_path")
+def database_path_fixture(tmp_path):
+    # A file, so the test's sync session and the app's async session see the same data
+    return tmp_path / "test.db"
+
 @pytest.fixture(name="session")
-def session_fixture():
+def session_fixture(database_path):
     engine = create_engine(
-        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+        f"sqlite:///{database_path}", connect_args={"check_same_thread": False}
     )
     SQLModel.metadata.create_all(engine)
     with Session(engine) as session:
         yield session
     SQLModel.metadata.drop_all(engine)
+    engine.dispose()
 
 @pytest.fixture(name="client")  
-def client_fixture(session: Session):  
-    def get_session_override():  
-        return session
+def client_fixture(session: Session, database_path):  
+    # NullPool: TestClient runs each test's requests on its own event loop
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{database_path}", poolclass=NullPool)
+    session_factory = async_sessionmaker(async_engine, class_=AsyncSession, expire_on_commit=False)
+
+    async def get_session_override():  
+        async with session_factory() as async_session:
+            yield async_session
 
     app.dependency_overrides[get_session] = get_session_override  
+    # Each test has its own database, so users cached by an earlier test are stale
+    principal_cache.clear()
 
     client = TestClient(app)  
     yield client  
-    app.dependency_overrides.clear()  
\ No newline at end of file
+    app.dependency_overrides.clear()
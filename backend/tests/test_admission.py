@@ -0,0 +1,80 @@
+from unittest.mock import patch, AsyncMock
+from app.config import settings
+from app.admission import summarize_waits, MAX_DEPTH, PRIVATE, PUBLIC, QUEUES
+from tests.test_nst import login, image_files, CONTENT_BYTES, STYLE_BYTES
+
+
+def batch_files(styles):
+    return [("content_file", ("content.jpg", CONTENT_BYTES, "image/jpeg"))] + [
+        ("style_files", (f"style-{i}.jpg", STYLE_BYTES, "image/jpeg")) for i in range(styles)
+    ]
+
+
+@patch("app.admission.take_token", new_callable=AsyncMock, return_value=12.2)
+def test_rate_limited_user_gets_429_with_retry_after(mock_take, client):
+    login(client)
+
+    response = client.post("/generate", files=image_files())
+
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "13"
+    assert mock_take.call_args.args[0].startswith("user:")
+
+
+@patch("app.admission.take_token", new_callable=AsyncMock, return_value=12.2)
+def test_retry_after_is_exposed_cross_origin(mock_take, client):
+    login(client)
+
+    response = client.post("/generate", files=image_files(), headers={"Origin": settings.frontend_url.split(",")[0].strip()})
+
+    assert response.status_code == 429
+    assert "retry-after" in response.headers["access-control-expose-headers"].lower()
+
+
+@patch("app.admission.take_token", new_callable=AsyncMock, return_value=0.0)
+@patch("app.admission.queue_depth", new_callable=AsyncMock, return_value=10_000)
+@patch("app.admission.recent_waits", new_callable=AsyncMock, return_value=[40.0, 50.0])
+@patch("app.routers.nst.upload_pair", new_callable=AsyncMock)
+def test_full_public_queue_gets_503_before_uploading(mock_upload, mock_waits, mock_depth, mock_take, client):
+    response = client.post("/generate-public", files=image_files())
+
+    assert response.status_code == 503
+    # Retry-After is the recent average wait in that queue
+    assert response.headers["Retry-After"] == "45"
+    assert mock_take.call_args.args[0].startswith("ip:")
+    mock_upload.assert_not_called()
+
+
+@patch("app.admission.take_token", new_callable=AsyncMock, return_value=0.0)
+@patch("app.admission.queue_depth", new_callable=AsyncMock, return_value=0)
+@patch("app.routers.nst.upload_pair", new_callable=AsyncMock, return_value=("content-url", "style-url"))
+@patch("app.routers.nst.celery_app.send_task")
+def test_public_jobs_go_to_the_public_queue(mock_send, mock_upload, mock_depth, mock_take, client):
+    mock_send.return_value.id = "task-1"
+
+    response = client.post("/generate-public", files=image_files())
+
+    assert response.status_code == 200
+    assert mock_send.call_args.kwargs["queue"] == QUEUES[PUBLIC]
+    assert mock_send.call_args.kwargs["kwargs"]["enqueued_at"] > 0
+
+
+@patch("app.admission.take_token", new_callable=AsyncMock, return_value=0.0)
+@patch("app.admission.queue_depth", new_callable=AsyncMock, return_value=MAX_DEPTH[PRIVATE] - 2)
+@patch("app.routers.nst.upload_batch", new_callable=AsyncMock)
+def test_batch_is_charged_and_admitted_per_style(mock_upload, mock_depth, mock_take, client):
+    login(client)
+
+    response = client.post("/generate-batch", files=batch_files(3))
+
+    # Three jobs do not fit in the two places left in the queue
+    assert response.status_code == 503
+    assert mock_take.call_args.args[3] == 3
+    mock_upload.assert_not_called()
+
+
+def test_wait_summary():
+    assert summarize_waits([])["samples"] == 0
+    summary = summarize_waits([float(n) for n in range(1, 101)])
+    assert summary["p50_seconds"] == 50.5
+    assert summary["p95_seconds"] == 95.0
@@ -60,8 +60,8 @@ def test_get_me_authenticated(client):
     assert response.json()["email"] == "auth@test.com"
 
 # --- 4. ACCOUNT DELETION TEST ---
-@patch("app.routers.auth.delete_from_spaces", new_callable=AsyncMock)
-def test_delete_user_account(mock_delete, client, session):
+@patch("app.routers.auth.schedule_deletion", new_callable=AsyncMock, return_value=None)
+def test_delete_user_account(mock_schedule, client, session):
     client.post("/auth/signup", json={"email": "delete@test.com", "password": "pass"})
     login_res = client.post("/auth/login", data={"username": "delete@test.com", "password": "pass"})
     
@@ -80,8 +80,8 @@ def test_delete_user_account(mock_delete, client, session):
     assert "access_token=" in set_cookie
     assert "Max-Age=0" in set_cookie or "expires=" in set_cookie.lower()
 
-@patch("app.routers.auth.delete_from_spaces", new_callable=AsyncMock)
-def test_delete_user_account_with_images(mock_delete, client, session):
+@patch("app.routers.auth.schedule_deletion", new_callable=AsyncMock, return_value="task-1")
+def test_delete_user_account_with_images(mock_schedule, client, session):
     client.post("/auth/signup", json={"email": "has_images@test.com", "password": "pass"})
     login_res = client.post("/auth/login", data={"username": "has_images@test.com", "password": "pass"})
     
@@ -89,9 +89,10 @@ def test_delete_user_account_with_images(mock_delete, client, session):
     client.cookies.set("access_token", token)
 
     user = session.exec(select(User).where(User.email == "has_images@test.com")).first()
+    user_id = user.id
     
     fake_image = Image(
-        user_id=user.id,
+        user_id=user_id,
         content_path="fake_bucket/content_123.jpg",
         style_path="fake_bucket/style_123.jpg",
         result_path="fake_bucket/result_123.jpg"
@@ -105,11 +106,38 @@ def test_delete_user_account_with_images(mock_delete, client, session):
     user_in_db = session.exec(select(User).where(User.email == "has_images@test.com")).first()
     assert user_in_db is None
     
-    image_in_db = session.exec(select(Image).where(Image.user_id == user.id)).first()
+    image_in_db = session.exec(select(Image).where(Image.user_id == user_id)).first()
     assert image_in_db is None
 
-    assert mock_delete.call_count == 3
-    
-    mock_delete.assert_any_call("fake_bucket/content_123.jpg")
-    mock_delete.assert_any_call("fake_bucket/style_123.jpg")
-    mock_delete.assert_any_call("fake_bucket/result_123.jpg")
+    assert response.json()["deletion_task_id"] == "task-1"
+
+    # Every object goes to one background deletion
+    mock_schedule.assert_called_once()
+    assert mock_schedule.call_args.args[1] == [
+        "fake_bucket/content_123.jpg",
+        "fake_bucket/result_123.jpg",
+        "fake_bucket/style_123.jpg"
+    ]
+
+@patch("app.routers.auth.schedule_deletion", new_callable=AsyncMock, return_value="task-1")
+def test_delete_account_checks_shared_objects_in_chunks(mock_schedule, client, session, monkeypatch):
+    from app import result_cache
+
+    # Small chunks so a handful of images spans several IN (...) lists
+    monkeypatch.setattr(result_cache, "IN_CHUNK", 2)
+    client.post("/auth/signup", json={"email": "many@test.com", "password": "pass"})
+    login_res = client.post("/auth/login", data={"username": "many@test.com", "password": "pass"})
+    client.cookies.set("access_token", login_res.headers.get("set-cookie").split("access_token=")[1].split(";")[0])
+
+    user_id = session.exec(select(User).where(User.email == "many@test.com")).first().id
+    for i in range(5):
+        session.add(Image(user_id=user_id, content_path=f"cdn/content_{i}.jpg", style_path="cdn/style.jpg"))
+    # A guest row from a cache hit still points at one of the inputs
+    session.add(Image(user_id=None, content_path="cdn/content_4.jpg", style_path="cdn/other_style.jpg"))
+    session.commit()
+
+    response = client.delete("/auth/account")
+    assert response.status_code == 200
+
+    assert session.exec(select(Image).where(Image.user_id == user_id)).first() is None
+    assert mock_schedule.call_args.args[1] == [f"cdn/content_{i}.jpg" for i in range(4)] + ["cdn/style.jpg"]
@@ -0,0 +1,51 @@
+import threading
+from ml_engine.batching import MicroBatcher, bucket_shape, all_bucket_shapes
+
+
+def test_bucket_shape_snaps_aspect_ratio():
+    assert bucket_shape(512, 512) == (512, 512)
+    assert bucket_shape(3000, 4000) == (384, 512)
+    assert bucket_shape(4000, 3000) == (512, 384)
+    assert bucket_shape(1080, 1920) == (288, 512)
+
+def test_all_bucket_shapes_cover_every_snapped_shape():
+    buckets = all_bucket_shapes()
+    assert len(buckets) == 7
+    for height, width in [(3000, 4000), (4000, 3000), (1080, 1920), (1000, 1000), (333, 999)]:
+        assert bucket_shape(height, width) in buckets
+
+def test_concurrent_submissions_are_grouped_by_key():
+    batches = []
+
+    def run_batch(key, items):
+        batches.append((key, list(items)))
+        return [item * 10 for item in items]
+
+    batcher = MicroBatcher(run_batch, max_batch_size=4, max_wait_ms=200)
+    results = {}
+
+    def submit(key, value):
+        results[value] = batcher(key, value)
+
+    threads = [threading.Thread(target=submit, args=("a", i)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == {0: 0, 1: 10, 2: 20, 3: 30}
+    assert sum(len(items) for _, items in batches) == 4
+    assert max(len(items) for _, items in batches) > 1
+
+def test_batch_errors_propagate_to_every_caller():
+    def run_batch(key, items):
+        raise RuntimeError("model exploded")
+
+    batcher = MicroBatcher(run_batch, max_batch_size=2, max_wait_ms=1)
+    future = batcher.submit("a", 1)
+
+    try:
+        future.result(timeout=5)
+        assert False, "expected the batch error to be raised"
+    except RuntimeError as e:
+        assert "model exploded" in str(e)
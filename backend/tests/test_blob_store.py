@@ -0,0 +1,18 @@
+import os
+import time
+from app.blob_store import VolumeBlobStore
+
+
+def test_volume_blobs_expire(tmp_path):
+    blobs = VolumeBlobStore(str(tmp_path), ttl_seconds=60)
+    blobs.put("fresh", b"new")
+    blobs.put("stale", b"old")
+    stale_time = time.time() - 120
+    os.utime(tmp_path / "stale", (stale_time, stale_time))
+
+    assert blobs.get("fresh") == b"new"
+    assert blobs.get("stale") is None
+    assert blobs.get("missing") is None
+
+    assert blobs.sweep() == 1
+    assert sorted(os.listdir(tmp_path)) == ["fresh"]
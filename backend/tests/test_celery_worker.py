@@ -0,0 +1,111 @@
+import importlib
+import io
+import numpy as np
+import pytest
+from PIL import Image
+from app.config import settings
+from app import storage
+from app.storage_backends import MemoryBackend
+from ml_engine.encoding import OutputEncoding
+
+
+class FakeInferenceServer:
+    # Renders like the model does: long side at MODEL_DIM whatever size was asked for
+    def stylize_array(self, content_bytes, style_embedding, output_size=None):
+        return np.full((384, 512, 3), 128, dtype=np.uint8)
+
+
+@pytest.fixture(name="worker")
+def worker_fixture(monkeypatch):
+    # Server mode keeps TensorFlow out of the worker module
+    monkeypatch.setattr(settings, "inference_mode", "server")
+    worker = importlib.import_module("celery_worker")
+    monkeypatch.setattr(worker, "remote", FakeInferenceServer())
+    monkeypatch.setattr(storage, "backend", MemoryBackend())
+    return worker
+
+def test_small_output_size_is_stored_at_that_size(worker):
+    pixels = worker.stylize(b"content", None, np.zeros((1, 1), dtype=np.float32), "style-key", 256)
+    urls = worker.store_renditions(pixels, OutputEncoding(), {"full": "results/job.jpg"})
+
+    stored = Image.open(io.BytesIO(storage.backend.get(storage.backend.key_for(urls["full"]))))
+    assert stored.size == (256, 192)
+
+def test_completion_does_not_overwrite_a_failed_job(worker, session, monkeypatch):
+    from app.models import Image as ImageRow
+
+    monkeypatch.setattr(worker, "engine", session.get_bind())
+    image = ImageRow(content_path="cdn/content.jpg", style_path="cdn/style.jpg", status="FAILED")
+    session.add(image)
+    session.commit()
+
+    assert worker.complete_image(image.id, result_path="cdn/result.jpg") is False
+
+    session.expire_all()
+    assert session.get(ImageRow, image.id).status == "FAILED"
+
+def test_eviction_sweeps_objects_of_failed_public_jobs(worker, session, monkeypatch):
+    from app.models import ResultCacheEntry
+
+    monkeypatch.setattr(worker, "engine", session.get_bind())
+    backend = storage.backend
+    # A failed public job leaves its inputs behind with no cache entry pointing at them
+    backend.put("temp-public/content/failed.jpg", b"content")
+    backend.put("temp-public/style/failed.jpg", b"style")
+    # A live entry's objects and everything outside temp-public/ stay
+    backend.put("temp-public/results/live.jpg", b"result")
+    backend.put("results/private.jpg", b"result")
+    session.add(ResultCacheEntry(
+        key="live",
+        namespace="public",
+        content_path="cdn/content.jpg",
+        style_path="cdn/style.jpg",
+        result_path=backend.url_for("temp-public/results/live.jpg"),
+        expires_at=None
+    ))
+    session.commit()
+    for key in backend.modified:
+        backend.modified[key] -= settings.public_result_ttl_seconds + 60
+
+    worker.evict_expired_results_task()
+
+    assert sorted(backend.objects) == ["results/private.jpg", "temp-public/results/live.jpg"]
+
+def test_batch_output_of_a_deleted_row_is_removed(worker, session, monkeypatch):
+    from app.models import Image as ImageRow
+
+    monkeypatch.setattr(worker, "engine", session.get_bind())
+    image = ImageRow(content_path="cdn/content.jpg", style_path="cdn/style.jpg", status="PENDING")
+    session.add(image)
+    session.commit()
+    image_id = image.id
+    monkeypatch.setattr(worker, "download_batch_inputs", lambda content_url, outputs, timer=None: (b"content", [(None, None, "key")]))
+
+    def stylize_and_delete(content_bytes, styles, output_size, timer=None):
+        # The user deletes the image while the model runs
+        session.delete(session.get(ImageRow, image_id))
+        session.commit()
+        return [np.full((48, 64, 3), 128, dtype=np.uint8)]
+
+    monkeypatch.setattr(worker, "stylize_styles", stylize_and_delete)
+
+    outputs = [{"image_id": image_id, "style_url": "cdn/style.jpg", "style_key": "key", "result_key": None}]
+    result = worker.generate_art_batch_task.apply(args=["cdn/content.jpg", outputs], task_id="batch").get()
+
+    assert result["outputs"][0]["status"] == "FAILED"
+    assert not storage.backend.objects
+
+def test_failed_job_removes_its_preview(worker, monkeypatch):
+    monkeypatch.setattr(settings, "preview_enabled", True)
+    monkeypatch.setattr(worker, "download_inputs", lambda *args: (b"content", b"style", None))
+    monkeypatch.setattr(worker, "render_preview", lambda *args: (None, np.full((120, 160, 3), 128, dtype=np.uint8)))
+
+    def failing_stylize(*args):
+        raise RuntimeError("model failed")
+
+    monkeypatch.setattr(worker, "stylize", failing_stylize)
+
+    result = worker.generate_art_task.apply(args=["cdn/content.jpg", "cdn/style.jpg"], kwargs={"is_public": True}).get()
+
+    assert result["status"] == "failed"
+    assert not storage.backend.objects
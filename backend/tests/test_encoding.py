@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+from PIL import Image
+from ml_engine.encoding import OutputEncoding, available_formats, encode_renditions
+
+
+def pixels(width=640, height=480):
+    rng = np.random.default_rng(0)
+    return rng.integers(0, 256, (height, width, 3), dtype=np.uint8)
+
+
+@pytest.mark.parametrize("format", available_formats())
+def test_each_available_format_round_trips(format):
+    encoding = OutputEncoding(format=format, quality=70)
+
+    image = Image.open(encoding.encode(Image.fromarray(pixels())))
+
+    assert image.format.lower() == format
+    assert image.size == (640, 480)
+    assert encoding.content_type == f"image/{format}"
+
+
+def test_jpeg_is_progressive_unless_disabled():
+    image = Image.fromarray(pixels())
+    assert Image.open(OutputEncoding().encode(image)).info.get("progressive")
+    assert not Image.open(OutputEncoding(progressive=False).encode(image)).info.get("progressive")
+
+
+def test_unknown_format_is_rejected():
+    with pytest.raises(ValueError):
+        OutputEncoding(format="gif")
+
+
+def test_renditions_share_one_array():
+    renditions = encode_renditions(pixels(), OutputEncoding(), thumbnail_size=320)
+
+    assert Image.open(renditions["full"]).size == (640, 480)
+    assert Image.open(renditions["thumbnail"]).size == (320, 240)
+
+
+def test_no_thumbnail_for_outputs_already_small():
+    renditions = encode_renditions(pixels(200, 150), OutputEncoding(), thumbnail_size=320)
+    assert set(renditions) == {"full"}
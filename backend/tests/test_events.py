@@ -0,0 +1,84 @@
+import asyncio
+import json
+from app.events import sse_stream
+
+
+class FakeRequest:
+    async def is_disconnected(self):
+        return False
+
+def collect(initial, events):
+    async def run():
+        queue = asyncio.Queue()
+        for event in events:
+            queue.put_nowait(event)
+        return [chunk async for chunk in sse_stream(FakeRequest(), "job-events:test", queue, initial, lambda e: e)]
+    return asyncio.run(run())
+
+def parse(chunks):
+    return [json.loads(chunk.split("data: ")[1]) for chunk in chunks if chunk.startswith("event:")]
+
+def test_stream_ends_after_terminal_event():
+    chunks = collect(
+        {"status": "PENDING"},
+        [{"status": "PROCESSING", "stage": "inference"}, {"status": "COMPLETED"}, {"status": "IGNORED"}]
+    )
+    assert [event["status"] for event in parse(chunks)] == ["PENDING", "PROCESSING", "COMPLETED"]
+
+def test_already_finished_job_sends_one_event():
+    assert parse(collect({"status": "FAILED"}, [])) == [{"status": "FAILED"}]
+
+def test_lost_subscription_closes_stream():
+    chunks = collect({"status": "PROCESSING"}, [None])
+    assert [event["status"] for event in parse(chunks)] == ["PROCESSING"]
+
+def test_event_stream_unavailable_without_redis(client):
+    # No Redis in the test environment: clients are told to fall back to polling
+    response = client.get("/events/public/some-task-id")
+    assert response.status_code == 503
+
+def test_open_stream_holds_no_pooled_connection(client, session, database_path, monkeypatch):
+    from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+    from sqlmodel import select
+    from sqlmodel.ext.asyncio.session import AsyncSession
+    from app.db import get_session
+    from app.main import app
+    from app.models import Image, User
+    from app.routers import nst
+
+    # A pooled engine, unlike the client fixture's NullPool one
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{database_path}", pool_size=1, max_overflow=0)
+    session_factory = async_sessionmaker(async_engine, class_=AsyncSession, expire_on_commit=False)
+
+    async def pooled_session():
+        async with session_factory() as async_session:
+            yield async_session
+
+    monkeypatch.setitem(app.dependency_overrides, get_session, pooled_session)
+
+    client.post("/auth/signup", json={"email": "events@test.com", "password": "pass"})
+    login = client.post("/auth/login", data={"username": "events@test.com", "password": "pass"})
+    client.cookies.set("access_token", login.headers.get("set-cookie").split("access_token=")[1].split(";")[0])
+    user = session.exec(select(User).where(User.email == "events@test.com")).one()
+    image = Image(content_path="cdn/content.jpg", style_path="cdn/style.jpg", status="PROCESSING", user_id=user.id)
+    session.add(image)
+    session.commit()
+
+    async def subscribe(channel):
+        return asyncio.Queue()
+
+    checked_out = []
+
+    async def stream(request, channel, queue, initial, prepare):
+        # Runs while the response is being sent, after the handler has returned
+        checked_out.append(async_engine.pool.checkedout())
+        yield f"data: {json.dumps(initial)}\n\n"
+
+    monkeypatch.setattr(nst, "subscribe_or_503", subscribe)
+    monkeypatch.setattr(nst, "sse_stream", stream)
+
+    response = client.get(f"/events/{image.id}")
+
+    assert response.status_code == 200
+    assert checked_out == [0]
+    asyncio.run(async_engine.dispose())
@@ -0,0 +1,114 @@
+import io
+import os
+import subprocess
+import sys
+import threading
+import numpy as np
+import pytest
+from PIL import Image
+from ml_engine.inference_server import InferenceClient
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# A separate process, as in production: the server and its clients must not
+# share a multiprocessing resource tracker
+SERVER_SCRIPT = """
+import sys
+from ml_engine.inference_server import InferenceServer
+from test_inference_server import InvertEngine
+InferenceServer(sys.argv[1], b"secret", InvertEngine()).serve_forever()
+"""
+
+
+class InvertEngine:
+    # Stands in for the model: "stylizes" by inverting, "embeds" as the mean colour
+    def embed(self, style):
+        return style.reshape(-1, 3).mean(axis=0).astype(np.float32)
+
+    def stylize(self, content, style_embedding, output_size=None):
+        if output_size == -1:
+            raise ValueError("bad size")
+        return 255 - content
+
+    def preview(self, content, style_embedding, size):
+        return 255 - content
+
+
+def png_bytes(pixels: np.ndarray) -> bytes:
+    buffer = io.BytesIO()
+    Image.fromarray(pixels).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def shm_segments() -> set:
+    return {name for name in os.listdir("/dev/shm") if name.startswith("psm_")}
+
+
+@pytest.fixture
+def socket_path(tmp_path):
+    path = str(tmp_path / "inference.sock")
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([BACKEND_DIR, os.path.join(BACKEND_DIR, "tests")]))
+    process = subprocess.Popen([sys.executable, "-c", SERVER_SCRIPT, path], env=env)
+    try:
+        InferenceClient(path, b"secret").wait_ready(timeout=20)
+        yield path
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+
+
+def test_stylize_round_trip_through_shared_memory(socket_path):
+    client = InferenceClient(socket_path, b"secret")
+    before = shm_segments()
+
+    style = np.full((32, 32, 3), 90, dtype=np.uint8)
+    embedding = client.embed(png_bytes(style))
+    assert np.allclose(embedding, 90)
+
+    content = np.zeros((24, 40, 3), dtype=np.uint8)
+    output = client.stylize_array(png_bytes(content), embedding)
+    assert output.shape == (24, 40, 3)
+    assert output.min() > 240
+
+    assert client.wait_ready(timeout=1)["requests"] == 2
+    assert shm_segments() == before
+
+
+def test_concurrent_clients_get_their_own_results(socket_path):
+    client = InferenceClient(socket_path, b"secret")
+    results = {}
+
+    def job(value):
+        content = np.full((16, 16, 3), value, dtype=np.uint8)
+        output = client.stylize_array(png_bytes(content), np.zeros(3, dtype=np.float32))
+        results[value] = int(output.mean().round())
+
+    threads = [threading.Thread(target=job, args=(value,)) for value in (0, 100, 200)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert abs(results[0] - 255) <= 2
+    assert abs(results[100] - 155) <= 2
+    assert abs(results[200] - 55) <= 2
+
+
+def test_server_errors_are_raised_in_the_client(socket_path):
+    client = InferenceClient(socket_path, b"secret")
+    content = png_bytes(np.zeros((8, 8, 3), dtype=np.uint8))
+
+    with pytest.raises(RuntimeError, match="bad size"):
+        client.stylize_array(content, np.zeros(3, dtype=np.float32), output_size=-1)
+
+    # The connection is still usable afterwards
+    assert client.stylize_array(content, np.zeros(3, dtype=np.float32)) is not None
+
+
+def test_preview_is_decoded_at_preview_size(socket_path):
+    client = InferenceClient(socket_path, b"secret")
+    content = png_bytes(np.zeros((300, 400, 3), dtype=np.uint8))
+
+    output = client.preview_array(content, np.zeros(3, dtype=np.float32), 160)
+
+    assert output.shape == (120, 160, 3)
@@ -0,0 +1,40 @@
+import json
+from prometheus_client import REGISTRY
+from app import metrics
+from app.metrics import JobTimer
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def test_job_timer_records_stages_and_logs_slow_jobs(monkeypatch, capsys):
+    monkeypatch.setattr(metrics.settings, "slow_job_seconds", 0)
+    before = sample("nst_stage_seconds_count", stage="test_encode")
+
+    timer = JobTimer("private", "job-1")
+    timer.add("test_encode", 0.25)
+    timer.add("test_encode", 0.5)
+    with timer.span("test_upload"):
+        pass
+    timer.finish("completed", output_size=1024)
+
+    # Repeated spans of a stage add up to one observation per job
+    assert sample("nst_stage_seconds_count", stage="test_encode") == before + 1
+    assert sample("nst_job_seconds_count", job_class="private", status="completed") >= 1
+
+    line = next(line for line in capsys.readouterr().out.splitlines() if line.startswith("Slow job "))
+    logged = json.loads(line.removeprefix("Slow job "))
+    assert logged["job_id"] == "job-1"
+    assert logged["stages"]["test_encode"] == 0.75
+    assert list(logged["stages"])[0] == "test_encode"
+    assert logged["output_size"] == 1024
+
+
+def test_metrics_endpoint_without_redis(client):
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert "nst_process_max_rss_bytes" in response.text
+    assert 'nst_cache_hits{cache="presign"}' in response.text
@@ -0,0 +1,28 @@
+from sqlalchemy import inspect, text
+from sqlmodel import SQLModel, create_engine
+from app.migrations import run_migrations, MIGRATIONS
+
+
+def test_migrations_add_index_to_existing_table_once(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    with engine.begin() as conn:
+        # Table as it existed before the index was declared on the model
+        conn.execute(text(
+            "CREATE TABLE image (id INTEGER PRIMARY KEY, content_path VARCHAR, style_path VARCHAR, "
+            "result_path VARCHAR, status VARCHAR, created_at TIMESTAMP, user_id INTEGER)"
+        ))
+
+    run_migrations(engine)
+    run_migrations(engine)
+
+    indexes = {index["name"] for index in inspect(engine).get_indexes("image")}
+    assert {"ix_image_user_id_created_at", "ix_image_batch_id"} <= indexes
+    columns = {column["name"] for column in inspect(engine).get_columns("image")}
+    assert {"preview_path", "thumbnail_path", "batch_id"} <= columns
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT COUNT(*) FROM schema_migrations")).scalar() == len(MIGRATIONS)
+
+def test_migrations_are_noop_on_fresh_schema(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'fresh.db'}")
+    SQLModel.metadata.create_all(engine)
+    run_migrations(engine)
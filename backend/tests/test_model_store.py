@@ -0,0 +1,20 @@
+import pytest
+from ml_engine.model_store import version_from_url, local_model_path, resolve_model_handle
+
+URL = "https://tfhub.dev/google/magenta/arbitrary-image-stylization-v1-256/2"
+
+
+def test_version_from_url():
+    assert version_from_url(URL) == ("arbitrary-image-stylization-v1-256", "2")
+
+def test_prefers_prefetched_copy(tmp_path):
+    path = local_model_path(str(tmp_path), URL)
+    assert resolve_model_handle(URL, model_dir=str(tmp_path)) == URL
+
+    (tmp_path / "arbitrary-image-stylization-v1-256" / "2").mkdir(parents=True)
+    (tmp_path / "arbitrary-image-stylization-v1-256" / "2" / "saved_model.pb").write_bytes(b"")
+    assert resolve_model_handle(URL, model_dir=str(tmp_path)) == path
+
+def test_explicit_model_path_must_exist(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        resolve_model_handle(URL, model_path=str(tmp_path / "missing"))
@@ -0,0 +1,329 @@
+import asyncio
+import io
+from unittest.mock import patch, AsyncMock
+from datetime import datetime
+from PIL import Image as PILImage
+from sqlmodel import select
+from app.config import settings
+from app.models import Image, User
+from app.result_cache import result_key, record_result
+from ml_engine.style_cache import style_key
+
+
+def login(client, email="nst@test.com"):
+    client.post("/auth/signup", json={"email": email, "password": "pass"})
+    login_res = client.post("/auth/login", data={"username": email, "password": "pass"})
+    token = login_res.headers.get("set-cookie").split("access_token=")[1].split(";")[0]
+    client.cookies.set("access_token", token)
+
+def jpeg_bytes(color, size=(64, 48)) -> bytes:
+    buffer = io.BytesIO()
+    PILImage.new("RGB", size, color).save(buffer, format="JPEG")
+    return buffer.getvalue()
+
+CONTENT_BYTES = jpeg_bytes("red")
+STYLE_BYTES = jpeg_bytes("blue")
+
+def image_files():
+    return {
+        "content_file": ("content.jpg", CONTENT_BYTES, "image/jpeg"),
+        "style_file": ("style.jpg", STYLE_BYTES, "image/jpeg"),
+    }
+
+def test_generate_rejects_out_of_range_output_size(client):
+    login(client)
+
+    response = client.post(
+        "/generate",
+        files=image_files(),
+        data={"output_size": str(settings.max_output_size + 1)}
+    )
+
+    assert response.status_code == 422
+
+def seed_cached_result(session, namespace, output_size=None):
+    files = image_files()
+    key = result_key(
+        namespace,
+        style_key(files["content_file"][1]),
+        style_key(files["style_file"][1]),
+        {"output_size": output_size}
+    )
+    record_result(session, key, namespace, "cdn/content.jpg", "cdn/style.jpg", "cdn/result.jpg")
+    return key
+
+@patch("app.routers.nst.upload_pair", new_callable=AsyncMock)
+def test_generate_returns_cached_result_without_upload(mock_upload, client, session):
+    login(client)
+    seed_cached_result(session, "private")
+
+    response = client.post("/generate", files=image_files())
+
+    assert response.status_code == 200
+    assert response.json()["cached"] is True
+    mock_upload.assert_not_called()
+
+    image = session.get(Image, response.json()["database_id"])
+    assert image.status == "COMPLETED"
+    assert image.result_path == "cdn/result.jpg"
+
+@patch("app.routers.nst.upload_pair", new_callable=AsyncMock)
+def test_model_sized_output_shares_the_default_cache_entry(mock_upload, client, session):
+    login(client)
+    seed_cached_result(session, "private")
+
+    response = client.post("/generate", files=image_files(), data={"output_size": "512"})
+
+    assert response.json()["cached"] is True
+    mock_upload.assert_not_called()
+
+@patch("app.routers.nst.upload_pair", new_callable=AsyncMock)
+def test_generate_public_cache_hit_is_pollable(mock_upload, client, session):
+    seed_cached_result(session, "public")
+
+    response = client.post("/generate-public", files=image_files())
+    task_id = response.json()["task_id"]
+
+    assert response.json()["status"] == "completed"
+    mock_upload.assert_not_called()
+
+    status_response = client.get(f"/status/public/{task_id}")
+    assert status_response.json()["status"] == "completed"
+    assert status_response.json()["result_url"] == "cdn/result.jpg"
+
+@patch("app.routers.nst.delete_from_spaces", new_callable=AsyncMock)
+def test_delete_keeps_objects_shared_with_other_images(mock_delete, client, session):
+    login(client)
+    user = session.exec(select(User)).first()
+    shared = dict(content_path="cdn/content.jpg", style_path="cdn/style.jpg", result_path="cdn/result.jpg")
+    first, second = Image(user_id=user.id, **shared), Image(user_id=user.id, **shared)
+    session.add_all([first, second])
+    session.commit()
+
+    client.delete(f"/library/{first.id}")
+    mock_delete.assert_not_called()
+
+    client.delete(f"/library/{second.id}")
+    assert mock_delete.call_count == 3
+
+@patch("app.routers.nst.schedule_deletion", new_callable=AsyncMock, return_value="task-1")
+def test_bulk_delete_only_removes_own_images(mock_schedule, client, session):
+    login(client, "other@test.com")
+    other = session.exec(select(User).where(User.email == "other@test.com")).first()
+    login(client)
+    user = session.exec(select(User).where(User.email == "nst@test.com")).first()
+
+    mine = [
+        Image(user_id=user.id, content_path=f"cdn/content-{n}.jpg", style_path="cdn/style.jpg", result_path=f"cdn/result-{n}.jpg")
+        for n in range(3)
+    ]
+    theirs = Image(user_id=other.id, content_path="cdn/content-0.jpg", style_path="cdn/style.jpg", result_path="cdn/theirs.jpg")
+    session.add_all(mine + [theirs])
+    session.commit()
+
+    response = client.request("DELETE", "/library", json={"image_ids": [image.id for image in mine] + [theirs.id]})
+
+    assert response.status_code == 200
+    assert sorted(response.json()["deleted"]) == sorted(image.id for image in mine)
+    assert response.json()["deletion_task_id"] == "task-1"
+    assert session.exec(select(Image)).all() == [theirs]
+    # content-0.jpg and style.jpg are still referenced by the other user's image
+    assert mock_schedule.call_args.args[1] == [
+        "cdn/content-1.jpg", "cdn/content-2.jpg",
+        "cdn/result-0.jpg", "cdn/result-1.jpg", "cdn/result-2.jpg"
+    ]
+
+def test_library_pages_with_cursor(client, session):
+    login(client)
+    user = session.exec(select(User)).first()
+    same_time = datetime(2026, 1, 1)
+    for i in range(5):
+        session.add(Image(user_id=user.id, content_path="c", style_path="s", created_at=same_time))
+    session.add(Image(user_id=user.id, content_path="c", style_path="s", created_at=datetime(2026, 2, 1)))
+    session.commit()
+
+    seen = []
+    cursor = None
+    while True:
+        params = {"limit": 2} | ({"cursor": cursor} if cursor else {})
+        response = client.get("/library", params=params)
+        assert response.status_code == 200
+        seen.extend(item["id"] for item in response.json())
+        cursor = response.headers.get("x-next-cursor")
+        if not cursor:
+            break
+
+    assert len(seen) == len(set(seen)) == 6
+    assert seen[0] == 6
+
+def test_library_cursor_is_exposed_cross_origin(client):
+    login(client)
+    response = client.get("/library", headers={"Origin": settings.frontend_url.split(",")[0].strip()})
+
+    assert "x-next-cursor" in response.headers["access-control-expose-headers"].lower()
+
+def test_library_rejects_bad_cursor(client):
+    login(client)
+    assert client.get("/library", params={"cursor": "not-a-cursor"}).status_code == 400
+
+@patch("app.routers.nst.upload_pair", new_callable=AsyncMock)
+@patch("app.routers.nst.celery_app.send_task")
+def test_small_inputs_skip_the_synchronous_upload(mock_send, mock_upload, client, tmp_path, monkeypatch):
+    from app import storage
+    from app.blob_store import VolumeBlobStore
+    from app.storage_backends import MemoryBackend
+
+    backend = MemoryBackend()
+    monkeypatch.setattr(storage, "backend", backend)
+    monkeypatch.setattr(storage, "blob_store", VolumeBlobStore(str(tmp_path), ttl_seconds=60))
+    mock_send.return_value.id = "task-1"
+
+    response = client.post("/generate-public", files=image_files())
+
+    assert response.status_code == 200
+    mock_upload.assert_not_called()
+
+    args, kwargs = mock_send.call_args.kwargs["args"], mock_send.call_args.kwargs["kwargs"]
+    blobs = kwargs["input_blobs"]
+    assert storage.blob_store.get(blobs["content"]) == CONTENT_BYTES
+    assert storage.blob_store.get(blobs["style"]) == STYLE_BYTES
+
+    # The durable copies were written by the background task after the response
+    assert backend.get(backend.key_for(args[0])) == CONTENT_BYTES
+    assert backend.get(backend.key_for(args[1])) == STYLE_BYTES
+
+@patch("app.routers.nst.upload_pair", new_callable=AsyncMock)
+@patch("app.routers.nst.celery_app.send_task")
+def test_large_uploads_are_stored_resized(mock_send, mock_upload, client):
+    mock_send.return_value.id = "task-1"
+    stored = {}
+
+    async def capture(content_file, style_file, *folders):
+        stored["content"] = (content_file.filename, await content_file.read())
+        stored["style"] = await style_file.read()
+        return "content-url", "style-url"
+
+    mock_upload.side_effect = capture
+    files = image_files()
+    files["content_file"] = ("photo.png", jpeg_bytes("green", size=(2000, 1000)), "image/png")
+
+    client.post("/generate-public", files=files)
+
+    filename, data = stored["content"]
+    image = PILImage.open(io.BytesIO(data))
+    assert image.format == "JPEG" and image.size == (settings.ingest_max_dim, settings.ingest_max_dim // 2)
+    assert filename == "photo.jpg"
+    # Already small and upright: stored as uploaded
+    assert stored["style"] == STYLE_BYTES
+    assert mock_send.call_args.kwargs["kwargs"]["style_key"] == style_key(STYLE_BYTES)
+
+def test_non_image_upload_is_rejected(client):
+    files = image_files()
+    files["content_file"] = ("notes.txt", b"not an image", "text/plain")
+
+    response = client.post("/generate-public", files=files)
+    assert response.status_code == 400
+
+def test_status_exposes_preview_before_the_result(client, session):
+    login(client)
+    user = session.exec(select(User).where(User.email == "nst@test.com")).one()
+    image = Image(
+        content_path="cdn/content.jpg",
+        style_path="cdn/style.jpg",
+        preview_path="https://bucket.fra1.digitaloceanspaces.com/previews/job.jpg",
+        status="PROCESSING",
+        user_id=user.id
+    )
+    session.add(image)
+    session.commit()
+
+    body = client.get(f"/status/{image.id}").json()
+
+    assert body["status"] == "PROCESSING"
+    assert body["result"] is None
+    assert "previews/job.jpg" in body["preview"]
+
+def test_generate_rejects_unsupported_output_format(client):
+    login(client)
+
+    response = client.post("/generate", files=image_files(), data={"output_format": "gif"})
+
+    assert response.status_code == 422
+
+@patch("app.routers.nst.upload_batch", new_callable=AsyncMock)
+@patch("app.routers.nst.celery_app.send_task")
+def test_generate_batch_uploads_content_once_and_groups_outputs(mock_send, mock_upload, client, session):
+    login(client)
+    # The first style was rendered before: only the other two go to the worker
+    seed_cached_result(session, "private")
+    mock_upload.return_value = ("cdn/content.jpg", ["cdn/style-1.jpg", "cdn/style-2.jpg"])
+    files = [
+        ("content_file", ("content.jpg", CONTENT_BYTES, "image/jpeg")),
+        ("style_files", ("style.jpg", STYLE_BYTES, "image/jpeg")),
+        ("style_files", ("green.jpg", jpeg_bytes("green"), "image/jpeg")),
+        ("style_files", ("white.jpg", jpeg_bytes("white"), "image/jpeg")),
+    ]
+
+    body = client.post("/generate-batch", files=files).json()
+
+    assert body["cached"] == 1 and len(body["database_ids"]) == 3
+    content_file, style_files = mock_upload.call_args.args[:2]
+    assert content_file.filename == "content.jpg" and len(style_files) == 2
+
+    content_url, outputs = mock_send.call_args.kwargs["args"]
+    assert mock_send.call_args.kwargs["task_id"] == body["batch_id"]
+    assert content_url == "cdn/content.jpg"
+    assert [output["image_id"] for output in outputs] == body["database_ids"][1:]
+    assert [output["style_url"] for output in outputs] == ["cdn/style-1.jpg", "cdn/style-2.jpg"]
+
+    status = client.get(f"/batches/{body['batch_id']}").json()
+    assert status["status"] == "PROCESSING" and status["completed"] == 1 and status["total"] == 3
+    assert [output["status"] for output in status["outputs"]] == ["COMPLETED", "PENDING", "PENDING"]
+
+    # Other users cannot see the batch
+    login(client, email="other@test.com")
+    assert client.get(f"/batches/{body['batch_id']}").status_code == 404
+
+def test_generate_batch_limits_style_count(client):
+    login(client)
+    files = [("content_file", ("content.jpg", CONTENT_BYTES, "image/jpeg"))] + [
+        ("style_files", (f"style-{i}.jpg", STYLE_BYTES, "image/jpeg")) for i in range(settings.max_batch_styles + 1)
+    ]
+
+    assert client.post("/generate-batch", files=files).status_code == 422
+
+def test_batch_status_summarizes_outputs():
+    from app.routers.nst import batch_status
+
+    assert batch_status(["COMPLETED", "COMPLETED"]) == "COMPLETED"
+    assert batch_status(["PENDING", "PENDING"]) == "PENDING"
+    assert batch_status(["COMPLETED", "PENDING"]) == "PROCESSING"
+    assert batch_status(["COMPLETED", "FAILED"]) == "PARTIAL"
+    assert batch_status(["FAILED", "FAILED"]) == "FAILED"
+
+def test_job_fails_when_its_staged_input_is_never_stored(client, session, database_path, monkeypatch):
+    from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+    from sqlalchemy.pool import NullPool
+    from sqlmodel.ext.asyncio.session import AsyncSession
+    from app.models import ResultCacheEntry
+    from app.routers import nst
+
+    login(client)
+    user = session.exec(select(User).where(User.email == "nst@test.com")).one()
+    image = Image(content_path="cdn/content.jpg", style_path="cdn/style.jpg", status="PROCESSING", user_id=user.id)
+    session.add(image)
+    session.commit()
+    key = seed_cached_result(session, "private")
+
+    async def missing_style(pending):
+        return ["cdn/style.jpg"]
+
+    engine = create_async_engine(f"sqlite+aiosqlite:///{database_path}", poolclass=NullPool)
+    monkeypatch.setattr(nst, "async_session_factory", async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False))
+    monkeypatch.setattr(nst, "persist_staged", missing_style)
+
+    asyncio.run(nst.persist_inputs([("style.jpg", b"style", "image/jpeg")], image.id))
+
+    session.expire_all()
+    assert session.get(Image, image.id).status == "FAILED"
+    assert session.get(ResultCacheEntry, key) is None
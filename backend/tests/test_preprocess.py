@@ -0,0 +1,38 @@
+import io
+from PIL import ExifTags, Image
+from ml_engine.preprocess import decode_resized, normalize_image
+
+
+def jpeg(size, orientation=None) -> bytes:
+    image = Image.new("RGB", size)
+    # Left half white, so rotation is detectable
+    image.paste((255, 255, 255), (0, 0, size[0] // 2, size[1]))
+    exif = Image.Exif()
+    if orientation:
+        exif[ExifTags.Base.Orientation] = orientation
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", exif=exif)
+    return buffer.getvalue()
+
+def test_decode_resized_hits_target_long_side():
+    image = decode_resized(jpeg((4000, 3000)), 512)
+    assert image.size == (512, 384)
+    assert image.mode == "RGB"
+
+def test_decode_resized_never_upscales():
+    assert decode_resized(jpeg((300, 200)), 512).size == (300, 200)
+
+def test_exif_orientation_is_applied():
+    # Orientation 6: stored landscape, displayed rotated 90 degrees clockwise
+    image = decode_resized(jpeg((400, 200), orientation=6), 512)
+    assert image.size == (200, 400)
+    assert image.getpixel((100, 20))[0] > 200
+
+def test_small_upright_jpeg_is_left_alone():
+    assert normalize_image(jpeg((300, 200)), 512) is None
+
+def test_normalize_rotates_and_shrinks():
+    normalized = Image.open(io.BytesIO(normalize_image(jpeg((4000, 3000), orientation=6), 512)))
+    assert normalized.format == "JPEG"
+    assert normalized.size == (384, 512)
+    assert normalized.getexif().get(ExifTags.Base.Orientation, 1) == 1
@@ -0,0 +1,54 @@
+from datetime import datetime, timezone
+from urllib.parse import urlparse, parse_qs
+import boto3
+from app.presign_cache import PresignCache, LocalPresigner
+
+
+def test_url_reused_until_fraction_of_expiry():
+    cache = PresignCache(reuse_fraction=0.5)
+    cache.put("results/a.jpg", 3600, "signed-1", signed_at=1000)
+
+    assert cache.get("results/a.jpg", 3600, now=1000 + 1799) == "signed-1"
+    assert cache.get("results/a.jpg", 3600, now=1000 + 1800) is None
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+def test_lru_is_bounded():
+    cache = PresignCache(max_entries=2)
+    for key in ("a", "b", "c"):
+        cache.put(key, 3600, f"url-{key}")
+
+    assert cache.get("a", 3600) is None
+    assert cache.get("c", 3600) == "url-c"
+    assert cache.stats()["evictions"] == 1
+
+def test_sign_many_only_signs_missing_keys():
+    cache = PresignCache()
+    cache.put("a", 3600, "cached-a")
+    signed = []
+
+    def sign_many(keys, expiration):
+        signed.extend(keys)
+        return {key: f"fresh-{key}" for key in keys}
+
+    urls = cache.get_or_sign_many(["a", "b"], 3600, sign_many)
+
+    assert urls == {"a": "cached-a", "b": "fresh-b"}
+    assert signed == ["b"]
+
+def test_local_presigner_matches_boto3():
+    endpoint = "https://fra1.digitaloceanspaces.com"
+    client = boto3.client(
+        "s3",
+        region_name="fra1",
+        endpoint_url=endpoint,
+        aws_access_key_id="AKIDEXAMPLE",
+        aws_secret_access_key="secret/with+chars"
+    )
+    key = "results/a b+c~d.jpg"
+    expected = client.generate_presigned_url("get_object", Params={"Bucket": "bucket", "Key": key}, ExpiresIn=900)
+
+    amz_date = parse_qs(urlparse(expected).query)["X-Amz-Date"][0]
+    now = datetime.strptime(amz_date, "%Y%m%dT%H%M%SZ").replace(tzinfo=timezone.utc)
+    signer = LocalPresigner(endpoint, "bucket", "fra1", "AKIDEXAMPLE", "secret/with+chars")
+
+    assert signer.sign_many([key], 900, now=now)[key] == expected
@@ -0,0 +1,47 @@
+from unittest.mock import patch
+from app.principal_cache import PrincipalCache
+from app.security import password_pool
+from tests.test_nst import login
+
+USER = {"id": 1, "email": "a@test.com", "hashed_password": "x"}
+
+
+def test_entries_expire_with_ttl_or_token():
+    cache = PrincipalCache(ttl=30)
+    cache.put("long-token", USER, token_expires_at=1_000, now=0)
+    cache.put("short-token", USER, token_expires_at=10, now=0)
+
+    assert cache.get("long-token", now=29) == USER
+    assert cache.get("long-token", now=31) is None
+    # Never served past the token's own expiry
+    assert cache.get("short-token", now=11) is None
+
+
+def test_size_bound_and_invalidation():
+    cache = PrincipalCache(max_entries=2, ttl=30)
+    cache.put("a", USER, token_expires_at=100, now=0)
+    cache.put("b", {**USER, "id": 2}, token_expires_at=100, now=0)
+    cache.put("c", USER, token_expires_at=100, now=0)
+
+    assert cache.get("a", now=1) is None
+    assert cache.invalidate_user(1) == 1
+    assert cache.get("c", now=1) is None
+    assert cache.get("b", now=1)["id"] == 2
+
+
+def test_deleted_account_token_is_rejected(client):
+    login(client)
+    assert client.get("/auth/me").status_code == 200
+
+    with patch("app.routers.auth.schedule_deletion", return_value=None):
+        client.delete("/auth/account")
+
+    assert client.get("/auth/me").status_code == 401
+
+
+def test_password_hashing_sheds_load_when_saturated(client):
+    with patch.object(password_pool, "pending", password_pool.limit):
+        response = client.post("/auth/signup", json={"email": "busy@test.com", "password": "pass"})
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
@@ -0,0 +1,22 @@
+import numpy as np
+from ml_engine.quality import psnr, ssim
+
+
+def test_identical_images():
+    image = np.random.default_rng(0).random((64, 64, 3))
+    assert psnr(image, image) == float("inf")
+    assert abs(ssim(image, image) - 1.0) < 1e-9
+
+def test_more_noise_scores_lower():
+    rng = np.random.default_rng(0)
+    image = rng.random((64, 64, 3))
+    slightly = np.clip(image + rng.normal(0, 0.02, image.shape), 0, 1)
+    heavily = np.clip(image + rng.normal(0, 0.2, image.shape), 0, 1)
+
+    assert psnr(image, slightly) > psnr(image, heavily) > 0
+    assert ssim(image, slightly) > ssim(image, heavily)
+
+def test_uint8_and_float_inputs_agree():
+    image = np.random.default_rng(0).integers(0, 256, (1, 32, 32, 3), dtype=np.uint8)
+    noisy = np.clip(image.astype(int) + 10, 0, 255).astype(np.uint8)
+    assert abs(psnr(image, noisy) - psnr(image / 255.0, noisy / 255.0)) < 1e-9
@@ -0,0 +1,87 @@
+import asyncio
+import io
+import pytest
+from unittest.mock import patch
+from fastapi import UploadFile
+from app import storage
+from app.config import settings
+
+
+def make_upload(data: bytes) -> UploadFile:
+    return UploadFile(file=io.BytesIO(data), filename="photo.jpg", size=len(data), headers={"content-type": "image/jpeg"})
+
+@patch.object(storage.backend, "client")
+def test_small_upload_uses_single_put(mock_s3):
+    url = asyncio.run(storage.upload_to_spaces(make_upload(b"x" * 100), folder="content"))
+
+    assert url.endswith(".jpg") and "/content/" in url
+    mock_s3.put_object.assert_called_once()
+    mock_s3.create_multipart_upload.assert_not_called()
+
+@patch("app.storage.MULTIPART_CHUNK_SIZE", 10)
+@patch.object(storage.backend, "client")
+def test_large_upload_streams_multipart_parts(mock_s3):
+    mock_s3.create_multipart_upload.return_value = {"UploadId": "upload-1"}
+    mock_s3.upload_part.side_effect = lambda **kwargs: {"ETag": f"etag-{kwargs['PartNumber']}"}
+
+    asyncio.run(storage.upload_to_spaces(make_upload(b"x" * 25), folder="content"))
+
+    bodies = [call.kwargs["Body"] for call in mock_s3.upload_part.call_args_list]
+    assert [len(body) for body in bodies] == [10, 10, 5]
+    parts = mock_s3.complete_multipart_upload.call_args.kwargs["MultipartUpload"]["Parts"]
+    assert [part["PartNumber"] for part in parts] == [1, 2, 3]
+
+@patch("app.storage.MULTIPART_CHUNK_SIZE", 10)
+@patch.object(storage.backend, "client")
+def test_oversize_upload_is_aborted(mock_s3, monkeypatch):
+    monkeypatch.setattr(settings, "max_upload_bytes", 15)
+    mock_s3.create_multipart_upload.return_value = {"UploadId": "upload-1"}
+    mock_s3.upload_part.return_value = {"ETag": "etag"}
+
+    upload = make_upload(b"x" * 25)
+    upload.size = None
+    with pytest.raises(storage.UploadTooLarge):
+        asyncio.run(storage.upload_to_spaces(upload, folder="content"))
+
+    mock_s3.abort_multipart_upload.assert_called_once()
+    mock_s3.complete_multipart_upload.assert_not_called()
+
+def test_generate_rejects_oversize_upload_before_uploading(client, monkeypatch):
+    monkeypatch.setattr(settings, "max_upload_bytes", 4)
+
+    response = client.post(
+        "/generate-public",
+        files={
+            "content_file": ("content.jpg", b"too-many-bytes", "image/jpeg"),
+            "style_file": ("style.jpg", b"style", "image/jpeg"),
+        }
+    )
+
+    assert response.status_code == 413
+
+def test_deferred_upload_retries_then_reports_missing_inputs(monkeypatch):
+    from app.storage_backends import MemoryBackend
+
+    class FlakyBackend(MemoryBackend):
+        def __init__(self, failures):
+            super().__init__()
+            self.failures = failures
+
+        def put(self, key, body, content_type=None):
+            if self.failures.get(key, 0) > 0:
+                self.failures[key] -= 1
+                raise ConnectionError("storage unavailable")
+            super().put(key, body, content_type)
+
+    backend = FlakyBackend({"content/a.jpg": 1, "style/b.jpg": settings.staged_upload_attempts})
+    monkeypatch.setattr(storage, "backend", backend)
+    monkeypatch.setattr(settings, "staged_upload_backoff_seconds", 0)
+
+    missing = asyncio.run(storage.persist_staged([
+        ("content/a.jpg", b"content", "image/jpeg"),
+        ("style/b.jpg", b"style", "image/jpeg")
+    ]))
+
+    # The content went up on its second attempt; the style never did
+    assert backend.get("content/a.jpg") == b"content"
+    assert missing == [backend.url_for("style/b.jpg")]
@@ -0,0 +1,122 @@
+import io
+import time
+import pytest
+from unittest.mock import MagicMock
+from urllib.parse import urlparse, parse_qs
+from app import storage
+from app.storage_backends import LocalBackend, MemoryBackend, S3Backend, verify_file_signature
+from app.deletion import delete_in_batches
+
+
+@pytest.fixture
+def local_backend(tmp_path, monkeypatch):
+    backend = LocalBackend(str(tmp_path), "http://testserver", "secret")
+    monkeypatch.setattr(storage, "backend", backend)
+    return backend
+
+@pytest.mark.parametrize("make_backend", [
+    lambda tmp_path: LocalBackend(str(tmp_path), "http://testserver", "secret"),
+    lambda tmp_path: MemoryBackend("http://testserver", "secret"),
+])
+def test_backend_round_trip(tmp_path, make_backend):
+    backend = make_backend(tmp_path)
+    backend.put("results/a.jpg", b"abc", "image/jpeg")
+    backend.put("results/b.jpg", io.BytesIO(b"from a stream"))
+
+    assert backend.get("results/a.jpg") == b"abc"
+    assert backend.get("results/b.jpg") == b"from a stream"
+    assert backend.key_for(backend.url_for("results/a.jpg")) == "results/a.jpg"
+
+    backend.delete("results/a.jpg")
+    assert not backend.exists("results/a.jpg")
+    assert backend.exists("results/b.jpg")
+
+@pytest.mark.parametrize("make_backend", [
+    lambda tmp_path: LocalBackend(str(tmp_path), "http://testserver", "secret"),
+    lambda tmp_path: MemoryBackend("http://testserver", "secret"),
+])
+def test_list_older_than_filters_by_prefix_and_age(tmp_path, make_backend):
+    backend = make_backend(tmp_path)
+    backend.put("temp-public/content/a.jpg", b"a")
+    backend.put("temp-public/results/b.jpg", b"b")
+    backend.put("results/c.jpg", b"c")
+
+    assert sorted(backend.list_older_than("temp-public/", time.time() + 60)) == [
+        "temp-public/content/a.jpg",
+        "temp-public/results/b.jpg"
+    ]
+    assert backend.list_older_than("temp-public/", time.time() - 60) == []
+    assert backend.list_older_than("missing/", time.time() + 60) == []
+
+def test_chunked_upload_only_appears_on_complete(tmp_path):
+    backend = LocalBackend(str(tmp_path), "http://testserver", "secret")
+    upload = backend.start_upload("content/big.jpg")
+    upload.write(b"part-1 ")
+    upload.write(b"part-2")
+    assert not backend.exists("content/big.jpg")
+
+    upload.complete()
+    assert backend.get("content/big.jpg") == b"part-1 part-2"
+
+def test_local_keys_cannot_escape_root(tmp_path):
+    backend = LocalBackend(str(tmp_path / "store"), "http://testserver", "secret")
+    with pytest.raises(ValueError):
+        backend.put("../outside.jpg", b"x")
+
+def test_signature_expires():
+    backend = MemoryBackend("http://testserver", "secret")
+    query = parse_qs(urlparse(backend.presign("a.jpg", 60)).query)
+    expires, signature = int(query["expires"][0]), query["signature"][0]
+
+    assert verify_file_signature("secret", "a.jpg", expires, signature)
+    assert not verify_file_signature("secret", "b.jpg", expires, signature)
+    assert not verify_file_signature("secret", "a.jpg", expires, signature, now=expires + 1)
+
+def test_files_route_serves_presigned_local_object(client, local_backend):
+    local_backend.put("results/out.jpg", b"jpeg-bytes", "image/jpeg")
+    url = storage.get_presigned_url(local_backend.url_for("results/out.jpg"))
+
+    response = client.get(url.replace("http://testserver", ""))
+    assert response.status_code == 200
+    assert response.content == b"jpeg-bytes"
+    assert response.headers["content-type"] == "image/jpeg"
+
+    tampered = url.replace("out.jpg", "other.jpg")
+    assert client.get(tampered.replace("http://testserver", "")).status_code == 403
+
+def test_files_route_hands_off_to_nginx(client, local_backend, monkeypatch):
+    monkeypatch.setattr(storage.settings, "storage_accel_redirect_prefix", "/protected-files")
+    local_backend.put("results/out.jpg", b"jpeg-bytes")
+    url = local_backend.presign("results/out.jpg", 60)
+
+    response = client.get(url.replace("http://testserver", ""))
+    assert response.headers["x-accel-redirect"] == "/protected-files/results/out.jpg"
+    assert response.content == b""
+
+def test_s3_delete_many_batches_requests_and_reports_failures():
+    backend = S3Backend("bucket", "fra1", "a", "b")
+    backend.client = MagicMock()
+    backend.client.delete_objects.side_effect = [
+        {"Errors": [{"Key": "k-7", "Code": "AccessDenied", "Message": "denied"}]},
+        {}
+    ]
+
+    failed = backend.delete_many([f"k-{n}" for n in range(1500)])
+
+    assert failed == ["k-7"]
+    calls = backend.client.delete_objects.call_args_list
+    assert [len(call.kwargs["Delete"]["Objects"]) for call in calls] == [1000, 500]
+    assert calls[0].kwargs["Delete"]["Quiet"] is True
+
+def test_delete_in_batches_reports_progress():
+    backend = MemoryBackend("http://testserver", "secret")
+    keys = [f"results/{n}.jpg" for n in range(2500)]
+    for key in keys:
+        backend.put(key, b"x")
+
+    updates = []
+    progress = delete_in_batches(backend, keys, updates.append)
+
+    assert progress == {"total": 2500, "deleted": 2500, "failed": 0}
+    assert [update["deleted"] for update in updates] == [1000, 2000, 2500]
+    assert not backend.objects
@@ -0,0 +1,43 @@
+import numpy as np
+from ml_engine.style_cache import StyleEmbeddingCache, DiskTier, style_key
+
+
+def test_style_key_is_content_hash():
+    assert style_key(b"abc") == style_key(b"abc")
+    assert style_key(b"abc") != style_key(b"abd")
+
+def test_lru_evicts_least_recently_used():
+    cache = StyleEmbeddingCache(max_entries=2)
+    cache.put("a", np.zeros(1))
+    cache.put("b", np.ones(1))
+    cache.get("a")
+    cache.put("c", np.ones(1))
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.get("c") is not None
+
+def test_get_counts_hits_and_misses():
+    cache = StyleEmbeddingCache(max_entries=4)
+    assert cache.get("style") is None
+    cache.put("style", np.arange(3, dtype=np.float32))
+
+    np.testing.assert_array_equal(cache.get("style"), np.arange(3, dtype=np.float32))
+    assert cache.hits == 1 and cache.misses == 1
+
+def test_disk_tier_survives_new_process_cache(tmp_path):
+    embedding = np.random.rand(1, 4, 4, 3).astype(np.float32)
+    StyleEmbeddingCache(second_tier=DiskTier(str(tmp_path))).put("style", embedding)
+
+    fresh_cache = StyleEmbeddingCache(second_tier=DiskTier(str(tmp_path)))
+    np.testing.assert_array_equal(fresh_cache.get("style"), embedding)
+
+def test_savedmodel_keeps_style_tensors_in_process(tmp_path):
+    from types import SimpleNamespace
+    from ml_engine.style_cache import build_style_cache
+
+    settings = SimpleNamespace(style_cache_tier="disk", style_cache_dir=str(tmp_path), style_cache_size=4, inference_backend="savedmodel")
+    assert build_style_cache(settings).second_tier is None
+
+    settings.inference_backend = "tflite-int8"
+    assert isinstance(build_style_cache(settings).second_tier, DiskTier)
@@ -0,0 +1,40 @@
+import numpy as np
+from ml_engine.tiling import stylize_tiled, tile_starts, feather_weights
+
+
+def test_tile_starts_cover_the_whole_axis():
+    starts = tile_starts(1200, 512, 64)
+    assert starts[0] == 0
+    assert starts[-1] + 512 == 1200
+    assert all(b - a <= 512 - 64 for a, b in zip(starts, starts[1:]))
+    assert tile_starts(300, 512, 64) == [0]
+
+def test_feather_weights_never_zero():
+    weights = feather_weights(512, 64)
+    assert weights.min() > 0
+    assert weights[256] == 1.0
+
+def test_identity_stylizer_reconstructs_input():
+    content = np.random.default_rng(0).integers(0, 255, (700, 1100, 3), dtype=np.uint8)
+    visited = []
+
+    def identity(tile):
+        visited.append(tile.shape)
+        return tile
+
+    output = stylize_tiled(content, identity, tile_size=256, overlap=32)
+
+    np.testing.assert_array_equal(output, content)
+    assert all(shape == (1, 256, 256, 3) for shape in visited)
+
+def test_overlaps_are_blended():
+    content = np.zeros((256, 400, 3), dtype=np.uint8)
+    calls = iter(range(10))
+
+    # Each tile paints a flat, different value so seams would show as hard steps
+    def flat(tile):
+        return np.full_like(tile, next(calls) * 0.5)
+
+    output = stylize_tiled(content, flat, tile_size=256, overlap=112)
+    row = output[0, :, 0].astype(int)
+    assert np.abs(np.diff(row)).max() <= 4
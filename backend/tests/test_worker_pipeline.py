@@ -0,0 +1,43 @@
+import threading
+import time
+from worker_pipeline import Stage
+
+
+def test_stage_limits_in_flight_calls():
+    stage = Stage("test", workers=1, queue_depth=1)
+    release = threading.Event()
+    stage.submit(release.wait)
+    stage.submit(release.wait)
+
+    blocked = threading.Event()
+
+    def third_submit():
+        stage.submit(lambda: None)
+        blocked.set()
+
+    submitter = threading.Thread(target=third_submit)
+    submitter.start()
+    time.sleep(0.1)
+    assert not blocked.is_set()
+
+    release.set()
+    submitter.join(timeout=5)
+    assert blocked.is_set()
+    stage.shutdown()
+
+def test_stage_run_returns_result_and_raises_errors():
+    stage = Stage("test", workers=2, queue_depth=0)
+    assert stage.run(lambda a, b: a + b, 2, 3) == 5
+
+    def explode():
+        raise ValueError("bad input")
+
+    try:
+        stage.run(explode)
+        assert False, "expected the stage error to be raised"
+    except ValueError:
+        pass
+
+    # A failed call must still give its slot back
+    assert stage.run(lambda: "ok") == "ok"
+    stage.shutdown()
@@ -0,0 +1,57 @@
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable
+
+
+class Stage:
+    """
+    A bounded thread pool for one step of a job (download, inference, upload).
+
+    At most `workers` calls run at once and at most `queue_depth` more wait for a
+    free worker. Callers beyond that block in `submit`, which pushes back on the
+    Celery task threads instead of piling up decoded images in memory.
+    """
+
+    def __init__(self, name: str, workers: int, queue_depth: int):
+        self.name = name
+        self.workers = workers
+        self.queue_depth = queue_depth
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"stage-{name}")
+        self._slots = threading.BoundedSemaphore(workers + queue_depth)
+
+    def submit(self, fn: Callable, *args, **kwargs) -> Future:
+        self._slots.acquire()
+        try:
+            future = self._executor.submit(fn, *args, **kwargs)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def run(self, fn: Callable, *args, **kwargs):
+        return self.submit(fn, *args, **kwargs).result()
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
+
+
+class JobPipeline:
+    """
+    Download -> inference -> upload, each on its own bounded pool.
+
+    Run the worker with a threads pool whose concurrency is larger than the
+    inference stage: while one task's tensor is in the model, other task threads
+    are downloading the next jobs' inputs or uploading finished results.
+    """
+
+    def __init__(self, settings):
+        self.download = Stage("download", settings.pipeline_download_workers, settings.pipeline_download_queue_depth)
+        # The micro-batcher can only fill a batch if that many jobs reach it at once
+        inference_workers = max(settings.pipeline_inference_workers, settings.inference_batch_size)
+        self.inference = Stage("inference", inference_workers, settings.pipeline_inference_queue_depth)
+        self.upload = Stage("upload", settings.pipeline_upload_workers, settings.pipeline_upload_queue_depth)
+
+    def shutdown(self):
+        for stage in (self.download, self.inference, self.upload):
+            stage.shutdown()
@@ -9,6 +9,7 @@ interface ImageJob {
     id: number;
     status: string;
     result: string | null;
+    thumbnail?: string | null;
 }
 
 export default function LibraryPage() {
@@ -19,23 +20,38 @@ export default function LibraryPage() {
     const [imageToDelete, setImageToDelete] = useState<number | null>(null);
     const [isDeleting, setIsDeleting] = useState(false);
     const [toastMessage, setToastMessage] = useState<string | null>(null);
+    const [nextCursor, setNextCursor] = useState<string | null>(null);
+    const [isLoadingMore, setIsLoadingMore] = useState(false);
+
+    const fetchLibrary = async (cursor?: string) => {
+        const response = await api.get("/library", { params: cursor ? { cursor } : {} });
+        setImages((prevImages) => cursor ? [...prevImages, ...response.data] : response.data);
+        setNextCursor(response.headers["x-next-cursor"] ?? null);
+    };
 
     useEffect(() => {
-        const fetchLibrary = async () => {
-            try {
-                const response = await api.get("/library");
-                setImages(response.data);
-            } catch (err) {
+        fetchLibrary()
+            .catch((err) => {
                 console.error("Failed to fetch library", err);
                 setError("Could not load your images.");
-            } finally {
-                setIsLoading(false);
-            }
-        };
-
-        fetchLibrary();
+            })
+            .finally(() => setIsLoading(false));
     }, []);
 
+    const loadMore = async () => {
+        if (!nextCursor) return;
+
+        setIsLoadingMore(true);
+        try {
+            await fetchLibrary(nextCursor);
+        } catch (err) {
+            console.error("Failed to fetch more images", err);
+            setToastMessage("Could not load more images. Please try again.");
+        } finally {
+            setIsLoadingMore(false);
+        }
+    };
+
     useEffect(() => {
         if (toastMessage) {
             const timer = setTimeout(() => {
@@ -54,7 +70,7 @@ export default function LibraryPage() {
             const a = document.createElement("a");
             a.href = url;
 
-            a.download = `neural_art_${img_id}.jpg`;
+            a.download = `neural_art_${img_id}.${blob.type.split("/")[1]?.replace("jpeg", "jpg") || "jpg"}`;
             document.body.appendChild(a);
             a.click();
             document.body.removeChild(a);
@@ -113,8 +129,9 @@ export default function LibraryPage() {
                             <div key={img.id} className="overflow-hidden rounded-xl bg-gray-800 border border-gray-700 shadow-xl transition hover:border-purple-500/50">
                                 {img.status === "COMPLETED" && img.result ? (
                                     <img
-                                        src={img.result}
+                                        src={img.thumbnail ?? img.result}
                                         alt={`Generated Art ${img.id}`}
+                                        loading="lazy"
                                         crossOrigin="anonymous"
                                         className="h-64 w-full object-cover"
                                     />
@@ -153,6 +170,18 @@ export default function LibraryPage() {
                         ))}
                     </div>
                 )}
+                {nextCursor && !isLoading && (
+                    <div className="mt-8 flex justify-center">
+                        <button
+                            onClick={loadMore}
+                            disabled={isLoadingMore}
+                            className="flex items-center px-6 py-2 rounded-lg text-sm font-semibold bg-gray-800 border border-gray-700 text-gray-300 hover:border-purple-500/50 hover:text-white transition disabled:opacity-50"
+                        >
+                            {isLoadingMore && <Loader2 className="w-4 h-4 mr-2 animate-spin" />}
+                            Load more
+                        </button>
+                    </div>
+                )}
             </div>
             {imageToDelete !== null && (
                 <div className="fixed inset-0 z-50 flex items-center justify-center bg-black/60 backdrop-blur-sm px-4">
@@ -2,6 +2,7 @@
 
 import { useState, useEffect, useRef } from "react";
 import api from "@/lib/api";
+import { isAxiosError } from "axios";
 import Link from "next/link";
 import { UploadCloud, Image as ImageIcon, Loader2, CheckCircle, AlertCircle, Download } from "lucide-react";
 
@@ -18,11 +19,13 @@ export default function GeneratorWidget({ isPublic = false }: GeneratorWidgetPro
     const [isUploading, setIsUploading] = useState(false);
     const [status, setStatus] = useState<string>("IDLE");
     const [resultImage, setResultImage] = useState<string | null>(null);
+    const [previewImage, setPreviewImage] = useState<string | null>(null);
     const [isDraggingContent, setIsDraggingContent] = useState(false);
     const [isDraggingStyle, setIsDraggingStyle] = useState(false);
     const [errorMessage, setErrorMessage] = useState<string | null>(null);
 
     const pollingIntervalRef = useRef<NodeJS.Timeout | null>(null);
+    const eventSourceRef = useRef<EventSource | null>(null);
 
     const handleFileChange = (e: React.ChangeEvent<HTMLInputElement>, setFile: (f: File) => void, setPreview: (p: string) => void) => {
         if (e.target.files && e.target.files[0]) {
@@ -50,6 +53,7 @@ export default function GeneratorWidget({ isPublic = false }: GeneratorWidgetPro
                     setStatus("FAILED");
                 } else {
                     setStatus("PROCESSING");
+                    if (res.data.preview) setPreviewImage(res.data.preview);
                 }
             } catch (error) {
                 console.error("Polling error", error);
@@ -59,11 +63,51 @@ export default function GeneratorWidget({ isPublic = false }: GeneratorWidgetPro
         }, 3000);
     };
 
+    const watchStatus = (trackingId: string | number, isPublicUser: boolean) => {
+        if (typeof EventSource === "undefined") {
+            pollStatus(trackingId, isPublicUser);
+            return;
+        }
+
+        const eventsEndpoint = isPublicUser ? `/events/public/${trackingId}` : `/events/${trackingId}`;
+        const source = new EventSource(`${api.defaults.baseURL}${eventsEndpoint}`, { withCredentials: true });
+        eventSourceRef.current = source;
+        let finished = false;
+
+        source.addEventListener("status", (e) => {
+            const data = JSON.parse((e as MessageEvent).data);
+            const jobStatus = data.status ? data.status.toUpperCase() : "UNKNOWN";
+
+            if (jobStatus === "COMPLETED") {
+                finished = true;
+                source.close();
+                setStatus("COMPLETED");
+                setResultImage(data.result);
+            } else if (jobStatus === "FAILED") {
+                finished = true;
+                source.close();
+                setStatus("FAILED");
+            } else {
+                setStatus("PROCESSING");
+                if (data.preview) setPreviewImage(data.preview);
+            }
+        });
+
+        // Stream unavailable or dropped before a final status: fall back to polling
+        source.onerror = () => {
+            source.close();
+            if (!finished) {
+                pollStatus(trackingId, isPublicUser);
+            }
+        };
+    };
+
     useEffect(() => {
         return () => {
             if (pollingIntervalRef.current) {
                 clearInterval(pollingIntervalRef.current);
             }
+            eventSourceRef.current?.close();
         };
     }, []);
 
@@ -72,6 +116,7 @@ export default function GeneratorWidget({ isPublic = false }: GeneratorWidgetPro
 
         setIsUploading(true);
         setStatus("UPLOADING");
+        setPreviewImage(null);
 
         const formData = new FormData();
         formData.append("content_file", contentFile);
@@ -84,11 +129,19 @@ export default function GeneratorWidget({ isPublic = false }: GeneratorWidgetPro
             const trackingId = isPublic ? response.data.task_id : response.data.database_id;
 
             setStatus("PROCESSING");
-            pollStatus(trackingId, isPublic);
+            watchStatus(trackingId, isPublic);
 
         } catch (error) {
             console.error("Upload failed", error);
-            setErrorMessage("Upload failed. If you are a guest, you may have hit your daily limit.");
+            const code = isAxiosError(error) ? error.response?.status : undefined;
+            const retryAfter = isAxiosError(error) ? error.response?.headers["retry-after"] : undefined;
+            if (code === 429) {
+                setErrorMessage(`You are sending jobs too quickly. Please try again in ${retryAfter ?? "a few"} seconds.`);
+            } else if (code === 503) {
+                setErrorMessage(`We are busy right now. Please try again in ${retryAfter ?? "a few"} seconds.`);
+            } else {
+                setErrorMessage("Upload failed. If you are a guest, you may have hit your daily limit.");
+            }
             setStatus("FAILED");
         } finally {
             setIsUploading(false);
@@ -128,7 +181,7 @@ export default function GeneratorWidget({ isPublic = false }: GeneratorWidgetPro
             const url = window.URL.createObjectURL(blob);
             const a = document.createElement("a");
             a.href = url;
-            a.download = "neural_art_masterpiece.jpg";
+            a.download = `neural_art_masterpiece.${blob.type.split("/")[1]?.replace("jpeg", "jpg") || "jpg"}`;
             document.body.appendChild(a);
             a.click();
             document.body.removeChild(a);
@@ -145,6 +198,7 @@ export default function GeneratorWidget({ isPublic = false }: GeneratorWidgetPro
         setStylePreview(null);
         setStatus("IDLE");
         setResultImage(null);
+        setPreviewImage(null);
     };
 
     return (
@@ -198,8 +252,12 @@ export default function GeneratorWidget({ isPublic = false }: GeneratorWidgetPro
                 {status === "UPLOADING" && <div className="flex items-center gap-3 text-purple-400 text-xl animate-pulse"><UploadCloud className="w-6 h-6" /> Uploading...</div>}
                 {status === "PROCESSING" && (
                     <div className="flex flex-col items-center gap-4">
-                        <div className="flex items-center gap-3 text-yellow-400 text-xl"><Loader2 className="w-8 h-8 animate-spin" /> Painting masterpiece...</div>
-                        <p className="text-sm text-gray-500">This can take a few seconds.</p>
+                        <div className="flex items-center gap-3 text-yellow-400 text-xl"><Loader2 className="w-8 h-8 animate-spin" /> {previewImage ? "Adding the details..." : "Painting masterpiece..."}</div>
+                        {previewImage ? (
+                            <img src={previewImage} alt="Preview" className="w-full max-w-2xl rounded-lg object-cover blur-[1px] opacity-90" />
+                        ) : (
+                            <p className="text-sm text-gray-500">This can take a few seconds.</p>
+                        )}
                     </div>
                 )}
                 {status === "FAILED" && <div className="flex items-center gap-3 text-red-500 text-xl"><AlertCircle className="w-6 h-6" /> Something went wrong.</div>}